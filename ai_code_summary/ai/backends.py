@@ -0,0 +1,122 @@
+import os
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+# Definitions of common languages: Python, JavaScript/TypeScript, Go, Rust, Java-like interfaces and enums
+_DEFINITION = re.compile(
+    r"^[ \t]*(?:export[ \t]+)?(?:pub[ \t]+)?(?:async[ \t]+)?"
+    r"(?:def|class|function|func|fn|interface|struct|enum|trait)[ \t]+([A-Za-z_]\w*)",
+    re.MULTILINE,
+)
+_DOCSTRING = re.compile(r'^[ \t]*(?:"""|\'\'\')\s*(.+?)\s*(?:"""|\'\'\'|$)', re.MULTILINE)
+_COMMENT = re.compile(r"^[ \t]*(?://+|#+|/\*+|\*+)[ \t]*([^!\s].*?)[ \t]*(?:\*/)?$", re.MULTILINE)
+_SECTION = re.compile(r"^### (.+)$", re.MULTILINE)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+# Definitions listed by an extractive summary, and characters kept from a sentence
+_MAX_NAMES = 12
+_MAX_SENTENCE_LENGTH = 240
+
+
+@dataclass
+class Completion:
+    """
+    The answer of a backend to a prompt, with the tokens it used and its estimated cost.
+    """
+
+    text: str
+    tokens_in: int = 0
+    tokens_out: int = 0
+    cost: float = 0.0
+
+
+class SummaryBackend(ABC):
+    """
+    Creates summaries from prompts, see `ai_code_summary.ai.summary.get_summary_backend`.
+
+    `name` identifies the backend and its model in cache keys and checkpoints, so summaries of different
+    backends are never mixed. `concurrency` is the number of requests the backend handles at once,
+    `supports_batch` whether it offers the OpenAI Batch API, and `supports_packing` whether it can answer for
+    several files at once in JSON. `priced` tells whether its requests cost the configured per-million token
+    prices. `errors` are the exceptions raised when a summary cannot be created, which fail that summary alone
+    rather than the whole run.
+    """
+
+    name: str
+    concurrency: int
+    supports_batch: bool = False
+    supports_packing: bool = False
+    priced: bool = False
+    errors: tuple[type[Exception], ...] = ()
+
+    @abstractmethod
+    def complete(self, prompt: str) -> Completion:
+        """
+        Answers a user prompt under SUMMARY_PROMPT.
+
+        Args:
+            prompt (str): The user message, including everything to be summarized.
+
+        Returns:
+            Completion: The answer.
+        """
+
+
+class ExtractiveBackend(SummaryBackend):
+    """
+    Summarizes without a model, from what the text itself states, see `summarize_extractively`.
+
+    Summaries are deterministic and created at local-disk speed, for tests and offline environments.
+    """
+
+    name = "extractive"
+
+    def __init__(self, concurrency: int | None = None):
+        self.concurrency = concurrency or os.cpu_count() or 1
+
+    def complete(self, prompt: str) -> Completion:
+        # Prompts are an instruction followed by a blank line and what to summarize
+        _, separator, body = prompt.partition("\n\n")
+        return Completion(summarize_extractively(body if separator else prompt))
+
+
+def summarize_extractively(text: str) -> str:
+    """
+    Summarizes text from its own words, without a model.
+
+    Listings of summaries under `### name` headers keep the first sentence of each summary. Code is described
+    by its first docstring or comment and the names it defines. Other text keeps the first sentence of its
+    first paragraphs.
+
+    Args:
+        text (str): The code or the summaries to summarize.
+
+    Returns:
+        str: The summary.
+    """
+    sections = _SECTION.split(text)
+    if len(sections) > 1:
+        lines = []
+        for name, body in zip(sections[1::2], sections[2::2]):
+            sentence = _first_sentence(body)
+            lines.append(f"- `{name.strip()}`: {sentence}" if sentence else f"- `{name.strip()}`")
+        return "\n".join(lines)
+
+    sentences = []
+    if description := _DOCSTRING.search(text) or _COMMENT.search(text):
+        sentences.append(_first_sentence(description.group(1)).rstrip(".") + ".")
+    names = list(dict.fromkeys(_DEFINITION.findall(text)))
+    if names:
+        listed = ", ".join(f"`{name}`" for name in names[:_MAX_NAMES])
+        more = f" and {len(names) - _MAX_NAMES} more" if len(names) > _MAX_NAMES else ""
+        sentences.append(f"Defines {listed}{more}.")
+    if sentences:
+        return " ".join(sentences)
+
+    paragraphs = [paragraph for paragraph in re.split(r"\n\s*\n", text) if paragraph.strip()]
+    return " ".join(_first_sentence(paragraph) for paragraph in paragraphs[:3]) or "Empty file."
+
+
+def _first_sentence(text: str) -> str:
+    sentence = _SENTENCE_END.split(" ".join(text.split()), maxsplit=1)[0]
+    return sentence if len(sentence) <= _MAX_SENTENCE_LENGTH else f"{sentence[: _MAX_SENTENCE_LENGTH - 3]}..."
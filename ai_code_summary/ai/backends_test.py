@@ -0,0 +1,42 @@
+from ai_code_summary.ai.backends import ExtractiveBackend, summarize_extractively
+
+
+def test_summarize_extractively_describes_code_from_its_docstring_and_definitions():
+    content = '"""Parses the configuration. Also validates it."""\n\nclass Config:\n    def load(self): ...\n\ndef main(): ...\n'
+
+    assert summarize_extractively(content) == "Parses the configuration. Defines `Config`, `load`, `main`."
+
+
+def test_summarize_extractively_reads_comments_of_other_languages():
+    content = "// HTTP client for the API.\nexport async function fetchUser(id) {}\nfunc Close() {}\n"
+
+    assert summarize_extractively(content) == "HTTP client for the API. Defines `fetchUser`, `Close`."
+
+
+def test_summarize_extractively_limits_the_listed_names():
+    content = "".join(f"def f{index}(): ...\n" for index in range(15))
+
+    assert summarize_extractively(content).endswith("`f11` and 3 more.")
+
+
+def test_summarize_extractively_keeps_the_first_sentence_of_each_listed_summary():
+    listing = "### a.py\n\nLoads data. Then caches it.\n\n### sub/\n\n"
+
+    assert summarize_extractively(listing) == "- `a.py`: Loads data.\n- `sub/`"
+
+
+def test_summarize_extractively_falls_back_to_the_first_sentences():
+    assert summarize_extractively("name: app\nversion: 1\n\nport: 80\n") == "name: app version: 1 port: 80"
+    assert summarize_extractively("") == "Empty file."
+
+
+def test_extractive_backend_summarizes_what_follows_the_instruction():
+    backend = ExtractiveBackend(concurrency=2)
+
+    completion = backend.complete("Summarize the following code:\n\n# Entry point.\ndef main(): ...\n")
+
+    assert completion.text == "Entry point. Defines `main`."
+    assert (completion.tokens_in, completion.tokens_out, completion.cost) == (0, 0, 0.0)
+    assert backend.concurrency == 2
+    assert not backend.supports_batch
+    assert not backend.supports_packing
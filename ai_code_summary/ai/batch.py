@@ -0,0 +1,174 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from loguru import logger
+from openai import OpenAI
+
+from ai_code_summary.ai.openai_backend import get_open_ai_client
+from ai_code_summary.ai.summary import (
+    build_summary_prompt,
+    build_summary_request,
+    get_summary_cache,
+    try_summarize_content,
+)
+from ai_code_summary.ai.summary_cache import make_cache_key
+from ai_code_summary.ai.tokens import count_tokens
+from ai_code_summary.env_variables import (
+    OPENAI_MODEL,
+    SUMMARY_BATCH_MAX_REQUESTS,
+    SUMMARY_BATCH_POLL_SECONDS,
+    SUMMARY_CHUNK_TOKENS,
+    SUMMARY_CONCURRENCY,
+    SUMMARY_MAX_RETRIES,
+    SUMMARY_PROMPT,
+)
+from ai_code_summary.metrics.stages import BATCH_DISCOUNT, estimate_cost, get_pipeline_metrics
+
+_BATCH_ENDPOINT = "/v1/chat/completions"
+_PENDING_STATUSES = {"validating", "in_progress", "finalizing", "cancelling"}
+
+
+def summarize_contents_in_batch(
+    contents: list[str], poll_seconds: float = SUMMARY_BATCH_POLL_SECONDS
+) -> list[str | None]:
+    """
+    Summarizes many contents at once through the OpenAI Batch API.
+
+    Cached and duplicate contents are only requested once. Content that has to be summarized in chunks,
+    and requests that fail inside the batch, are resubmitted on their own through `try_summarize_content`.
+
+    Args:
+        contents (list[str]): The contents to be summarized.
+        poll_seconds (float): The delay between two checks of a batch's status.
+
+    Returns:
+        list[str | None]: The summaries, in the order of `contents`, None where a summary could not be created.
+    """
+    summary_cache = get_summary_cache()
+    summaries: dict[str, str | None] = {}
+    requests: dict[str, str] = {}  # custom_id -> content
+    for content in dict.fromkeys(contents):
+        if summary_cache and (cached_summary := summary_cache.get(_cache_key(content))) is not None:
+            summaries[content] = cached_summary
+        elif count_tokens(content, OPENAI_MODEL) <= SUMMARY_CHUNK_TOKENS:
+            requests[f"request-{len(requests)}"] = content
+
+    # The shared client does not retry, the few file and batch calls can simply retry on their own
+    client = get_open_ai_client().with_options(max_retries=SUMMARY_MAX_RETRIES)
+    custom_ids = list(requests)
+    for start in range(0, len(custom_ids), SUMMARY_BATCH_MAX_REQUESTS):
+        batch_requests = {
+            custom_id: requests[custom_id] for custom_id in custom_ids[start : start + SUMMARY_BATCH_MAX_REQUESTS]
+        }
+        for custom_id, summary in _run_batch(client, batch_requests, poll_seconds).items():
+            summaries[batch_requests[custom_id]] = summary
+            if summary_cache:
+                summary_cache.put(_cache_key(batch_requests[custom_id]), summary)
+
+    remaining = [content for content in dict.fromkeys(contents) if content not in summaries]
+    if remaining:
+        logger.info(f"Summarizing {len(remaining)} contents outside of the batch")
+        with ThreadPoolExecutor(max_workers=max(SUMMARY_CONCURRENCY, 1), thread_name_prefix="summary") as executor:
+            summaries.update(zip(remaining, executor.map(try_summarize_content, remaining)))
+
+    return [summaries[content] for content in contents]
+
+
+def _cache_key(content: str) -> str:
+    """
+    Builds the summary cache key of a content for the configured model and prompt.
+
+    Args:
+        content (str): The content to be summarized.
+
+    Returns:
+        str: The cache key.
+    """
+    return make_cache_key(content, OPENAI_MODEL, SUMMARY_PROMPT)
+
+
+def _run_batch(client: OpenAI, requests: dict[str, str], poll_seconds: float) -> dict[str, str]:
+    """
+    Submits one batch of summary requests and waits for it to finish.
+
+    Args:
+        client (OpenAI): The OpenAI client.
+        requests (dict[str, str]): The contents to be summarized, keyed by their custom id.
+        poll_seconds (float): The delay between two checks of the batch's status.
+
+    Returns:
+        dict[str, str]: The summaries of the requests that succeeded, keyed by their custom id.
+    """
+    lines = [
+        json.dumps(
+            {
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": _BATCH_ENDPOINT,
+                "body": build_summary_request(build_summary_prompt(content)),
+            }
+        )
+        for custom_id, content in requests.items()
+    ]
+    with get_pipeline_metrics().stage("batch") as sample:
+        input_file = client.files.create(file=("summaries.jsonl", "\n".join(lines).encode("utf-8")), purpose="batch")
+        batch = client.batches.create(input_file_id=input_file.id, endpoint=_BATCH_ENDPOINT, completion_window="24h")
+        logger.info(f"Submitted batch {batch.id} with {len(lines)} requests")
+
+        start_time = time.time()
+        while batch.status in _PENDING_STATUSES:
+            time.sleep(poll_seconds)
+            batch = client.batches.retrieve(batch.id)
+        logger.info(f"Batch {batch.id} {batch.status} in {time.time() - start_time:.2f} seconds")
+
+        if not batch.output_file_id:
+            logger.error(f"Batch {batch.id} {batch.status} without any output")
+            return {}
+        output = client.files.content(batch.output_file_id).text
+        sample.count = len(lines)
+        sample.tokens_in, sample.tokens_out = _sum_batch_usage(output)
+        sample.cost = estimate_cost(sample.tokens_in, sample.tokens_out, discount=BATCH_DISCOUNT)
+    return _parse_batch_output(output)
+
+
+def _parse_batch_output(output: str) -> dict[str, str]:
+    """
+    Extracts the summaries of successful requests from a batch output file.
+
+    Args:
+        output (str): The JSONL content of the batch output file.
+
+    Returns:
+        dict[str, str]: The summaries, keyed by the custom id of their request.
+    """
+    summaries = {}
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+        result = json.loads(line)
+        response = result.get("response") or {}
+        if result.get("error") or response.get("status_code") != 200:
+            logger.warning(f"Batch request {result.get('custom_id')} failed: {result.get('error') or response}")
+            continue
+        summaries[result["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+    return summaries
+
+
+def _sum_batch_usage(output: str) -> tuple[int, int]:
+    """
+    Adds up the tokens used by the requests of a batch output file.
+
+    Args:
+        output (str): The JSONL content of the batch output file.
+
+    Returns:
+        tuple[int, int]: The prompt and completion tokens.
+    """
+    tokens_in = tokens_out = 0
+    for line in output.splitlines():
+        if line.strip():
+            usage = ((json.loads(line).get("response") or {}).get("body") or {}).get("usage") or {}
+            tokens_in += usage.get("prompt_tokens", 0)
+            tokens_out += usage.get("completion_tokens", 0)
+    return tokens_in, tokens_out
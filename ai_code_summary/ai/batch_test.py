@@ -0,0 +1,166 @@
+import json
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+from openai import OpenAI
+
+from ai_code_summary.ai.batch import _parse_batch_output, summarize_contents_in_batch
+
+
+class _FakeBatchHandler(BaseHTTPRequestHandler):
+    """
+    A minimal local stand-in for the files and batches endpoints of the OpenAI API.
+
+    Requests whose content contains "FAIL" fail inside the batch.
+    """
+
+    files: dict[str, bytes]
+    batches: dict[str, dict]
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.path == "/v1/files":
+            message = BytesParser(policy=HTTP).parsebytes(
+                f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body
+            )
+            upload = next(
+                part for part in message.iter_parts() if part.get_param("name", header="content-disposition") == "file"
+            )
+            file_id = f"file-{len(self.files)}"
+            self.files[file_id] = upload.get_payload(decode=True)
+            self._send_json(
+                {
+                    "id": file_id,
+                    "object": "file",
+                    "bytes": len(self.files[file_id]),
+                    "created_at": 0,
+                    "filename": "summaries.jsonl",
+                    "purpose": "batch",
+                }
+            )
+        elif self.path == "/v1/batches":
+            request = json.loads(body)
+            batch_id = f"batch-{len(self.batches)}"
+            self.batches[batch_id] = {
+                "id": batch_id,
+                "object": "batch",
+                "endpoint": request["endpoint"],
+                "input_file_id": request["input_file_id"],
+                "completion_window": request["completion_window"],
+                "created_at": 0,
+                "status": "validating",
+            }
+            self._send_json(self.batches[batch_id])
+
+    def do_GET(self):
+        if self.path.startswith("/v1/batches/"):
+            batch = self.batches[self.path.removeprefix("/v1/batches/")]
+            if batch["status"] == "validating":
+                batch["status"] = "in_progress"
+            elif batch["status"] == "in_progress":
+                self._complete(batch)
+            self._send_json(batch)
+        elif self.path.startswith("/v1/files/") and self.path.endswith("/content"):
+            content = self.files[self.path.removeprefix("/v1/files/").removesuffix("/content")]
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+    def _complete(self, batch: dict) -> None:
+        output_lines = []
+        for line in self.files[batch["input_file_id"]].decode().splitlines():
+            request = json.loads(line)
+            content = request["body"]["messages"][-1]["content"].split("\n\n", 1)[1]
+            if "FAIL" in content:
+                result = {
+                    "custom_id": request["custom_id"],
+                    "response": {"status_code": 500, "body": {}},
+                    "error": None,
+                }
+            else:
+                completion = {
+                    "choices": [
+                        {"index": 0, "message": {"role": "assistant", "content": f"batch summary of {content}"}}
+                    ]
+                }
+                result = {
+                    "custom_id": request["custom_id"],
+                    "response": {"status_code": 200, "body": completion},
+                    "error": None,
+                }
+            output_lines.append(json.dumps(result))
+        output_file_id = f"file-{len(self.files)}"
+        self.files[output_file_id] = "\n".join(output_lines).encode()
+        batch.update(status="completed", output_file_id=output_file_id)
+
+    def _send_json(self, data: dict) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def fake_batch_client():
+    handler = type("Handler", (_FakeBatchHandler,), {"files": {}, "batches": {}})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield OpenAI(api_key="test", base_url=f"http://127.0.0.1:{server.server_port}/v1", max_retries=0)
+    server.shutdown()
+    server.server_close()
+
+
+@patch("ai_code_summary.ai.batch.get_summary_cache", return_value=None)
+@patch("ai_code_summary.ai.batch.try_summarize_content", side_effect=lambda content: f"single summary of {content}")
+def test_summarize_contents_in_batch(mock_summarize_content, _mock_get_summary_cache, fake_batch_client):
+    contents = ["a = 1", "FAIL = 1", "b = 2", "a = 1"]
+
+    with patch("ai_code_summary.ai.batch.get_open_ai_client", return_value=fake_batch_client):
+        summaries = summarize_contents_in_batch(contents, poll_seconds=0)
+
+    assert summaries == [
+        "batch summary of a = 1",
+        "single summary of FAIL = 1",
+        "batch summary of b = 2",
+        "batch summary of a = 1",
+    ]
+    mock_summarize_content.assert_called_once_with("FAIL = 1")
+
+
+@patch("ai_code_summary.ai.batch.get_summary_cache", return_value=None)
+@patch("ai_code_summary.ai.batch.SUMMARY_BATCH_MAX_REQUESTS", 1)
+def test_summarize_contents_in_batch_splits_large_batches(_mock_get_summary_cache, fake_batch_client):
+    with patch("ai_code_summary.ai.batch.get_open_ai_client", return_value=fake_batch_client):
+        summaries = summarize_contents_in_batch(["a = 1", "b = 2"], poll_seconds=0)
+
+    assert summaries == ["batch summary of a = 1", "batch summary of b = 2"]
+
+
+def test_parse_batch_output_skips_failed_requests():
+    output = "\n".join(
+        [
+            json.dumps(
+                {
+                    "custom_id": "ok",
+                    "response": {"status_code": 200, "body": {"choices": [{"message": {"content": "summary"}}]}},
+                }
+            ),
+            json.dumps({"custom_id": "error", "response": None, "error": {"code": "server_error"}}),
+            json.dumps({"custom_id": "rate_limited", "response": {"status_code": 429, "body": {}}, "error": None}),
+            "",
+        ]
+    )
+
+    assert _parse_batch_output(output) == {"ok": "summary"}
@@ -0,0 +1,94 @@
+from collections.abc import Callable
+
+# Lines closing a block are never the start of a new one, even after a blank line
+_CLOSING_PREFIXES = ("}", ")", "]")
+
+
+def split_into_blocks(content: str) -> list[str]:
+    """
+    Splits code into top-level blocks such as functions and classes.
+
+    A block starts at a line that is not indented and follows a blank line, so decorators, comments and
+    docstrings stay attached to the definition they precede.
+
+    Args:
+        content (str): The code to split.
+
+    Returns:
+        list[str]: The blocks, which concatenate back to `content`.
+    """
+    blocks = []
+    current_lines = []
+    previous_blank = True
+    for line in content.splitlines(keepends=True):
+        stripped = line.strip()
+        starts_block = (
+            previous_blank and stripped and not line[0].isspace() and not stripped.startswith(_CLOSING_PREFIXES)
+        )
+        if current_lines and starts_block:
+            blocks.append("".join(current_lines))
+            current_lines = []
+        current_lines.append(line)
+        previous_blank = not stripped
+    if current_lines:
+        blocks.append("".join(current_lines))
+    return blocks
+
+
+def split_into_chunks(content: str, max_tokens: int, count_tokens: Callable[[str], int]) -> list[str]:
+    """
+    Splits code into chunks of at most `max_tokens`, cutting on top-level block boundaries where possible.
+
+    Blocks are packed greedily into chunks. Blocks larger than `max_tokens` are cut between lines, and lines
+    larger than `max_tokens`, such as minified code, are cut between characters.
+
+    Args:
+        content (str): The code to split.
+        max_tokens (int): The maximum number of tokens per chunk.
+        count_tokens (Callable[[str], int]): Counts the tokens of a text.
+
+    Returns:
+        list[str]: The chunks, which concatenate back to `content`.
+    """
+    chunks = []
+    current_pieces = []
+    current_tokens = 0
+    for block in split_into_blocks(content):
+        for piece, piece_tokens in _split_oversized(block, max_tokens, count_tokens):
+            if current_pieces and current_tokens + piece_tokens > max_tokens:
+                chunks.append("".join(current_pieces))
+                current_pieces, current_tokens = [], 0
+            current_pieces.append(piece)
+            current_tokens += piece_tokens
+    if current_pieces:
+        chunks.append("".join(current_pieces))
+    return chunks
+
+
+def _split_oversized(text: str, max_tokens: int, count_tokens: Callable[[str], int]) -> list[tuple[str, int]]:
+    """
+    Cuts a text that does not fit in `max_tokens` into lines, and lines into character slices.
+
+    Args:
+        text (str): The text to cut.
+        max_tokens (int): The maximum number of tokens per piece.
+        count_tokens (Callable[[str], int]): Counts the tokens of a text.
+
+    Returns:
+        list[tuple[str, int]]: The pieces together with their token counts.
+    """
+    text_tokens = count_tokens(text)
+    if text_tokens <= max_tokens:
+        return [(text, text_tokens)]
+
+    lines = text.splitlines(keepends=True)
+    if len(lines) > 1:
+        return [piece for line in lines for piece in _split_oversized(line, max_tokens, count_tokens)]
+
+    # A single line longer than the budget: slice it proportionally to its token density
+    slice_length = max(len(text) * max_tokens // text_tokens, 1)
+    return [
+        piece
+        for start in range(0, len(text), slice_length)
+        for piece in _split_oversized(text[start : start + slice_length], max_tokens, count_tokens)
+    ]
@@ -0,0 +1,49 @@
+from ai_code_summary.ai.chunking import split_into_blocks, split_into_chunks
+
+_CODE = """import os
+
+
+@decorator
+def first():
+    return 1
+
+
+class Second:
+    def method(self):
+
+        return 2
+"""
+
+
+def _count_characters(text: str) -> int:
+    return len(text)
+
+
+def test_split_into_blocks_on_top_level_definitions():
+    blocks = split_into_blocks(_CODE)
+
+    assert "".join(blocks) == _CODE
+    assert [block.splitlines()[0] for block in blocks] == ["import os", "@decorator", "class Second:"]
+
+
+def test_split_into_blocks_keeps_closing_braces_with_their_block():
+    code = "function a() {\n  return 1;\n\n}\n\nfunction b() {}\n"
+
+    assert split_into_blocks(code) == ["function a() {\n  return 1;\n\n}\n\n", "function b() {}\n"]
+
+
+def test_split_into_chunks_packs_blocks():
+    chunks = split_into_chunks(_CODE, 60, _count_characters)
+
+    assert "".join(chunks) == _CODE
+    assert all(len(chunk) <= 60 for chunk in chunks)
+    assert chunks[0] == "import os\n\n\n@decorator\ndef first():\n    return 1\n\n\n"
+
+
+def test_split_into_chunks_cuts_oversized_lines():
+    minified = "x" * 250
+
+    chunks = split_into_chunks(minified, 100, _count_characters)
+
+    assert "".join(chunks) == minified
+    assert [len(chunk) for chunk in chunks] == [100, 100, 50]
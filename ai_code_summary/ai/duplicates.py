@@ -0,0 +1,55 @@
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future
+from pathlib import Path
+
+from ai_code_summary.ai.summary import try_summarize_content
+
+
+def share_summaries(
+    representatives: dict[str, tuple[Path, str]],
+    base_dir: Path,
+    summarize: Callable[[str], str | None] | None = None,
+) -> Callable[[str], str | None]:
+    """
+    Wraps a summarize function so that each cluster of duplicate contents is summarized once.
+
+    The first file of a cluster asking for a summary summarizes the cluster's representative, every other file
+    of the cluster waits for that summary and reuses it. Summaries reused by near-duplicates end with a note
+    referencing the representative, since they describe its content rather than their own.
+
+    Args:
+        representatives (dict[str, tuple[Path, str]]): The path and content of the representative of each content,
+            see `find_representatives`.
+        base_dir (Path): The base directory of the code files, used to reference representatives.
+        summarize (Callable[[str], str | None] | None): Summarizes a content. Defaults to `try_summarize_content`.
+
+    Returns:
+        Callable[[str], str | None]: Summarizes any content of `representatives`.
+    """
+    summarize = summarize or try_summarize_content
+    lock = threading.Lock()
+    summaries: dict[str, Future[str | None]] = {}
+
+    def summarize_shared(content: str) -> str | None:
+        representative_path, representative_content = representatives[content]
+        with lock:
+            future = summaries.get(representative_content)
+            is_owner = future is None
+            if is_owner:
+                future = summaries[representative_content] = Future()
+
+        if is_owner:
+            try:
+                future.set_result(summarize(representative_content))
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+        summary = future.result()
+
+        if summary is None or content == representative_content:
+            return summary
+        relative_path = representative_path.relative_to(base_dir).as_posix()
+        return f"{summary}\n\n_Near-duplicate of `{relative_path}`, whose summary is shared._"
+
+    return summarize_shared
@@ -0,0 +1,41 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from ai_code_summary.ai.duplicates import share_summaries
+
+_BASE_DIR = Path("/repo")
+
+
+def test_share_summaries_summarizes_each_representative_once():
+    representative = (_BASE_DIR / "gen" / "client.py", "client")
+    representatives = {"client": representative, "client v2": representative, "other": (_BASE_DIR / "o.py", "other")}
+    calls = []
+    lock = threading.Lock()
+
+    def summarize(content):
+        with lock:
+            calls.append(content)
+        return f"Summary of {content}"
+
+    summarize_shared = share_summaries(representatives, _BASE_DIR, summarize)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        summaries = list(executor.map(summarize_shared, ["client", "client v2", "other", "client"]))
+
+    assert sorted(calls) == ["client", "other"]
+    assert summaries == [
+        "Summary of client",
+        "Summary of client\n\n_Near-duplicate of `gen/client.py`, whose summary is shared._",
+        "Summary of other",
+        "Summary of client",
+    ]
+
+
+def test_share_summaries_keeps_failed_summaries_unavailable():
+    representative = (_BASE_DIR / "client.py", "client")
+    summarize_shared = share_summaries(
+        {"client": representative, "client v2": representative}, _BASE_DIR, lambda _: None
+    )
+
+    assert summarize_shared("client") is None
+    assert summarize_shared("client v2") is None
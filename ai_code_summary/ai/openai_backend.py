@@ -0,0 +1,131 @@
+import time
+from functools import cache
+
+from loguru import logger
+from openai import APIConnectionError, InternalServerError, OpenAI, OpenAIError, RateLimitError
+from openai.types.chat import ChatCompletion
+
+from ai_code_summary.ai.backends import Completion, SummaryBackend
+from ai_code_summary.ai.rate_limiter import get_backoff_delay, get_retry_after
+from ai_code_summary.ai.summary import build_summary_request, get_rate_limiter, get_request_slots
+from ai_code_summary.ai.tokens import count_tokens
+from ai_code_summary.env_variables import (
+    OPENAI_API_KEY,
+    OPENAI_MODEL,
+    SUMMARY_CONCURRENCY,
+    SUMMARY_MAX_RETRIES,
+    SUMMARY_PROMPT,
+    SUMMARY_RETRY_BASE_SECONDS,
+    SUMMARY_RETRY_MAX_SECONDS,
+)
+from ai_code_summary.metrics.stages import estimate_cost
+
+# Tokens reserved for the completion when estimating the size of a request
+_ESTIMATED_COMPLETION_TOKENS = 500
+
+_RETRYABLE_ERRORS = (RateLimitError, InternalServerError, APIConnectionError)
+
+
+@cache
+def get_open_ai_client() -> OpenAI:
+    """
+    Returns the shared OpenAI client, so every request reuses the same connection pool.
+
+    The client does not retry on its own, retries go through the rate limiter instead.
+
+    Returns:
+        OpenAI: An instance of the OpenAI client.
+    """
+    return OpenAI(api_key=OPENAI_API_KEY, max_retries=0)
+
+
+class OpenAIBackend(SummaryBackend):
+    """
+    Summarizes through the OpenAI chat completions API, or any server implementing it, e.g. llama.cpp or vLLM.
+
+    Requests wait for the shared rate limiter and request slots, and rate limit, server and connection errors
+    are retried with jittered exponential backoff. Only OpenAI itself offers the Batch API and is priced in
+    the run report.
+    """
+
+    supports_packing = True
+    errors = (OpenAIError,)
+
+    def __init__(
+        self,
+        model: str = OPENAI_MODEL,
+        base_url: str | None = None,
+        api_key: str = OPENAI_API_KEY,
+        concurrency: int = SUMMARY_CONCURRENCY,
+    ):
+        self.model = model
+        self.base_url = base_url
+        self.api_key = api_key
+        self.concurrency = concurrency
+        self.name = model if base_url is None else f"{model}@{base_url}"
+        self.supports_batch = base_url is None
+        self.priced = base_url is None
+        self._client: OpenAI | None = None
+
+    def get_client(self) -> OpenAI:
+        """
+        Returns the client of the backend, the shared OpenAI client unless a server URL was given.
+
+        Returns:
+            OpenAI: The client, which does not retry on its own.
+        """
+        if self.base_url is None:
+            return get_open_ai_client()
+        if self._client is None:
+            self._client = OpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+        return self._client
+
+    def complete(self, prompt: str) -> Completion:
+        completion = self._send_request(prompt)
+        if (usage := completion.usage) is None:
+            return Completion(completion.choices[0].message.content)
+        return Completion(
+            completion.choices[0].message.content,
+            tokens_in=usage.prompt_tokens,
+            tokens_out=usage.completion_tokens,
+            cost=estimate_cost(usage.prompt_tokens, usage.completion_tokens) if self.priced else 0.0,
+        )
+
+    def _send_request(self, prompt: str) -> ChatCompletion:
+        """
+        Sends a summary request through the rate limiter, retrying rate limit, server and connection errors.
+
+        Args:
+            prompt (str): The user message, including the content to be summarized.
+
+        Returns:
+            ChatCompletion: The completion.
+        """
+        request = build_summary_request(prompt, self.model)
+        estimated_tokens = count_tokens(SUMMARY_PROMPT, OPENAI_MODEL) + count_tokens(prompt, OPENAI_MODEL)
+        rate_limiter = get_rate_limiter()
+
+        for attempt in range(SUMMARY_MAX_RETRIES + 1):
+            rate_limiter.acquire(estimated_tokens + _ESTIMATED_COMPLETION_TOKENS)
+            start_time = time.time()  # Record the start time to measure the duration of the API call
+            try:
+                with get_request_slots():
+                    response = self.get_client().chat.completions.with_raw_response.create(**request)
+            except _RETRYABLE_ERRORS as e:
+                if attempt == SUMMARY_MAX_RETRIES:
+                    raise
+                headers = e.response.headers if getattr(e, "response", None) is not None else None
+                rate_limiter.update(headers)
+                delay = get_backoff_delay(
+                    attempt, SUMMARY_RETRY_BASE_SECONDS, SUMMARY_RETRY_MAX_SECONDS, get_retry_after(headers)
+                )
+                if isinstance(e, RateLimitError):
+                    rate_limiter.pause(delay)  # Hold back every other request as well
+                logger.warning(f"Summary request failed ({e.__class__.__name__}), retrying in {delay:.2f} seconds")
+                time.sleep(delay)
+                continue
+
+            end_time = time.time()  # Record the end time to measure the duration of the API call
+            logger.debug(f"Summarized content in {end_time - start_time:.2f} seconds")  # Log the API call duration
+            rate_limiter.update(response.headers)
+            return response.parse()
@@ -0,0 +1,211 @@
+import json
+import threading
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future
+from pathlib import Path
+
+from loguru import logger
+
+from ai_code_summary.ai.summary import (
+    create_cached_summary,
+    get_summary_backend,
+    get_summary_cache,
+    try_summarize_content,
+)
+from ai_code_summary.ai.summary_cache import make_cache_key
+from ai_code_summary.ai.tokens import count_tokens
+from ai_code_summary.env_variables import (
+    OPENAI_MODEL,
+    SUMMARY_PACK_FILE_TOKENS,
+    SUMMARY_PACK_MAX_FILES,
+    SUMMARY_PACK_TOKENS,
+    SUMMARY_PROMPT,
+)
+
+
+def pack_contents(
+    summary_inputs: Iterable[tuple[Path, str]],
+    base_dir: Path,
+    max_file_tokens: int = SUMMARY_PACK_FILE_TOKENS,
+    max_pack_tokens: int = SUMMARY_PACK_TOKENS,
+    max_files: int = SUMMARY_PACK_MAX_FILES,
+) -> list[dict[str, str]]:
+    """
+    Bin-packs small files into groups summarized by a single request each.
+
+    Files of at most `max_file_tokens` are packed first-fit, largest first, into packs of at most `max_pack_tokens`
+    and `max_files` files. Files with a cached summary are left out, as are packs of a single file, which would
+    gain nothing over a request of their own.
+
+    Args:
+        summary_inputs (Iterable[tuple[Path, str]]): The path of each file and the content sent to the model.
+        base_dir (Path): The base directory of the code files, files being keyed by their path relative to it.
+        max_file_tokens (int): The size of the largest file packed.
+        max_pack_tokens (int): The size of the files of a pack, including their headers.
+        max_files (int): The number of files of a pack.
+
+    Returns:
+        list[dict[str, str]]: The content of the files of each pack, keyed by their POSIX path relative to
+            `base_dir`. A content is packed once, under the first path it was found at.
+    """
+    summary_cache = get_summary_cache()
+    sections: dict[str, tuple[str, int]] = {}
+    for file_path, content in summary_inputs:
+        if content in sections or (
+            summary_cache
+            and summary_cache.get(make_cache_key(content, get_summary_backend().name, SUMMARY_PROMPT)) is not None
+        ):
+            continue
+        relative_path = file_path.relative_to(base_dir).as_posix()
+        tokens = count_tokens(_format_packed_file(relative_path, content), OPENAI_MODEL)
+        if tokens <= max_file_tokens:
+            sections[content] = (relative_path, tokens)
+
+    packs: list[dict[str, str]] = []
+    pack_tokens: list[int] = []
+    for content, (relative_path, tokens) in sorted(sections.items(), key=lambda item: -item[1][1]):
+        index = next(
+            (
+                index
+                for index, files in enumerate(packs)
+                if pack_tokens[index] + tokens <= max_pack_tokens and len(files) < max_files
+            ),
+            None,
+        )
+        if index is None:
+            index = len(packs)
+            packs.append({})
+            pack_tokens.append(0)
+        packs[index][relative_path] = content
+        pack_tokens[index] += tokens
+
+    packs = [files for files in packs if len(files) > 1]
+    logger.info(f"Packed {sum(len(files) for files in packs)} small files into {len(packs)} requests")
+    return packs
+
+
+def summarize_pack(files: dict[str, str]) -> dict[str, str]:
+    """
+    Summarizes a pack of files with a single request, asking for a JSON object of summaries keyed by path.
+
+    The summaries are validated, and the valid ones are added to the summary cache under their own content, so
+    later runs reuse them whatever the pack they end up in.
+
+    Args:
+        files (dict[str, str]): The content of each file, keyed by path.
+
+    Returns:
+        dict[str, str]: The summary of each file whose summary came back valid, keyed by content.
+    """
+    try:
+        response = create_cached_summary(build_packed_summary_prompt(files))
+    except get_summary_backend().errors as e:
+        logger.error(f"Could not summarize a pack of {len(files)} files: {e!r}")
+        return {}
+
+    summaries = parse_packed_summaries(response, list(files))
+    if len(summaries) < len(files):
+        logger.warning(f"Pack summary is missing {len(files) - len(summaries)} of {len(files)} files")
+
+    summary_cache = get_summary_cache()
+    content_summaries = {}
+    for relative_path, summary in summaries.items():
+        content_summaries[files[relative_path]] = summary
+        if summary_cache:
+            summary_cache.put(make_cache_key(files[relative_path], get_summary_backend().name, SUMMARY_PROMPT), summary)
+    return content_summaries
+
+
+def build_packed_summary_prompt(files: dict[str, str]) -> str:
+    """
+    Builds the user message asking for the summaries of several files at once.
+
+    Args:
+        files (dict[str, str]): The content of each file, keyed by path.
+
+    Returns:
+        str: The user message.
+    """
+    sections = "".join(_format_packed_file(relative_path, content) for relative_path, content in files.items())
+    return (
+        "Summarize each of the following code files on its own. Respond with a JSON object only, mapping each "
+        f"file path exactly as given after ### to the summary of that file:\n\n{sections}"
+    )
+
+
+def parse_packed_summaries(response: str, relative_paths: list[str]) -> dict[str, str]:
+    """
+    Extracts the summaries of a pack from the model's response.
+
+    Args:
+        response (str): The response, a JSON object possibly surrounded by text or a code fence.
+        relative_paths (list[str]): The paths of the files of the pack.
+
+    Returns:
+        dict[str, str]: The non-empty summary of each file found in the response, keyed by path.
+    """
+    start, end = response.find("{"), response.rfind("}")
+    try:
+        data = json.loads(response[start : end + 1]) if 0 <= start < end else None
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        logger.warning("Pack summary is not a JSON object")
+        return {}
+    return {
+        relative_path: summary.strip()
+        for relative_path in relative_paths
+        if isinstance(summary := data.get(relative_path), str) and summary.strip()
+    }
+
+
+def pack_summaries(
+    summary_inputs: Iterable[tuple[Path, str]],
+    base_dir: Path,
+    summarize: Callable[[str], str | None] | None = None,
+) -> Callable[[str], str | None]:
+    """
+    Wraps a summarize function so that small files are summarized in packs, see `pack_contents`.
+
+    The first file of a pack asking for a summary sends the request of the whole pack, every other file of the
+    pack waits for it. Files missing from the response, or whose pack failed, fall back to `summarize`.
+
+    Args:
+        summary_inputs (Iterable[tuple[Path, str]]): The path of each file and the content sent to the model.
+        base_dir (Path): The base directory of the code files.
+        summarize (Callable[[str], str | None] | None): Summarizes a content on its own.
+            Defaults to `try_summarize_content`.
+
+    Returns:
+        Callable[[str], str | None]: Summarizes any content.
+    """
+    summarize = summarize or try_summarize_content
+    packs = pack_contents(summary_inputs, base_dir)
+    pack_indexes = {content: index for index, files in enumerate(packs) for content in files.values()}
+    lock = threading.Lock()
+    pack_futures: dict[int, Future[dict[str, str]]] = {}
+
+    def summarize_packed(content: str) -> str | None:
+        index = pack_indexes.get(content)
+        if index is None:
+            return summarize(content)
+        with lock:
+            future = pack_futures.get(index)
+            is_owner = future is None
+            if is_owner:
+                future = pack_futures[index] = Future()
+
+        if is_owner:
+            try:
+                future.set_result(summarize_pack(packs[index]))
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+        summary = future.result().get(content)
+        return summary if summary is not None else summarize(content)
+
+    return summarize_packed
+
+
+def _format_packed_file(relative_path: str, content: str) -> str:
+    return f"### {relative_path}\n\n```\n{content}\n```\n\n"
@@ -0,0 +1,73 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import patch
+
+from ai_code_summary.ai.packing import pack_contents, pack_summaries, parse_packed_summaries, summarize_pack
+
+_BASE_DIR = Path("/repo")
+
+
+def test_pack_contents_packs_small_files_up_to_the_budget():
+    summary_inputs = [(_BASE_DIR / f"f{index}.py", "x = 1\n" * (index + 1)) for index in range(5)]
+    summary_inputs.append((_BASE_DIR / "large.py", "x = 1\n" * 1000))
+
+    packs = pack_contents(summary_inputs, _BASE_DIR, max_file_tokens=100, max_pack_tokens=60, max_files=20)
+
+    packed_paths = [path for files in packs for path in files]
+    assert sorted(packed_paths) == ["f0.py", "f1.py", "f2.py", "f3.py", "f4.py"]
+    assert all(len(files) > 1 for files in packs)
+
+
+def test_pack_contents_limits_the_files_of_a_pack():
+    summary_inputs = [(_BASE_DIR / f"f{index}.py", f"x = {index}") for index in range(5)]
+
+    packs = pack_contents(summary_inputs, _BASE_DIR, max_file_tokens=100, max_pack_tokens=1000, max_files=2)
+
+    assert [len(files) for files in packs] == [2, 2]  # The last file alone is left to a request of its own
+
+
+def test_pack_contents_packs_duplicate_contents_once():
+    summary_inputs = [(_BASE_DIR / "a.py", "x = 1"), (_BASE_DIR / "b.py", "x = 1"), (_BASE_DIR / "c.py", "y = 1")]
+
+    assert pack_contents(summary_inputs, _BASE_DIR, 100, 1000, 20) == [{"a.py": "x = 1", "c.py": "y = 1"}]
+
+
+def test_parse_packed_summaries_validates_every_file():
+    response = '```json\n{"a.py": "Summary of a", "b.py": "", "c.py": 3, "other.py": "Other"}\n```'
+
+    assert parse_packed_summaries(response, ["a.py", "b.py", "c.py", "d.py"]) == {"a.py": "Summary of a"}
+    assert parse_packed_summaries("Not JSON", ["a.py"]) == {}
+    assert parse_packed_summaries('["a.py"]', ["a.py"]) == {}
+
+
+@patch("ai_code_summary.ai.packing.create_cached_summary")
+def test_summarize_pack(mock_create_cached_summary):
+    mock_create_cached_summary.return_value = json.dumps({"a.py": "Summary of a", "b.py": "Summary of b"})
+
+    assert summarize_pack({"a.py": "x = 1", "b.py": "y = 1"}) == {"x = 1": "Summary of a", "y = 1": "Summary of b"}
+    prompt = mock_create_cached_summary.call_args.args[0]
+    assert "### a.py\n\n```\nx = 1\n```" in prompt
+    assert "JSON object" in prompt
+
+
+@patch("ai_code_summary.ai.packing.create_cached_summary")
+def test_pack_summaries_sends_one_request_per_pack_and_falls_back(mock_create_cached_summary):
+    mock_create_cached_summary.return_value = json.dumps({"a.py": "Summary of a"})
+    summary_inputs = [(_BASE_DIR / "a.py", "x = 1"), (_BASE_DIR / "b.py", "y = 1"), (_BASE_DIR / "c.py", "z = 1")]
+    fallbacks = []
+    lock = threading.Lock()
+
+    def summarize(content):
+        with lock:
+            fallbacks.append(content)
+        return f"Own summary of {content}"
+
+    summarize_packed = pack_summaries(summary_inputs, _BASE_DIR, summarize)
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        summaries = list(executor.map(summarize_packed, ["x = 1", "y = 1", "z = 1"]))
+
+    mock_create_cached_summary.assert_called_once()
+    assert summaries == ["Summary of a", "Own summary of y = 1", "Own summary of z = 1"]
+    assert sorted(fallbacks) == ["y = 1", "z = 1"]
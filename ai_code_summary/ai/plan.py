@@ -0,0 +1,270 @@
+import json
+import math
+from collections import Counter
+from collections.abc import Container, Iterable
+from dataclasses import asdict, dataclass
+from pathlib import Path, PurePosixPath
+
+from loguru import logger
+
+from ai_code_summary.ai.backends import SummaryBackend
+from ai_code_summary.ai.packing import build_packed_summary_prompt, pack_contents
+from ai_code_summary.ai.summary import (
+    build_chunk_prompts,
+    build_summary_prompt,
+    get_summary_cache,
+    get_summary_input,
+)
+from ai_code_summary.ai.summary_cache import make_cache_key
+from ai_code_summary.ai.tokens import count_tokens
+from ai_code_summary.code.similarity import find_representatives
+from ai_code_summary.env_variables import (
+    OPENAI_MODEL,
+    SUMMARY_CHUNK_TOKENS,
+    SUMMARY_MAX_FILE_TOKENS,
+    SUMMARY_NEAR_DUPLICATE_DISTANCE,
+    SUMMARY_PLAN_COMPLETION_TOKENS,
+    SUMMARY_PLAN_REQUEST_SECONDS,
+    SUMMARY_PROMPT,
+)
+from ai_code_summary.metrics.stages import BATCH_DISCOUNT, estimate_cost
+
+# Files listed by name in the plan report, largest first, to spot runaway inputs
+_LARGEST_FILES = 10
+
+
+@dataclass
+class FilePlan:
+    """
+    What a run would do to summarize one file.
+
+    `status` is one of:
+        - `skipped`: binary, minified, too large to read or empty, left out of the markdown.
+        - `structural`: described from its structure, without a request.
+        - `checkpoint`: summarized by an interrupted run.
+        - `cached`: found in the summary cache.
+        - `duplicate`: shares the summary of another file.
+        - `too_large`: above SUMMARY_MAX_FILE_TOKENS, not sent.
+        - `packed`: summarized with other small files, the requests of the packs are counted on their own.
+        - `summarize`, `skeleton` or `chunked`: summarized from its content, its skeleton, or in chunks.
+
+    `tokens` is the size of what would be sent for the file, `requests`, `tokens_in` and `tokens_out` what the
+    requests of the file alone would use.
+    """
+
+    path: str
+    status: str
+    tokens: int = 0
+    requests: int = 0
+    tokens_in: int = 0
+    tokens_out: int = 0
+    cost: float = 0.0
+
+
+def plan_summaries(
+    file_contents: Iterable[tuple[Path, str]],
+    base_dir: Path,
+    backend: SummaryBackend,
+    concurrency: int,
+    batch: bool = False,
+    deduplicate: bool = False,
+    pack: bool = False,
+    rollup: bool = False,
+    checkpoint_summaries: Container[str] = (),
+    completion_tokens: int = SUMMARY_PLAN_COMPLETION_TOKENS,
+    request_seconds: float = SUMMARY_PLAN_REQUEST_SECONDS,
+) -> dict:
+    """
+    Estimates the requests, tokens, cost and wall time of a run without sending any request.
+
+    Files go through the same decisions as in a run: structural summaries, skeletons, the checkpoint journal,
+    the summary cache, duplicates, the token limit, packs and chunks. Prompt tokens are counted locally, see
+    `count_tokens`, while completion tokens and request latencies are estimated from `completion_tokens` and
+    `request_seconds`, e.g. as reported by the summarize stage of a previous run report.
+
+    The wall time assumes `concurrency` requests in flight, chunks summarized before their reduction and
+    directories one level at a time. Batch runs have no wall time, the Batch API completing within 24 hours.
+
+    Args:
+        file_contents (Iterable[tuple[Path, str]]): The path and content of each code file, as read by a run.
+        base_dir (Path): The base directory of the code files.
+        backend (SummaryBackend): The summary backend of the run, which prices requests or not.
+        concurrency (int): The maximum number of summary requests kept in flight at once.
+        batch (bool): Plan a batch run, see `create_markdown_from_code`.
+        deduplicate (bool): Plan a run summarizing duplicate files once.
+        pack (bool): Plan a run summarizing small files several at a time.
+        rollup (bool): Plan a run also summarizing the directories and the repository.
+        checkpoint_summaries (Container[str]): The contents already summarized by an interrupted run.
+        completion_tokens (int): The expected completion tokens of a summary.
+        request_seconds (float): The expected duration of a summary request, in seconds.
+
+    Returns:
+        dict: The plan report, with the totals, the number of files per status, the largest files and the plan
+            of every file, see `FilePlan`.
+    """
+    system_tokens = count_tokens(SUMMARY_PROMPT, OPENAI_MODEL)
+    summary_cache = get_summary_cache()
+    file_plans: dict[str, FilePlan] = {}
+    summary_inputs: list[tuple[Path, str]] = []
+    for file_path, content in file_contents:
+        relative_path = file_path.relative_to(base_dir).as_posix()
+        if not content:
+            file_plans[relative_path] = FilePlan(relative_path, "skipped")
+            continue
+        structural_summary, summary_input = get_summary_input(file_path, content)
+        if structural_summary is not None:
+            file_plans[relative_path] = FilePlan(relative_path, "structural")
+            continue
+        status = "summarize" if summary_input == content else "skeleton"
+        file_plans[relative_path] = FilePlan(relative_path, status, tokens=count_tokens(summary_input, OPENAI_MODEL))
+        summary_inputs.append((file_path, summary_input))
+
+    representatives = find_representatives(summary_inputs, SUMMARY_NEAR_DUPLICATE_DISTANCE) if deduplicate else {}
+    planned_contents: set[str] = set()
+    to_summarize: list[tuple[Path, str]] = []
+    for file_path, summary_input in summary_inputs:
+        file_plan = file_plans[file_path.relative_to(base_dir).as_posix()]
+        if summary_input in checkpoint_summaries:
+            file_plan.status = "checkpoint"
+        elif (
+            summary_cache and summary_cache.get(make_cache_key(summary_input, backend.name, SUMMARY_PROMPT)) is not None
+        ):
+            file_plan.status = "cached"
+        elif (deduplicate and representatives[summary_input][0] != file_path) or (
+            # Batches request identical contents once
+            batch and summary_input in planned_contents
+        ):
+            file_plan.status = "duplicate"
+        elif file_plan.tokens > SUMMARY_MAX_FILE_TOKENS:
+            file_plan.status = "too_large"
+        else:
+            to_summarize.append((file_path, summary_input))
+        planned_contents.add(summary_input)
+
+    packs = pack_contents(to_summarize, base_dir) if pack else []
+    packed_contents = {content for files in packs for content in files.values()}
+    pack_tokens_in = sum(
+        system_tokens + count_tokens(build_packed_summary_prompt(files), OPENAI_MODEL) for files in packs
+    )
+    pack_tokens_out = sum(completion_tokens * len(files) for files in packs)
+    # Chunks are summarized before being combined, so a chunked file takes two request durations at least
+    longest_chain = 1 if packs else 0
+    discount = BATCH_DISCOUNT if batch else 1.0
+    for file_path, summary_input in to_summarize:
+        file_plan = file_plans[file_path.relative_to(base_dir).as_posix()]
+        if summary_input in packed_contents:
+            file_plan.status = "packed"
+            continue
+        if file_plan.tokens <= SUMMARY_CHUNK_TOKENS:
+            prompt_tokens = [count_tokens(build_summary_prompt(summary_input), OPENAI_MODEL)]
+        else:
+            file_plan.status = "chunked"
+            chunk_prompt_tokens = [count_tokens(prompt, OPENAI_MODEL) for prompt in build_chunk_prompts(summary_input)]
+            # The chunk summaries are then combined by one more request
+            prompt_tokens = chunk_prompt_tokens + [completion_tokens * len(chunk_prompt_tokens)]
+        file_plan.requests = len(prompt_tokens)
+        file_plan.tokens_in = sum(system_tokens + tokens for tokens in prompt_tokens)
+        file_plan.tokens_out = completion_tokens * file_plan.requests
+        if backend.priced:
+            # Chunked files are summarized outside of batches
+            file_discount = 1.0 if file_plan.status == "chunked" else discount
+            file_plan.cost = estimate_cost(file_plan.tokens_in, file_plan.tokens_out, file_discount)
+        longest_chain = max(longest_chain, 2 if file_plan.status == "chunked" else 1)
+
+    requests = len(packs) + sum(file_plan.requests for file_plan in file_plans.values())
+    tokens_in = pack_tokens_in + sum(file_plan.tokens_in for file_plan in file_plans.values())
+    tokens_out = pack_tokens_out + sum(file_plan.tokens_out for file_plan in file_plans.values())
+    cost = sum(file_plan.cost for file_plan in file_plans.values())
+    if backend.priced:
+        cost += estimate_cost(pack_tokens_in, pack_tokens_out)
+    wall_seconds = None if batch else max(math.ceil(requests / max(concurrency, 1)), longest_chain) * request_seconds
+
+    directory_levels = (
+        _count_directories([path for path, file_plan in file_plans.items() if file_plan.status != "skipped"])
+        if rollup
+        else {}
+    )
+    directories = sum(len(children) for children in directory_levels.values())
+    if rollup:
+        rollup_tokens_in = sum(
+            system_tokens + completion_tokens * child_count
+            for children in directory_levels.values()
+            for child_count in children
+        )
+        rollup_tokens_out = completion_tokens * directories
+        requests += directories
+        tokens_in += rollup_tokens_in
+        tokens_out += rollup_tokens_out
+        if backend.priced:
+            cost += estimate_cost(rollup_tokens_in, rollup_tokens_out)
+        if wall_seconds is not None:
+            wall_seconds += sum(
+                math.ceil(len(children) / max(concurrency, 1)) * request_seconds
+                for children in directory_levels.values()
+            )
+
+    largest_files = sorted(file_plans.values(), key=lambda file_plan: -file_plan.tokens)[:_LARGEST_FILES]
+    return {
+        "backend": backend.name,
+        "concurrency": concurrency,
+        "batch": batch,
+        "total": {
+            "files": len(file_plans),
+            "requests": requests,
+            "packs": len(packs),
+            "directories": directories,
+            "tokens_in": tokens_in,
+            "tokens_out": tokens_out,
+            "cost": round(cost, 6),
+            "wall_seconds": wall_seconds,
+        },
+        "statuses": dict(Counter(file_plan.status for file_plan in file_plans.values()).most_common()),
+        "largest_files": [asdict(file_plan) for file_plan in largest_files if file_plan.tokens],
+        "files": [asdict(file_plan) for file_plan in file_plans.values()],
+    }
+
+
+def write_plan_report(report_file: Path, report: dict) -> None:
+    """
+    Logs the totals of a plan and writes the whole plan as JSON.
+
+    Args:
+        report_file (Path): The path to the JSON report.
+        report (dict): The plan report, see `plan_summaries`.
+    """
+    report_file.parent.mkdir(parents=True, exist_ok=True)
+    report_file.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    largest = "\n".join(
+        f"  {file_plan['path']}: {file_plan['tokens']} tokens, {file_plan['status']}"
+        for file_plan in report["largest_files"]
+    )
+    logger.info(
+        f"Plan written to {report_file}:\n{json.dumps(report['total'], indent=2)}\n"
+        f"Files per status: {report['statuses']}\nLargest files:\n{largest}"
+    )
+
+
+def _count_directories(relative_paths: list[str]) -> dict[int, list[int]]:
+    """
+    Lists the directories summarized by a rollup, as in `summarize_directories`.
+
+    Args:
+        relative_paths (list[str]): The POSIX path of each summarized file.
+
+    Returns:
+        dict[int, list[int]]: The number of children of each directory, by depth, the repository being at depth 0.
+    """
+    children: dict[PurePosixPath, set[str]] = {}
+    for relative_path in relative_paths:
+        path = PurePosixPath(relative_path)
+        children.setdefault(path.parent, set()).add(path.name)
+        for directory in path.parents:
+            if directory != PurePosixPath("."):
+                children.setdefault(directory.parent, set()).add(f"{directory.name}/")
+                children.setdefault(directory, set())
+
+    levels: dict[int, list[int]] = {}
+    for directory, names in children.items():
+        depth = 0 if directory == PurePosixPath(".") else len(directory.parts)
+        levels.setdefault(depth, []).append(len(names))
+    return levels
@@ -0,0 +1,144 @@
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from ai_code_summary.ai.backends import ExtractiveBackend
+from ai_code_summary.ai.plan import plan_summaries, write_plan_report
+from ai_code_summary.ai.summary_cache import SummaryCache, make_cache_key
+from ai_code_summary.metrics.stages import estimate_cost
+
+_BASE_DIR = Path("/repo")
+
+
+class _PricedBackend(ExtractiveBackend):
+    name = "priced"
+    priced = True
+
+
+@pytest.fixture(autouse=True)
+def count_characters():
+    # One token per character, whether tiktoken is installed or not
+    with (
+        patch("ai_code_summary.ai.plan.count_tokens", side_effect=lambda text, model: len(text)),
+        patch("ai_code_summary.ai.summary.count_tokens", side_effect=lambda text, model: len(text)),
+        patch("ai_code_summary.ai.plan.SUMMARY_PROMPT", "system"),
+        patch("ai_code_summary.ai.plan.get_summary_cache", return_value=None),
+    ):
+        yield
+
+
+def _plans(report: dict) -> dict[str, dict]:
+    return {file_plan["path"]: file_plan for file_plan in report["files"]}
+
+
+def test_plan_summaries_follows_the_decisions_of_a_run():
+    file_contents = [
+        (_BASE_DIR / "empty.py", ""),
+        (_BASE_DIR / "pkg" / "__init__.py", "from .a import b\n"),
+        (_BASE_DIR / "a.py", "x = 1"),
+        (_BASE_DIR / "done.py", "y = 2"),
+    ]
+
+    report = plan_summaries(
+        file_contents,
+        _BASE_DIR,
+        _PricedBackend(),
+        concurrency=4,
+        checkpoint_summaries={"y = 2"},
+        completion_tokens=10,
+        request_seconds=2,
+    )
+
+    plans = _plans(report)
+    assert [plans[path]["status"] for path in ["empty.py", "pkg/__init__.py", "a.py", "done.py"]] == [
+        "skipped",
+        "structural",
+        "summarize",
+        "checkpoint",
+    ]
+    prompt_tokens = len("system") + len("Summarize the following code:\n\nx = 1")
+    assert plans["a.py"] | {"cost": None} == {
+        "path": "a.py",
+        "status": "summarize",
+        "tokens": 5,
+        "requests": 1,
+        "tokens_in": prompt_tokens,
+        "tokens_out": 10,
+        "cost": None,
+    }
+    assert report["total"] == {
+        "files": 4,
+        "requests": 1,
+        "packs": 0,
+        "directories": 0,
+        "tokens_in": prompt_tokens,
+        "tokens_out": 10,
+        "cost": round(estimate_cost(prompt_tokens, 10), 6),
+        "wall_seconds": 2,
+    }
+    assert report["statuses"] == {"skipped": 1, "structural": 1, "summarize": 1, "checkpoint": 1}
+    assert report["largest_files"][0]["path"] == "a.py"
+
+
+@patch("ai_code_summary.ai.plan.SUMMARY_MAX_FILE_TOKENS", 100)
+@patch("ai_code_summary.ai.plan.SUMMARY_CHUNK_TOKENS", 40)
+@patch("ai_code_summary.ai.summary.SUMMARY_CHUNK_TOKENS", 40)
+def test_plan_summaries_flags_large_files():
+    large = "\n".join(f"value_{index} = {index}" for index in range(5))
+    file_contents = [(_BASE_DIR / "large.md", large), (_BASE_DIR / "huge.md", "x" * 101)]
+
+    report = plan_summaries(file_contents, _BASE_DIR, ExtractiveBackend(), concurrency=8, request_seconds=1)
+
+    plans = _plans(report)
+    assert plans["huge.md"]["status"] == "too_large"
+    assert plans["huge.md"]["requests"] == 0
+    assert plans["large.md"]["status"] == "chunked"
+    assert plans["large.md"]["requests"] > 2  # Its chunks, then their combination
+    assert report["total"]["cost"] == 0  # The backend is not priced
+    assert report["total"]["wall_seconds"] == 2  # The combination waits for the chunks
+    assert [file_plan["path"] for file_plan in report["largest_files"]] == ["huge.md", "large.md"]
+
+
+def test_plan_summaries_skips_cached_and_duplicate_contents(tmp_path: Path):
+    summary_cache = SummaryCache(tmp_path / "cache.sqlite3", max_bytes=1_000_000, max_age_seconds=60)
+    summary_cache.put(make_cache_key("x = 1", "priced", "system"), "Cached summary")
+    file_contents = [
+        (_BASE_DIR / "a.py", "x = 1"),
+        (_BASE_DIR / "b.py", "y = 2"),
+        (_BASE_DIR / "c.py", "y = 2"),
+    ]
+
+    with patch("ai_code_summary.ai.plan.get_summary_cache", return_value=summary_cache):
+        report = plan_summaries(file_contents, _BASE_DIR, _PricedBackend(), concurrency=1, batch=True)
+
+    assert [file_plan["status"] for file_plan in report["files"]] == ["cached", "summarize", "duplicate"]
+    assert report["total"]["requests"] == 1
+    assert report["total"]["wall_seconds"] is None
+    assert _plans(report)["b.py"]["cost"] == estimate_cost(
+        _plans(report)["b.py"]["tokens_in"], _plans(report)["b.py"]["tokens_out"], discount=0.5
+    )
+
+
+@patch("ai_code_summary.ai.packing.count_tokens", side_effect=lambda text, model: len(text))
+def test_plan_summaries_packs_and_rolls_up(_mock_count_tokens):
+    file_contents = [(_BASE_DIR / "src" / f"f{index}.py", f"x = {index}") for index in range(3)]
+
+    report = plan_summaries(
+        file_contents, _BASE_DIR, ExtractiveBackend(), concurrency=2, pack=True, rollup=True, request_seconds=1
+    )
+
+    assert {file_plan["status"] for file_plan in report["files"]} == {"packed"}
+    assert report["total"]["packs"] == 1
+    assert report["total"]["directories"] == 2  # src/ and the repository
+    assert report["total"]["requests"] == 3
+    assert report["total"]["wall_seconds"] == 3  # The pack, then src/, then the repository
+
+
+def test_write_plan_report(tmp_path: Path):
+    report = plan_summaries([(_BASE_DIR / "a.py", "x = 1")], _BASE_DIR, ExtractiveBackend(), concurrency=1)
+
+    write_plan_report(tmp_path / "out" / "repo.plan.json", report)
+
+    assert json.loads((tmp_path / "out" / "repo.plan.json").read_text()) == report
@@ -0,0 +1,167 @@
+import random
+import re
+import threading
+import time
+from collections.abc import Mapping
+
+from loguru import logger
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value: str | None) -> float | None:
+    """
+    Parses a rate limit reset duration such as "20ms", "1.5s" or "6m0s".
+
+    Args:
+        value (str | None): The header value.
+
+    Returns:
+        float | None: The duration in seconds, or None when the value is missing or invalid.
+    """
+    parts = _DURATION_PART.findall(value or "")
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def get_retry_after(headers: Mapping[str, str] | None) -> float | None:
+    """
+    Reads how long the server asked us to wait from a response's headers.
+
+    Args:
+        headers (Mapping[str, str] | None): The response headers.
+
+    Returns:
+        float | None: The delay in seconds, or None when the server did not ask for one.
+    """
+    if not headers:
+        return None
+    try:
+        if (retry_after_ms := headers.get("retry-after-ms")) is not None:
+            return float(retry_after_ms) / 1000
+        if (retry_after := headers.get("retry-after")) is not None:
+            return float(retry_after)
+    except ValueError:
+        pass
+    return None
+
+
+def get_backoff_delay(attempt: int, base_seconds: float, max_seconds: float, retry_after: float | None = None) -> float:
+    """
+    Computes the delay before retrying a request, using exponential backoff with full jitter.
+
+    Args:
+        attempt (int): The number of the failed attempt, starting at 0.
+        base_seconds (float): The delay cap of the first retry.
+        max_seconds (float): The maximum delay cap.
+        retry_after (float | None): The delay requested by the server, which is always honored.
+
+    Returns:
+        float: The delay in seconds.
+    """
+    return max(retry_after or 0, random.uniform(0, min(max_seconds, base_seconds * 2**attempt)))
+
+
+class RateLimiter:
+    """
+    Throttles requests to stay within the requests-per-minute and tokens-per-minute budgets of the API.
+
+    The remaining budgets and their reset times come from the `x-ratelimit-*` headers of each response.
+    Requests and their estimated tokens are deducted locally as soon as they are sent, so concurrent
+    requests do not all spend the same remaining budget. Until the first response arrives, and after a
+    budget has reset, requests are not throttled.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._remaining_requests: float | None = None
+        self._remaining_tokens: float | None = None
+        self._requests_reset_at = 0.0
+        self._tokens_reset_at = 0.0
+        self._paused_until = 0.0
+
+    def acquire(self, tokens: int) -> None:
+        """
+        Blocks until a request of `tokens` tokens fits in the remaining budgets, then deducts it.
+
+        Args:
+            tokens (int): The estimated number of tokens of the request.
+        """
+        with self._condition:
+            while (wait_seconds := self._get_wait_seconds(tokens)) > 0:
+                logger.debug(f"Throttling request for {wait_seconds:.2f} seconds")
+                self._condition.wait(wait_seconds)
+            if self._remaining_requests is not None:
+                self._remaining_requests -= 1
+            if self._remaining_tokens is not None:
+                self._remaining_tokens -= tokens
+
+    def _get_wait_seconds(self, tokens: int) -> float:
+        """
+        Computes how long a request of `tokens` tokens has to wait, forgetting budgets that have reset.
+
+        Args:
+            tokens (int): The estimated number of tokens of the request.
+
+        Returns:
+            float: The number of seconds to wait, zero or less when the request can be sent now.
+        """
+        now = time.monotonic()
+        if now >= self._requests_reset_at:
+            self._remaining_requests = None
+        if now >= self._tokens_reset_at:
+            self._remaining_tokens = None
+
+        wait_seconds = self._paused_until - now
+        if self._remaining_requests is not None and self._remaining_requests < 1:
+            wait_seconds = max(wait_seconds, self._requests_reset_at - now)
+        if self._remaining_tokens is not None and self._remaining_tokens < tokens:
+            wait_seconds = max(wait_seconds, self._tokens_reset_at - now)
+        return wait_seconds
+
+    def update(self, headers: Mapping[str, str] | None) -> None:
+        """
+        Records the remaining budgets reported by a response.
+
+        Args:
+            headers (Mapping[str, str] | None): The response headers.
+        """
+        if not headers:
+            return
+        now = time.monotonic()
+        with self._condition:
+            if (remaining := _parse_int(headers.get("x-ratelimit-remaining-requests"))) is not None:
+                self._remaining_requests = remaining
+                self._requests_reset_at = now + (parse_duration(headers.get("x-ratelimit-reset-requests")) or 0)
+            if (remaining := _parse_int(headers.get("x-ratelimit-remaining-tokens"))) is not None:
+                self._remaining_tokens = remaining
+                self._tokens_reset_at = now + (parse_duration(headers.get("x-ratelimit-reset-tokens")) or 0)
+            self._condition.notify_all()
+
+    def pause(self, seconds: float) -> None:
+        """
+        Holds back every request for a while, typically after the server answered with a 429.
+
+        Args:
+            seconds (float): How long to hold requests back.
+        """
+        with self._condition:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+def _parse_int(value: str | None) -> int | None:
+    """
+    Parses an integer header value.
+
+    Args:
+        value (str | None): The header value.
+
+    Returns:
+        int | None: The value, or None when it is missing or invalid.
+    """
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
@@ -0,0 +1,76 @@
+import threading
+from unittest.mock import patch
+
+from ai_code_summary.ai.rate_limiter import RateLimiter, get_backoff_delay, get_retry_after, parse_duration
+
+
+def test_parse_duration():
+    assert parse_duration("20ms") == 0.02
+    assert parse_duration("1.5s") == 1.5
+    assert parse_duration("6m0s") == 360
+    assert parse_duration("1h2m3s") == 3723
+    assert parse_duration("soon") is None
+    assert parse_duration(None) is None
+
+
+def test_get_retry_after():
+    assert get_retry_after({"retry-after-ms": "250", "retry-after": "9"}) == 0.25
+    assert get_retry_after({"retry-after": "2"}) == 2
+    assert get_retry_after({"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"}) is None
+    assert get_retry_after(None) is None
+
+
+def test_get_backoff_delay_is_capped_and_honors_retry_after():
+    with patch("ai_code_summary.ai.rate_limiter.random.uniform", side_effect=lambda low, high: high):
+        assert get_backoff_delay(0, base_seconds=1, max_seconds=60) == 1
+        assert get_backoff_delay(3, base_seconds=1, max_seconds=60) == 8
+        assert get_backoff_delay(10, base_seconds=1, max_seconds=60) == 60
+        assert get_backoff_delay(0, base_seconds=1, max_seconds=60, retry_after=5) == 5
+
+
+def test_rate_limiter_does_not_throttle_without_budget_information():
+    rate_limiter = RateLimiter()
+
+    assert rate_limiter._get_wait_seconds(10_000) <= 0
+
+
+def test_rate_limiter_waits_for_exhausted_budgets_to_reset():
+    rate_limiter = RateLimiter()
+    with patch("ai_code_summary.ai.rate_limiter.time.monotonic", return_value=100):
+        rate_limiter.update(
+            {
+                "x-ratelimit-remaining-requests": "1",
+                "x-ratelimit-reset-requests": "2s",
+                "x-ratelimit-remaining-tokens": "1000",
+                "x-ratelimit-reset-tokens": "500ms",
+            }
+        )
+        assert rate_limiter._get_wait_seconds(600) <= 0
+        rate_limiter.acquire(600)
+
+        assert rate_limiter._get_wait_seconds(600) == 2
+
+    with patch("ai_code_summary.ai.rate_limiter.time.monotonic", return_value=102):
+        assert rate_limiter._get_wait_seconds(600) <= 0
+
+
+def test_rate_limiter_releases_waiting_requests_on_update():
+    rate_limiter = RateLimiter()
+    rate_limiter.update({"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "1m"})
+    acquired = threading.Event()
+
+    thread = threading.Thread(target=lambda: (rate_limiter.acquire(1), acquired.set()))
+    thread.start()
+    assert not acquired.wait(0.1)
+
+    rate_limiter.update({"x-ratelimit-remaining-requests": "5", "x-ratelimit-reset-requests": "1m"})
+    assert acquired.wait(5)
+    thread.join()
+
+
+def test_rate_limiter_pause_holds_back_requests():
+    rate_limiter = RateLimiter()
+    with patch("ai_code_summary.ai.rate_limiter.time.monotonic", return_value=100):
+        rate_limiter.pause(3)
+
+        assert rate_limiter._get_wait_seconds(1) == 3
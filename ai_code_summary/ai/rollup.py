@@ -0,0 +1,133 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import PurePosixPath
+
+from loguru import logger
+
+from ai_code_summary.ai.chunking import split_into_chunks
+from ai_code_summary.ai.summary import create_cached_summary, get_summary_backend
+from ai_code_summary.ai.tokens import count_tokens
+from ai_code_summary.env_variables import OPENAI_MODEL, SUMMARY_CHUNK_TOKENS
+from ai_code_summary.metrics.stages import get_pipeline_metrics
+
+_REPOSITORY = ""
+
+
+def summarize_directories(
+    file_summaries: dict[str, str | None], repository_name: str, concurrency: int
+) -> dict[str, str | None]:
+    """
+    Summarizes every directory from the summaries of its files and subdirectories, and the repository from its
+    top-level files and directories.
+
+    Directories are summarized deepest first, one level at a time, so sibling directories are summarized
+    concurrently. Rollups go through the summary cache keyed by their prompt, so when a single file changes
+    only the summaries of its ancestor directories change and are requested again.
+
+    Args:
+        file_summaries (dict[str, str | None]): The summary of each file, keyed by its POSIX path relative to
+            the repository. Files without a summary are listed by name only.
+        repository_name (str): The name of the repository.
+        concurrency (int): The maximum number of directories summarized at once.
+
+    Returns:
+        dict[str, str | None]: The summary of each directory, keyed by its POSIX path relative to the repository,
+            the repository itself being keyed by "". A summary is None when it could not be created.
+    """
+    children: dict[str, dict[str, str | None]] = {}
+    for relative_path in sorted(file_summaries):
+        path = PurePosixPath(relative_path)
+        children.setdefault(_get_key(path.parent), {})[path.name] = file_summaries[relative_path]
+        for directory in path.parents:
+            if directory != PurePosixPath("."):
+                children.setdefault(_get_key(directory.parent), {}).setdefault(f"{directory.name}/", None)
+                children.setdefault(_get_key(directory), {})
+
+    directory_summaries: dict[str, str | None] = {}
+    levels: dict[int, list[str]] = {}
+    for directory in children:
+        levels.setdefault(len(PurePosixPath(directory).parts), []).append(directory)
+
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1), thread_name_prefix="rollup") as executor:
+        for depth in sorted(levels, reverse=True):
+            for directory in levels[depth]:
+                for name in children[directory]:
+                    if name.endswith("/"):
+                        children[directory][name] = directory_summaries[_get_key(PurePosixPath(directory, name))]
+            summaries = executor.map(
+                lambda directory: _summarize_directory(directory, repository_name, children[directory]),
+                levels[depth],
+            )
+            directory_summaries.update(zip(levels[depth], summaries))
+
+    logger.info(f"Summarized {len(directory_summaries)} directories")
+    return directory_summaries
+
+
+def _get_key(directory: PurePosixPath) -> str:
+    return _REPOSITORY if directory == PurePosixPath(".") else directory.as_posix()
+
+
+def _summarize_directory(directory: str, repository_name: str, children: dict[str, str | None]) -> str | None:
+    """
+    Summarizes one directory from the summaries of its children.
+
+    Children whose summaries do not fit in one request are summarized in groups first, then the summaries of
+    the groups are combined.
+
+    Args:
+        directory (str): The directory's POSIX path relative to the repository, "" for the repository.
+        repository_name (str): The name of the repository.
+        children (dict[str, str | None]): The summary of each file and subdirectory, subdirectories ending
+            with "/".
+
+    Returns:
+        str | None: The summary of the directory, or None when it could not be created.
+    """
+    subject = (
+        f"the code repository `{repository_name}`" if directory == _REPOSITORY else f"the directory `{directory}/`"
+    )
+    listing = "".join(
+        f"### {name}\n\n{summary}\n\n" if summary else f"### {name}\n\n" for name, summary in children.items()
+    )
+    with get_pipeline_metrics().stage("rollup") as sample:
+        sample.bytes = len(listing)
+        try:
+            return _reduce_listing(subject, listing)
+        except get_summary_backend().errors as e:
+            logger.error(f"Could not summarize {subject}: {e!r}")
+            return None
+
+
+def _reduce_listing(subject: str, listing: str) -> str:
+    """
+    Summarizes a listing of summaries, in groups when it does not fit in one request.
+
+    Args:
+        subject (str): What the listing describes.
+        listing (str): The summaries, as markdown sections.
+
+    Returns:
+        str: The summary of the whole listing.
+    """
+    groups = split_into_chunks(listing, SUMMARY_CHUNK_TOKENS, _count_tokens)
+    if len(groups) == 1:
+        return create_cached_summary(
+            f"Summarize {subject} from the summaries of its files and subdirectories:\n\n{listing}"
+        )
+
+    group_summaries = [
+        create_cached_summary(
+            f"Summarize part {index} of {len(groups)} of {subject} from the summaries of its files and "
+            f"subdirectories:\n\n{group}"
+        )
+        for index, group in enumerate(groups, start=1)
+    ]
+    parts = "".join(f"### Part {index}\n\n{summary}\n\n" for index, summary in enumerate(group_summaries, 1))
+    if len(split_into_chunks(parts, SUMMARY_CHUNK_TOKENS, _count_tokens)) >= len(groups):
+        logger.warning(f"Part summaries of {subject} are too large to be combined, keeping them side by side")
+        return "\n\n".join(group_summaries)
+    return _reduce_listing(subject, parts)
+
+
+def _count_tokens(text: str) -> int:
+    return count_tokens(text, OPENAI_MODEL)
@@ -0,0 +1,76 @@
+import threading
+from unittest.mock import patch
+
+from openai import OpenAIError
+
+from ai_code_summary.ai.rollup import summarize_directories
+from ai_code_summary.ai.summary_cache import SummaryCache
+
+
+def _summarize_prompt(prompt: str) -> str:
+    subject = prompt.split(" from the summaries")[0].removeprefix("Summarize ")
+    children = [line.removeprefix("### ") for line in prompt.splitlines() if line.startswith("### ")]
+    return f"{subject}: {', '.join(children)}"
+
+
+@patch("ai_code_summary.ai.rollup.create_cached_summary", side_effect=_summarize_prompt)
+def test_summarize_directories_rolls_up_to_the_repository(_mock_create_cached_summary):
+    file_summaries = {
+        "README.md": "readme",
+        "src/app/main.py": "main",
+        "src/app/models.py": None,
+        "src/util.py": "util",
+        "tests/test_main.py": "tests",
+    }
+
+    directory_summaries = summarize_directories(file_summaries, "project", concurrency=4)
+
+    assert directory_summaries == {
+        "src/app": "the directory `src/app/`: main.py, models.py",
+        "src": "the directory `src/`: app/, util.py",
+        "tests": "the directory `tests/`: test_main.py",
+        "": "the code repository `project`: README.md, src/, tests/",
+    }
+
+
+@patch("ai_code_summary.ai.rollup.create_cached_summary")
+def test_summarize_directories_includes_child_summaries_and_runs_siblings_concurrently(mock_create_cached_summary):
+    barrier = threading.Barrier(2, timeout=5)  # Both sibling directories must be in flight at once
+
+    def summarize(prompt: str) -> str:
+        if "code repository" not in prompt:
+            barrier.wait()
+        return "summary"
+
+    mock_create_cached_summary.side_effect = summarize
+
+    summarize_directories({"a/x.py": "x summary", "b/y.py": "y summary"}, "project", concurrency=2)
+
+    prompts = [call.args[0] for call in mock_create_cached_summary.call_args_list]
+    assert any("### x.py\n\nx summary" in prompt for prompt in prompts)
+    assert prompts[-1].endswith("### a/\n\nsummary\n\n### b/\n\nsummary\n\n")
+
+
+@patch("ai_code_summary.ai.rollup.create_cached_summary", side_effect=OpenAIError("down"))
+def test_summarize_directories_keeps_failed_rollups_unavailable(_mock_create_cached_summary):
+    assert summarize_directories({"main.py": "main"}, "project", concurrency=1) == {"": None}
+
+
+def test_summarize_directories_only_requests_the_ancestors_of_a_changed_file(tmp_path):
+    summary_cache = SummaryCache(tmp_path / "cache.sqlite3", max_bytes=1_000_000, max_age_seconds=3600)
+    file_summaries = {"a/x.py": "x", "a/b/y.py": "y", "c/z.py": "z"}
+
+    with (
+        patch("ai_code_summary.ai.summary.get_summary_cache", return_value=summary_cache),
+        patch("ai_code_summary.ai.summary._create_summary", side_effect=lambda prompt: prompt) as mock_create_summary,
+    ):
+        summarize_directories(file_summaries, "project", concurrency=2)
+        mock_create_summary.reset_mock()
+        summarize_directories(file_summaries | {"a/b/y.py": "y changed"}, "project", concurrency=2)
+
+    subjects = sorted(call.args[0].split(" from the summaries")[0] for call in mock_create_summary.call_args_list)
+    assert subjects == [
+        "Summarize the code repository `project`",
+        "Summarize the directory `a/`",
+        "Summarize the directory `a/b/`",
+    ]
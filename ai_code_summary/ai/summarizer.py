@@ -0,0 +1,77 @@
+from collections.abc import Callable, Iterable
+from pathlib import Path
+
+from ai_code_summary.ai.duplicates import share_summaries
+from ai_code_summary.ai.packing import pack_summaries
+from ai_code_summary.ai.summary import get_summary_inputs, try_summarize_content
+from ai_code_summary.code.similarity import find_representatives
+from ai_code_summary.env_variables import SUMMARY_NEAR_DUPLICATE_DISTANCE
+from ai_code_summary.files.checkpoint import Checkpoint
+
+
+def build_summarizer(
+    file_contents: Iterable[tuple[Path, str]],
+    base_dir: Path,
+    checkpoint: Checkpoint | None = None,
+    batch: bool = False,
+    pack: bool = False,
+    deduplicate: bool = False,
+    summarize: Callable[[str], str | None] | None = None,
+) -> Callable[[str], str | None]:
+    """
+    Builds the summarize function of a run, shared by full and incremental runs.
+
+    The layers are, from the innermost: the batch or the packs, falling back to `summarize`, then the checkpoint
+    journal, then the duplicate groups. Contents journaled by an interrupted run are left out of the batch and the
+    packs.
+
+    `file_contents` is only iterated with `batch`, `pack` or `deduplicate`, which need every file up front, so
+    lazily read files can be passed otherwise.
+
+    Args:
+        file_contents (Iterable[tuple[Path, str]]): The path and content of each file to summarize.
+        base_dir (Path): The base directory of the code files.
+        checkpoint (Checkpoint | None): The journal of completed summaries, reused and extended by the run.
+        batch (bool): Summarize the contents through the OpenAI Batch API, before returning.
+        pack (bool): Summarize small contents several at a time. Ignored with `batch`.
+        deduplicate (bool): Summarize exact and near-duplicate contents once.
+        summarize (Callable[[str], str | None] | None): Summarizes a content on its own.
+            Defaults to `try_summarize_content`.
+
+    Returns:
+        Callable[[str], str | None]: Summarizes the content prepared by `summarize_file` for any of the files.
+    """
+    summarize = summarize or try_summarize_content
+    if batch or pack or deduplicate:
+        summary_inputs = get_summary_inputs(file_contents)
+        contents = list(dict.fromkeys(content for _, content in summary_inputs))
+    if deduplicate:
+        representatives = find_representatives(summary_inputs, SUMMARY_NEAR_DUPLICATE_DISTANCE)
+        contents = list(dict.fromkeys(content for _, content in representatives.values()))
+    if (batch or pack) and checkpoint:
+        contents = [content for content in contents if content not in checkpoint]
+
+    if batch:
+        # Imported on first use, as it loads the OpenAI client library
+        from ai_code_summary.ai.batch import summarize_contents_in_batch
+
+        batch_summaries = dict(zip(contents, summarize_contents_in_batch(contents) if contents else []))
+        summarize = _with_fallback(batch_summaries, summarize)
+    elif pack:
+        unique_contents = set(contents)
+        pack_inputs = [(file_path, content) for file_path, content in summary_inputs if content in unique_contents]
+        summarize = pack_summaries(pack_inputs, base_dir, summarize)
+    if checkpoint:
+        summarize = checkpoint.wrap(summarize)
+    if deduplicate:
+        summarize = share_summaries(representatives, base_dir, summarize)
+    return summarize
+
+
+def _with_fallback(
+    summaries: dict[str, str | None], summarize: Callable[[str], str | None]
+) -> Callable[[str], str | None]:
+    def summarize_from_batch(content: str) -> str | None:
+        return summaries[content] if content in summaries else summarize(content)
+
+    return summarize_from_batch
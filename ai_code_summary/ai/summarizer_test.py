@@ -0,0 +1,53 @@
+from pathlib import Path
+from unittest.mock import patch
+
+from ai_code_summary.ai.summarizer import build_summarizer
+from ai_code_summary.files.checkpoint import Checkpoint
+from ai_code_summary.files.manifest import hash_content
+
+_BASE_DIR = Path("/repo")
+
+
+def test_build_summarizer_without_options_does_not_read_the_files():
+    def file_contents():
+        raise AssertionError("The files are read by summarize_file")
+        yield
+
+    summarize = build_summarizer(file_contents(), _BASE_DIR, summarize=lambda content: f"Summary of {content}")
+
+    assert summarize("x = 1") == "Summary of x = 1"
+
+
+@patch(
+    "ai_code_summary.ai.batch.summarize_contents_in_batch", side_effect=lambda contents: [c.upper() for c in contents]
+)
+def test_build_summarizer_batches_the_contents_missing_from_the_checkpoint(mock_batch, tmp_path: Path):
+    file_contents = [(_BASE_DIR / "a.md", "a"), (_BASE_DIR / "b.md", "b"), (_BASE_DIR / "c.md", "a")]
+
+    with Checkpoint(tmp_path / "journal", "model", "prompt", {hash_content("b"): "Journaled"}) as checkpoint:
+        summarize = build_summarizer(file_contents, _BASE_DIR, checkpoint, batch=True, summarize=lambda _: None)
+
+        assert [summarize(content) for content in ["a", "b", "a"]] == ["A", "Journaled", "A"]
+    mock_batch.assert_called_once_with(["a"])
+
+
+def test_build_summarizer_shares_the_summary_of_duplicates_and_packs_the_rest():
+    file_contents = [(_BASE_DIR / "a.md", "same"), (_BASE_DIR / "b.md", "same"), (_BASE_DIR / "c.md", "other")]
+    calls = []
+
+    def summarize(content):
+        calls.append(content)
+        return f"Summary of {content}"
+
+    with patch("ai_code_summary.ai.summarizer.pack_summaries", side_effect=lambda inputs, _, fallback: fallback) as (
+        mock_pack
+    ):
+        summarize_shared = build_summarizer(file_contents, _BASE_DIR, pack=True, deduplicate=True, summarize=summarize)
+
+        assert [summarize_shared(content) for content in ["same", "same", "other"]] == [
+            "Summary of same",
+            "Summary of same",
+            "Summary of other",
+        ]
+    assert [content for _, content in mock_pack.call_args.args[0]] == ["same", "same", "other"]
+    assert calls == ["same", "other"]
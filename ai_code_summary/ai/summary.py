@@ -1,24 +1,117 @@
-import time
+import threading
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from functools import cache
+from pathlib import Path
 
 from loguru import logger
-from openai import OpenAI
 
-from ai_code_summary.env_variables import OPENAI_API_KEY, OPENAI_MODEL, SUMMARY_PROMPT
+from ai_code_summary.ai.backends import ExtractiveBackend, SummaryBackend
+from ai_code_summary.ai.chunking import split_into_chunks
+from ai_code_summary.ai.rate_limiter import RateLimiter
+from ai_code_summary.ai.summary_cache import SummaryCache, make_cache_key
+from ai_code_summary.ai.tokens import count_tokens
+from ai_code_summary.env_variables import (
+    OPENAI_MODEL,
+    SUMMARY_BACKEND,
+    SUMMARY_CACHE_MAX_AGE_DAYS,
+    SUMMARY_CACHE_MAX_MB,
+    SUMMARY_CACHE_PATH,
+    SUMMARY_CHUNK_TOKENS,
+    SUMMARY_CONCURRENCY,
+    SUMMARY_LOCAL_API_KEY,
+    SUMMARY_LOCAL_BASE_URL,
+    SUMMARY_LOCAL_CONCURRENCY,
+    SUMMARY_LOCAL_MODEL,
+    SUMMARY_MAX_FILE_TOKENS,
+    SUMMARY_PROMPT,
+    SUMMARY_SKELETON_TOKENS,
+)
+from ai_code_summary.files.file_manager import extract_structure
+from ai_code_summary.metrics.stages import get_pipeline_metrics
 
 
-def _get_open_ai_client() -> OpenAI:
+@cache
+def get_rate_limiter() -> RateLimiter:
     """
-    Initializes and returns an OpenAI client using the provided API key.
+    Returns the rate limiter shared by every summary request.
 
     Returns:
-        OpenAI: An instance of the OpenAI client.
+        RateLimiter: The rate limiter.
     """
-    return OpenAI(api_key=OPENAI_API_KEY)
+    return RateLimiter()
+
+
+@cache
+def get_request_slots() -> threading.BoundedSemaphore:
+    """
+    Returns the semaphore bounding the summary requests in flight to SUMMARY_CONCURRENCY, or to the concurrency
+    of the summary backend when it is lower.
+
+    Chunked files send their parts from the worker summarizing them, so the worker pools alone do not
+    bound the number of requests.
+
+    Returns:
+        threading.BoundedSemaphore: The semaphore, held for the duration of each request.
+    """
+    return threading.BoundedSemaphore(max(min(SUMMARY_CONCURRENCY, get_summary_backend().concurrency), 1))
+
+
+@cache
+def get_summary_backend() -> SummaryBackend:
+    """
+    Returns the summary backend configured through SUMMARY_BACKEND.
+
+    Returns:
+        SummaryBackend: The OpenAI API for `openai`, the OpenAI-compatible server at SUMMARY_LOCAL_BASE_URL for
+            `local`, or the model-free `ExtractiveBackend` for `extractive`.
+
+    Raises:
+        ValueError: If SUMMARY_BACKEND names another backend.
+    """
+    if SUMMARY_BACKEND in ("openai", "local"):
+        # Imported on first use, the OpenAI client library takes longer to import than the rest of the package
+        from ai_code_summary.ai.openai_backend import OpenAIBackend
+
+        if SUMMARY_BACKEND == "openai":
+            return OpenAIBackend()
+        return OpenAIBackend(
+            SUMMARY_LOCAL_MODEL,
+            base_url=SUMMARY_LOCAL_BASE_URL,
+            api_key=SUMMARY_LOCAL_API_KEY,
+            concurrency=SUMMARY_LOCAL_CONCURRENCY,
+        )
+    if SUMMARY_BACKEND == "extractive":
+        return ExtractiveBackend()
+    raise ValueError(f"Unknown SUMMARY_BACKEND {SUMMARY_BACKEND!r}, expected openai, local or extractive")
+
+
+@cache
+def get_summary_cache() -> SummaryCache | None:
+    """
+    Returns the shared summary cache configured through SUMMARY_CACHE_PATH.
+
+    Returns:
+        SummaryCache | None: The summary cache, or None when caching is disabled.
+    """
+    if not SUMMARY_CACHE_PATH:
+        return None
+    return SummaryCache(
+        Path(SUMMARY_CACHE_PATH),
+        max_bytes=int(SUMMARY_CACHE_MAX_MB * 1024 * 1024),
+        max_age_seconds=SUMMARY_CACHE_MAX_AGE_DAYS * 24 * 60 * 60,
+    )
 
 
 def summarize_content(content: str) -> str:
     """
-    Summarizes the given content using the OpenAI API.
+    Summarizes the given content using the summary backend, see `get_summary_backend`.
+
+    The summary cache is checked first, so unchanged content is only summarized once per backend, model and
+    prompt.
+    Content larger than SUMMARY_CHUNK_TOKENS is summarized in chunks that are then reduced into one summary,
+    and content larger than SUMMARY_MAX_FILE_TOKENS is not sent at all.
 
     Args:
         content (str): The content to be summarized.
@@ -26,14 +119,280 @@ def summarize_content(content: str) -> str:
     Returns:
         str: The summarized content.
     """
-    start_time = time.time()  # Record the start time to measure the duration of the API call
-    completion = _get_open_ai_client().chat.completions.create(
-        model=OPENAI_MODEL,
-        messages=[
+    summary_cache = get_summary_cache()
+    cache_key = make_cache_key(content, get_summary_backend().name, SUMMARY_PROMPT)
+    if summary_cache and (cached_summary := summary_cache.get(cache_key)) is not None:
+        logger.debug("Summary cache hit")
+        return cached_summary
+
+    token_count = count_tokens(content, OPENAI_MODEL)
+    if token_count > SUMMARY_MAX_FILE_TOKENS:
+        logger.warning(f"Skipped summary of {token_count} tokens, above the {SUMMARY_MAX_FILE_TOKENS} token limit")
+        return f"Not summarized: the file has {token_count} tokens, above the {SUMMARY_MAX_FILE_TOKENS} token limit."
+
+    if token_count <= SUMMARY_CHUNK_TOKENS:
+        summary = _create_summary(build_summary_prompt(content))
+    else:
+        summary = _summarize_chunks(content)
+
+    if summary_cache:
+        summary_cache.put(cache_key, summary)
+    return summary  # Return the summarized content
+
+
+def build_summary_prompt(content: str) -> str:
+    """
+    Builds the user message asking for the summary of a whole file.
+
+    Args:
+        content (str): The content to be summarized.
+
+    Returns:
+        str: The user message.
+    """
+    return f"Summarize the following code:\n\n{content}"
+
+
+def build_summary_request(prompt: str, model: str = OPENAI_MODEL) -> dict:
+    """
+    Builds the body of a chat completion request for a summary.
+
+    Args:
+        prompt (str): The user message, including the content to be summarized.
+        model (str): The model to summarize with.
+
+    Returns:
+        dict: The model and messages of the request.
+    """
+    return {
+        "model": model,
+        "messages": [
             {"role": "system", "content": SUMMARY_PROMPT},
-            {"role": "user", "content": f"Summarize the following code:\n\n{content}"},
+            {"role": "user", "content": prompt},
         ],
+    }
+
+
+def create_cached_summary(prompt: str) -> str:
+    """
+    Sends a summary request with a prompt of its own, caching the summary by prompt.
+
+    Args:
+        prompt (str): The user message, including everything to be summarized.
+
+    Returns:
+        str: The summary.
+    """
+    summary_cache = get_summary_cache()
+    cache_key = make_cache_key(prompt, get_summary_backend().name, SUMMARY_PROMPT)
+    if summary_cache and (cached_summary := summary_cache.get(cache_key)) is not None:
+        return cached_summary
+
+    summary = _create_summary(prompt)
+    if summary_cache:
+        summary_cache.put(cache_key, summary)
+    return summary
+
+
+def _create_summary(prompt: str) -> str:
+    """
+    Sends a single summary request to the summary backend, see `get_summary_backend`.
+
+    Args:
+        prompt (str): The user message, including the content to be summarized.
+
+    Returns:
+        str: The summary.
+    """
+    with get_pipeline_metrics().stage("summarize") as sample:
+        completion = get_summary_backend().complete(prompt)
+        sample.tokens_in, sample.tokens_out, sample.cost = completion.tokens_in, completion.tokens_out, completion.cost
+        return completion.text
+
+
+def _summarize_chunks(content: str) -> str:
+    """
+    Summarizes large content by summarizing its chunks concurrently and reducing them into one summary.
+
+    The chunk requests share the request slots of every other summary, see `get_request_slots`.
+
+    Args:
+        content (str): The content to be summarized.
+
+    Returns:
+        str: The summary of the whole content.
+    """
+    prompts = build_chunk_prompts(content)
+    logger.info(f"Summarizing content in {len(prompts)} chunks")
+    with ThreadPoolExecutor(max_workers=max(min(len(prompts), SUMMARY_CONCURRENCY), 1)) as executor:
+        chunk_summaries = list(executor.map(_create_summary, prompts))
+    return _reduce_summaries(chunk_summaries)
+
+
+def build_chunk_prompts(content: str) -> list[str]:
+    """
+    Builds the user messages asking for the summaries of the chunks of large content, see `_summarize_chunks`.
+
+    Args:
+        content (str): The content to be summarized.
+
+    Returns:
+        list[str]: The user message of each chunk, in order.
+    """
+    chunks = split_into_chunks(content, SUMMARY_CHUNK_TOKENS, lambda text: count_tokens(text, OPENAI_MODEL))
+    return [
+        f"Summarize the following code, which is part {index} of {len(chunks)} of a single file:\n\n{chunk}"
+        for index, chunk in enumerate(chunks, start=1)
+    ]
+
+
+def _reduce_summaries(summaries: list[str]) -> str:
+    """
+    Combines the summaries of consecutive parts of a file into one summary.
+
+    When the summaries themselves do not fit in one request, they are reduced in groups first.
+
+    Args:
+        summaries (list[str]): The summaries of the parts, in order.
+
+    Returns:
+        str: The combined summary.
+    """
+    if len(summaries) == 1:
+        return summaries[0]
+
+    groups = split_into_chunks(
+        "\n\n".join(summaries) + "\n\n", SUMMARY_CHUNK_TOKENS, lambda text: count_tokens(text, OPENAI_MODEL)
     )
-    end_time = time.time()  # Record the end time to measure the duration of the API call
-    logger.debug(f"Summarized content in {end_time - start_time:.2f} seconds")  # Log the duration of the API call
-    return completion.choices[0].message.content  # Return the summarized content
+    if len(groups) >= len(summaries):
+        logger.warning("Part summaries are too large to be combined, keeping them side by side")
+        return "\n\n".join(summaries)
+
+    prompts = [f"Combine the following summaries of consecutive parts of a single file:\n\n{group}" for group in groups]
+    if len(prompts) == 1:
+        return _create_summary(prompts[0])
+
+    with ThreadPoolExecutor(max_workers=max(min(len(prompts), SUMMARY_CONCURRENCY), 1)) as executor:
+        return _reduce_summaries(list(executor.map(_create_summary, prompts)))
+
+
+def try_summarize_content(content: str) -> str | None:
+    """
+    Summarizes the given content, logging the error instead of raising when the summary cannot be created.
+
+    A single file that cannot be summarized therefore never aborts a whole run.
+
+    Args:
+        content (str): The content to be summarized.
+
+    Returns:
+        str | None: The summarized content, or None when every attempt failed.
+    """
+    try:
+        return summarize_content(content)
+    except get_summary_backend().errors as e:
+        logger.error(f"Could not summarize content: {e!r}")
+        return None
+
+
+def get_summary_input(file_path: Path, content: str) -> tuple[str | None, str]:
+    """
+    Prepares the summary of a file from its structure, extracted locally, see `extract_structure`.
+
+    Trivial files, e.g. `__init__.py` files that only import and re-export names, are described from their
+    structure without a model call. Files above SUMMARY_SKELETON_TOKENS are summarized from their skeleton of
+    docstrings, imports and signatures instead of their full content. Files that fit in a single request, i.e. up
+    to SUMMARY_CHUNK_TOKENS, are always sent in full, so chunking is only replaced by skeletons when it applies.
+
+    Args:
+        file_path (Path): The path to the file.
+        content (str): The content of the file.
+
+    Returns:
+        tuple[str | None, str]: The summary of a trivial file, or None, and the content to summarize otherwise.
+    """
+    structure = extract_structure(file_path, content)
+    if structure is None:
+        return None, content
+    if structure.is_trivial:
+        return structure.describe(), content
+    if structure.skeleton and count_tokens(content, OPENAI_MODEL) > max(SUMMARY_SKELETON_TOKENS, SUMMARY_CHUNK_TOKENS):
+        logger.debug(f"Summarizing the skeleton of {file_path} instead of its content")
+        return None, f"# Skeleton of a large file: docstrings, imports and signatures only\n{structure.skeleton}"
+    return None, content
+
+
+def get_summary_inputs(file_contents: Iterable[tuple[Path, str]]) -> list[tuple[Path, str]]:
+    """
+    Returns what is sent to the model for each file that is not trivial, see `get_summary_input`.
+
+    Args:
+        file_contents (Iterable[tuple[Path, str]]): Tuples containing file paths and their contents.
+
+    Returns:
+        list[tuple[Path, str]]: The path and the content to summarize of each file needing a model summary.
+    """
+    summary_inputs = []
+    for file_path, content in file_contents:
+        structural_summary, summary_input = get_summary_input(file_path, content)
+        if structural_summary is None:
+            summary_inputs.append((file_path, summary_input))
+    return summary_inputs
+
+
+def summarize_file(file_info: tuple[Path, str], summarize: Callable[[str], str | None] | None = None) -> str | None:
+    """
+    Summarizes a file, from its structure when possible, see `get_summary_input`.
+
+    Args:
+        file_info (tuple[Path, str]): The file's path and content.
+        summarize (Callable[[str], str | None] | None): Summarizes the content returned by `get_summary_input`.
+            Defaults to `try_summarize_content`.
+
+    Returns:
+        str | None: The summary of the file, or None when it could not be created.
+    """
+    structural_summary, summary_input = get_summary_input(*file_info)
+    if structural_summary is not None:
+        return structural_summary
+    return (summarize or try_summarize_content)(summary_input)
+
+
+def summarize_in_order(
+    file_contents: Iterable[tuple[Path, str]],
+    executor: Executor,
+    window: int,
+    summarize: Callable[[str], str | None] | None = None,
+) -> Iterator[tuple[tuple[Path, str], str | None]]:
+    """
+    Summarizes files concurrently, yielding them in their original order.
+
+    At most `window` files are pulled from `file_contents` ahead of the one being yielded, so lazily read
+    files are only held in memory while their summary is in flight. When the caller stops early, summaries
+    that have not started are cancelled.
+
+    Args:
+        file_contents (Iterable[tuple[Path, str]]): Tuples containing file paths and their contents.
+        executor (Executor): The executor running the summary requests.
+        window (int): The maximum number of files summarized ahead of the one being yielded.
+        summarize (Callable[[str], str | None] | None): Summarizes a file's content, as prepared by
+            `summarize_file`. Defaults to `try_summarize_content`.
+
+    Yields:
+        tuple[tuple[Path, str], str | None]: Each file's path and content together with its summary,
+            which is None when it could not be created.
+    """
+    in_flight: deque[tuple[tuple[Path, str], Future]] = deque()
+    try:
+        for file_info in file_contents:
+            in_flight.append((file_info, executor.submit(summarize_file, file_info, summarize)))
+            if len(in_flight) >= max(window, 1):
+                file_info, future = in_flight.popleft()
+                yield file_info, future.result()
+        while in_flight:
+            file_info, future = in_flight.popleft()
+            yield file_info, future.result()
+    finally:
+        # Interrupted, e.g. by SIGINT: summaries not started yet are dropped, running ones still complete
+        for _, future in in_flight:
+            future.cancel()
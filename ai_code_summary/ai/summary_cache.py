@@ -0,0 +1,156 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from loguru import logger
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    key TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS summaries_created_at ON summaries (created_at);
+CREATE INDEX IF NOT EXISTS summaries_accessed_at ON summaries (accessed_at);
+"""
+
+
+def make_cache_key(content: str, model: str, prompt: str) -> str:
+    """
+    Builds a content-addressed cache key for a summary.
+
+    Args:
+        content (str): The content being summarized.
+        model (str): The model used to summarize the content.
+        prompt (str): The system prompt used to summarize the content.
+
+    Returns:
+        str: A hex digest identifying the content, model and prompt combination.
+    """
+    content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return hashlib.sha256(f"{content_hash}\0{model}\0{prompt}".encode()).hexdigest()
+
+
+class SummaryCache:
+    """
+    A persistent SQLite cache of summaries with size- and age-based eviction.
+
+    Entries older than `max_age_seconds` are treated as misses and removed. When the stored
+    summaries exceed `max_bytes`, the least recently used entries are evicted first.
+    """
+
+    def __init__(self, path: Path, max_bytes: int, max_age_seconds: float):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(_SCHEMA)
+        # Kept up to date by `put` and `_evict`, so storing a summary never scans the table
+        (self._total_bytes,) = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM summaries").fetchone()
+        logger.info(f"Opened summary cache {path}")
+
+    def get(self, key: str) -> str | None:
+        """
+        Returns the cached summary for a key, or None on a miss.
+
+        Args:
+            key (str): The cache key, see `make_cache_key`.
+
+        Returns:
+            str | None: The cached summary, if present and not expired.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute("SELECT summary, created_at FROM summaries WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] < now - self.max_age_seconds:
+                if row is not None:
+                    self._delete(key)
+                self.misses += 1
+                return None
+            self._connection.execute("UPDATE summaries SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, summary: str) -> None:
+        """
+        Stores a summary and evicts entries that no longer fit the size and age limits.
+
+        Args:
+            key (str): The cache key, see `make_cache_key`.
+            summary (str): The summary to store.
+        """
+        now = time.time()
+        size = len(summary.encode("utf-8"))
+        with self._lock:
+            self._delete(key)
+            self._connection.execute(
+                "INSERT INTO summaries (key, summary, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, summary, size, now, now),
+            )
+            self._total_bytes += size
+            self._evict(now)
+
+    def _delete(self, key: str) -> None:
+        """
+        Removes an entry, if present, from the cache and from the running byte total.
+
+        Args:
+            key (str): The cache key.
+        """
+        row = self._connection.execute("SELECT size FROM summaries WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            self._connection.execute("DELETE FROM summaries WHERE key = ?", (key,))
+            self._total_bytes -= row[0]
+
+    def _evict(self, now: float) -> None:
+        """
+        Removes expired entries, then the least recently used entries until the cache fits in `max_bytes`.
+
+        Args:
+            now (float): The current timestamp.
+        """
+        (expired_bytes,) = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM summaries WHERE created_at < ?", (now - self.max_age_seconds,)
+        ).fetchone()
+        if expired_bytes:
+            self._connection.execute("DELETE FROM summaries WHERE created_at < ?", (now - self.max_age_seconds,))
+            self._total_bytes -= expired_bytes
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        evict_keys = []
+        for key, size in self._connection.execute("SELECT key, size FROM summaries ORDER BY accessed_at"):
+            if self._total_bytes <= self.max_bytes:
+                break
+            evict_keys.append((key,))
+            self._total_bytes -= size
+        self._connection.executemany("DELETE FROM summaries WHERE key = ?", evict_keys)
+        logger.debug(f"Evicted {len(evict_keys)} entries from summary cache {self.path}")
+
+    def stats(self) -> dict:
+        """
+        Returns the hit/miss counters along with the current size of the cache.
+
+        Returns:
+            dict: The number of hits, misses, entries and stored bytes.
+        """
+        with self._lock:
+            (entries,) = self._connection.execute("SELECT COUNT(*) FROM summaries").fetchone()
+            return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": self._total_bytes}
+
+    def close(self) -> None:
+        """
+        Closes the underlying database connection.
+        """
+        with self._lock:
+            self._connection.close()
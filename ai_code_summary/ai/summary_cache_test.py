@@ -0,0 +1,88 @@
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from ai_code_summary.ai.summary_cache import SummaryCache, make_cache_key
+
+
+@pytest.fixture
+def summary_cache(tmp_path: Path):
+    summary_cache = SummaryCache(tmp_path / "cache" / "summaries.sqlite3", max_bytes=1024, max_age_seconds=60)
+    yield summary_cache
+    summary_cache.close()
+
+
+def test_make_cache_key_depends_on_content_model_and_prompt():
+    key = make_cache_key("content", "model", "prompt")
+
+    assert key == make_cache_key("content", "model", "prompt")
+    assert key != make_cache_key("other content", "model", "prompt")
+    assert key != make_cache_key("content", "other model", "prompt")
+    assert key != make_cache_key("content", "model", "other prompt")
+
+
+def test_summary_cache_hit_and_miss(summary_cache: SummaryCache):
+    assert summary_cache.get("key") is None
+
+    summary_cache.put("key", "summary")
+
+    assert summary_cache.get("key") == "summary"
+    assert summary_cache.stats() == {"hits": 1, "misses": 1, "entries": 1, "bytes": len("summary")}
+
+
+def test_summary_cache_persists_between_instances(tmp_path: Path):
+    path = tmp_path / "summaries.sqlite3"
+    first_cache = SummaryCache(path, max_bytes=1024, max_age_seconds=60)
+    first_cache.put("key", "summary")
+    first_cache.close()
+
+    second_cache = SummaryCache(path, max_bytes=1024, max_age_seconds=60)
+
+    assert second_cache.get("key") == "summary"
+    second_cache.close()
+
+
+def test_summary_cache_expires_old_entries(summary_cache: SummaryCache):
+    with patch("ai_code_summary.ai.summary_cache.time.time", return_value=1000.0):
+        summary_cache.put("key", "summary")
+
+    with patch("ai_code_summary.ai.summary_cache.time.time", return_value=1061.0):
+        assert summary_cache.get("key") is None
+
+    assert summary_cache.stats()["entries"] == 0
+
+
+def test_summary_cache_evicts_least_recently_used(tmp_path: Path):
+    summary_cache = SummaryCache(tmp_path / "summaries.sqlite3", max_bytes=1024, max_age_seconds=float("inf"))
+    with patch("ai_code_summary.ai.summary_cache.time.time", side_effect=[1.0, 2.0, 3.0, 4.0]):
+        summary_cache.put("first", "a" * 400)
+        summary_cache.put("second", "b" * 400)
+        summary_cache.get("first")  # first is now more recently used than second
+        summary_cache.put("third", "c" * 400)
+
+    assert summary_cache.get("second") is None
+    assert summary_cache.get("first") == "a" * 400
+    assert summary_cache.get("third") == "c" * 400
+    summary_cache.close()
+
+
+def test_summary_cache_tracks_stored_bytes(tmp_path: Path):
+    path = tmp_path / "summaries.sqlite3"
+    summary_cache = SummaryCache(path, max_bytes=1024, max_age_seconds=60)
+    summary_cache.put("a", "x" * 10)
+    summary_cache.put("b", "y" * 20)
+    summary_cache.put("a", "z" * 5)  # Replaces the previous summary of "a"
+
+    with patch("ai_code_summary.ai.summary_cache.time.time", return_value=10**10):
+        assert summary_cache.get("b") is None  # Expired
+    assert summary_cache.stats()["bytes"] == 5
+    summary_cache.close()
+
+    reopened_cache = SummaryCache(path, max_bytes=1024, max_age_seconds=60)
+    assert reopened_cache.stats() == {"hits": 0, "misses": 0, "entries": 1, "bytes": 5}
+    indexes = {
+        row[0] for row in reopened_cache._connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+    }
+    assert {"summaries_created_at", "summaries_accessed_at"} <= indexes
+    reopened_cache.close()
@@ -1,16 +1,59 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
-from ai_code_summary.ai.summary import summarize_content
+import pytest
+from openai import RateLimitError
+
+from ai_code_summary.ai.backends import ExtractiveBackend
+from ai_code_summary.ai.openai_backend import OpenAIBackend, get_open_ai_client
+from ai_code_summary.ai.summary import (
+    get_rate_limiter,
+    get_request_slots,
+    get_summary_backend,
+    get_summary_input,
+    summarize_content,
+    summarize_file,
+    summarize_in_order,
+    try_summarize_content,
+)
+from ai_code_summary.ai.summary_cache import SummaryCache
 from ai_code_summary.env_variables import OPENAI_MODEL, SUMMARY_PROMPT
 
 
-@patch("ai_code_summary.ai.summary.OpenAI")
+@pytest.fixture(autouse=True)
+def clear_shared_clients():
+    get_open_ai_client.cache_clear()
+    get_rate_limiter.cache_clear()
+    get_request_slots.cache_clear()
+    get_summary_backend.cache_clear()
+    yield
+    get_open_ai_client.cache_clear()
+    get_rate_limiter.cache_clear()
+    get_request_slots.cache_clear()
+    get_summary_backend.cache_clear()
+
+
+def _mock_raw_response(content: str, headers: dict | None = None) -> MagicMock:
+    raw_response = MagicMock()
+    raw_response.headers = headers or {}
+    raw_response.parse.return_value.choices[0].message.content = content
+    raw_response.parse.return_value.usage = None
+    return raw_response
+
+
+def _rate_limit_error(headers: dict) -> RateLimitError:
+    return RateLimitError("Rate limit reached", response=MagicMock(status_code=429, headers=headers), body=None)
+
+
+@patch("ai_code_summary.ai.openai_backend.OpenAI")
 def test_summarize_content(mock_get_open_ai):
     mock_client = MagicMock()
     mock_get_open_ai.return_value = mock_client
-    mock_completion = MagicMock()
-    mock_completion.choices[0].message.content = "This is a summary."
-    mock_client.chat.completions.create.return_value = mock_completion
+    mock_create = mock_client.chat.completions.with_raw_response.create
+    mock_create.return_value = _mock_raw_response("This is a summary.")
 
     content = "def example_function(): pass"
 
@@ -18,10 +61,213 @@ def test_summarize_content(mock_get_open_ai):
 
     assert result == "This is a summary."
     mock_get_open_ai.assert_called_once()
-    mock_client.chat.completions.create.assert_called_once_with(
+    mock_create.assert_called_once_with(
         model=OPENAI_MODEL,
         messages=[
             {"role": "system", "content": SUMMARY_PROMPT},
             {"role": "user", "content": f"Summarize the following code:\n\n{content}"},
         ],
     )
+
+
+@patch("ai_code_summary.ai.openai_backend.OpenAI")
+def test_summarize_content_uses_summary_cache(mock_get_open_ai, tmp_path: Path):
+    mock_client = MagicMock()
+    mock_get_open_ai.return_value = mock_client
+    mock_create = mock_client.chat.completions.with_raw_response.create
+    mock_create.return_value = _mock_raw_response("This is a summary.")
+    summary_cache = SummaryCache(tmp_path / "summaries.sqlite3", max_bytes=1024, max_age_seconds=60)
+
+    with patch("ai_code_summary.ai.summary.get_summary_cache", return_value=summary_cache):
+        first_result = summarize_content("def example_function(): pass")
+        second_result = summarize_content("def example_function(): pass")
+
+    assert first_result == second_result == "This is a summary."
+    mock_create.assert_called_once()
+    assert summary_cache.stats()["hits"] == 1
+    summary_cache.close()
+
+
+def test_summarize_in_order_reads_at_most_window_files_ahead():
+    read_paths = []
+
+    def read_files():
+        for index in range(10):
+            read_paths.append(index)
+            yield Path(f"file{index}.py"), f"content{index}"
+
+    with (
+        patch("ai_code_summary.ai.summary.try_summarize_content", side_effect=lambda content: f"summary of {content}"),
+        ThreadPoolExecutor(max_workers=2) as executor,
+    ):
+        results = summarize_in_order(read_files(), executor, window=3)
+        first_file_info, first_summary = next(results)
+        assert len(read_paths) == 3
+        remaining = list(results)
+
+    assert first_file_info == (Path("file0.py"), "content0")
+    assert first_summary == "summary of content0"
+    assert [summary for _, summary in remaining] == [f"summary of content{index}" for index in range(1, 10)]
+
+
+@patch("ai_code_summary.ai.summary.SUMMARY_CHUNK_TOKENS", 14)
+@patch("ai_code_summary.ai.summary.count_tokens", side_effect=lambda text, model: len(text))
+@patch("ai_code_summary.ai.summary._create_summary")
+def test_summarize_content_summarizes_large_content_in_chunks(mock_create_summary, _mock_count_tokens):
+    mock_create_summary.side_effect = lambda prompt: "combined" if prompt.startswith("Combine") else "part"
+
+    result = summarize_content("aaaa = 1\n\n\nb = 2\n")
+
+    assert result == "combined"
+    prompts = [call.args[0] for call in mock_create_summary.call_args_list]
+    assert prompts[:2] == [
+        "Summarize the following code, which is part 1 of 2 of a single file:\n\naaaa = 1\n\n\n",
+        "Summarize the following code, which is part 2 of 2 of a single file:\n\nb = 2\n",
+    ]
+    assert prompts[2].startswith("Combine the following summaries of consecutive parts of a single file:")
+
+
+@patch("ai_code_summary.ai.summary.SUMMARY_MAX_FILE_TOKENS", 3)
+@patch("ai_code_summary.ai.summary.count_tokens", side_effect=lambda text, model: len(text))
+@patch("ai_code_summary.ai.summary._create_summary")
+def test_summarize_content_skips_content_above_the_limit(mock_create_summary, _mock_count_tokens):
+    result = summarize_content("a = 1")
+
+    assert result == "Not summarized: the file has 5 tokens, above the 3 token limit."
+    mock_create_summary.assert_not_called()
+
+
+@patch("ai_code_summary.ai.rate_limiter.RateLimiter.pause")
+@patch("ai_code_summary.ai.openai_backend.time.sleep")
+@patch("ai_code_summary.ai.openai_backend.OpenAI")
+def test_summarize_content_retries_rate_limited_requests(mock_get_open_ai, mock_sleep, mock_pause):
+    mock_create = mock_get_open_ai.return_value.chat.completions.with_raw_response.create
+    mock_create.side_effect = [
+        _rate_limit_error({"retry-after-ms": "1500"}),
+        _mock_raw_response("This is a summary.", {"x-ratelimit-remaining-requests": "10"}),
+    ]
+
+    result = summarize_content("a = 1")
+
+    assert result == "This is a summary."
+    assert mock_create.call_count == 2
+    assert mock_sleep.call_args.args[0] >= 1.5
+    mock_pause.assert_called_once_with(mock_sleep.call_args.args[0])
+
+
+@patch("ai_code_summary.ai.openai_backend.SUMMARY_MAX_RETRIES", 1)
+@patch("ai_code_summary.ai.rate_limiter.RateLimiter.pause")
+@patch("ai_code_summary.ai.openai_backend.time.sleep")
+@patch("ai_code_summary.ai.openai_backend.OpenAI")
+def test_try_summarize_content_returns_none_after_the_last_retry(mock_get_open_ai, _mock_sleep, _mock_pause):
+    mock_create = mock_get_open_ai.return_value.chat.completions.with_raw_response.create
+    mock_create.side_effect = _rate_limit_error({})
+
+    result = try_summarize_content("a = 1")
+
+    assert result is None
+    assert mock_create.call_count == 2
+
+
+@patch("ai_code_summary.ai.summary.SUMMARY_CONCURRENCY", 2)
+@patch("ai_code_summary.ai.summary.SUMMARY_CHUNK_TOKENS", 14)
+@patch("ai_code_summary.ai.summary.count_tokens", side_effect=lambda text, model: len(text))
+@patch("ai_code_summary.ai.openai_backend.OpenAI")
+def test_chunked_summaries_share_the_concurrency_limit(mock_get_open_ai, _mock_count_tokens):
+    lock = threading.Lock()
+    in_flight = max_in_flight = 0
+
+    def create(**_request):
+        nonlocal in_flight, max_in_flight
+        with lock:
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+        time.sleep(0.01)
+        with lock:
+            in_flight -= 1
+        return _mock_raw_response("part")
+
+    mock_get_open_ai.return_value.chat.completions.with_raw_response.create.side_effect = create
+    contents = [f"a{index} = 1\n\n\nb{index} = 2\n\n\nc{index} = 3\n" for index in range(4)]
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        list(executor.map(summarize_content, contents))
+
+    assert max_in_flight == 2
+
+
+def test_summarize_file_describes_trivial_files_without_a_request():
+    summarize = MagicMock()
+
+    summary = summarize_file((Path("pkg/__init__.py"), "from .api import Client\n"), summarize)
+
+    assert summary == "Imports `.api.Client`."
+    summarize.assert_not_called()
+
+
+def test_summarize_file_sends_other_files_in_full():
+    summarize = MagicMock(return_value="summary")
+
+    assert summarize_file((Path("main.py"), "print('hello')"), summarize) == "summary"
+    assert summarize_file((Path("main.js"), "export {}"), summarize) == "summary"
+    assert [call.args[0] for call in summarize.call_args_list] == ["print('hello')", "export {}"]
+
+
+@patch("ai_code_summary.ai.summary.SUMMARY_SKELETON_TOKENS", 10)
+@patch("ai_code_summary.ai.summary.SUMMARY_CHUNK_TOKENS", 10)
+@patch("ai_code_summary.ai.summary.count_tokens", side_effect=lambda text, model: len(text))
+def test_get_summary_input_sends_the_skeleton_of_large_files(_mock_count_tokens):
+    content = "def area(radius):\n    # Compute the area\n    return 3.14 * radius**2\n"
+
+    assert get_summary_input(Path("shapes.py"), content) == (
+        None,
+        "# Skeleton of a large file: docstrings, imports and signatures only\ndef area(radius):\n    ...",
+    )
+
+
+@patch("ai_code_summary.ai.summary.SUMMARY_SKELETON_TOKENS", 10)
+@patch("ai_code_summary.ai.summary.SUMMARY_CHUNK_TOKENS", 1000)
+@patch("ai_code_summary.ai.summary.count_tokens", side_effect=lambda text, model: len(text))
+def test_get_summary_input_sends_files_fitting_in_one_request_in_full(_mock_count_tokens):
+    content = "def area(radius):\n    # Compute the area\n    return 3.14 * radius**2\n"
+
+    assert get_summary_input(Path("shapes.py"), content) == (None, content)
+
+
+@patch("ai_code_summary.ai.summary.SUMMARY_BACKEND", "local")
+@patch("ai_code_summary.ai.openai_backend.OpenAI")
+def test_summarize_content_with_the_local_backend(mock_get_open_ai):
+    mock_create = mock_get_open_ai.return_value.chat.completions.with_raw_response.create
+    mock_create.return_value = _mock_raw_response("This is a summary.")
+    mock_create.return_value.parse.return_value.usage = MagicMock(prompt_tokens=10, completion_tokens=5)
+
+    backend = get_summary_backend()
+    completion = backend.complete("Summarize the following code:\n\na = 1")
+
+    assert completion.text == "This is a summary."
+    assert (completion.tokens_in, completion.tokens_out, completion.cost) == (10, 5, 0.0)
+    assert mock_get_open_ai.call_args.kwargs["base_url"] == "http://localhost:8080/v1"
+    assert mock_create.call_args.kwargs["model"] == "local"
+    assert backend.name == "local@http://localhost:8080/v1"
+    assert not backend.supports_batch
+    assert backend.supports_packing
+
+
+@patch("ai_code_summary.ai.summary.SUMMARY_BACKEND", "extractive")
+def test_summarize_content_with_the_extractive_backend():
+    assert isinstance(get_summary_backend(), ExtractiveBackend)
+    assert summarize_content("# Entry point.\ndef main(): ...\n") == "Entry point. Defines `main`."
+
+
+def test_get_summary_backend_defaults_to_openai():
+    backend = get_summary_backend()
+
+    assert isinstance(backend, OpenAIBackend)
+    assert backend.name == OPENAI_MODEL
+    assert backend.supports_batch
+
+
+@patch("ai_code_summary.ai.summary.SUMMARY_BACKEND", "unknown")
+def test_get_summary_backend_rejects_unknown_backends():
+    with pytest.raises(ValueError, match="Unknown SUMMARY_BACKEND 'unknown'"):
+        get_summary_backend()
@@ -0,0 +1,48 @@
+from functools import cache
+
+from loguru import logger
+
+# Rough number of characters per token, used when tiktoken is not installed
+_CHARS_PER_TOKEN = 4
+
+
+@cache
+def _get_encoding(model: str):
+    """
+    Returns the tiktoken encoding of a model, or None when tiktoken is not installed.
+
+    Args:
+        model (str): The model the text is sent to.
+
+    Returns:
+        tiktoken.Encoding | None: The encoding of the model.
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        logger.info("tiktoken is not installed, estimating token counts from character counts")
+        return None
+
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str, model: str) -> int:
+    """
+    Counts the tokens of a text for a model.
+
+    Uses tiktoken when it is installed and falls back to an estimate of four characters per token.
+
+    Args:
+        text (str): The text to count.
+        model (str): The model the text is sent to.
+
+    Returns:
+        int: The number of tokens.
+    """
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return -(-len(text) // _CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
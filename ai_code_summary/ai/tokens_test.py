@@ -0,0 +1,35 @@
+import builtins
+from unittest.mock import patch
+
+import pytest
+
+from ai_code_summary.ai.tokens import _get_encoding, count_tokens
+
+
+@pytest.fixture(autouse=True)
+def clear_encoding_cache():
+    _get_encoding.cache_clear()
+    yield
+    _get_encoding.cache_clear()
+
+
+def test_count_tokens_without_tiktoken():
+    real_import = builtins.__import__
+
+    def import_without_tiktoken(name, *args, **kwargs):
+        if name == "tiktoken":
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    with patch("builtins.__import__", side_effect=import_without_tiktoken):
+        assert count_tokens("", "gpt-4o-mini") == 0
+        assert count_tokens("abcd", "gpt-4o-mini") == 1
+        assert count_tokens("abcde", "gpt-4o-mini") == 2
+
+
+def test_count_tokens_with_tiktoken():
+    tiktoken = pytest.importorskip("tiktoken")
+
+    assert count_tokens("def foo(): pass", "gpt-4o-mini") == len(
+        tiktoken.encoding_for_model("gpt-4o-mini").encode("def foo(): pass")
+    )
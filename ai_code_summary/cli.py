@@ -0,0 +1,87 @@
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# Only the standard library is imported here, so `--help` and argument errors answer at once. The pipeline, and the
+# configuration it reads from the environment, are imported once the arguments are parsed.
+
+_BACKENDS = ("openai", "local", "extractive")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Builds the parser of the `ai-code-summary` command line.
+
+    Returns:
+        argparse.ArgumentParser: The parser.
+    """
+    parser = argparse.ArgumentParser(
+        prog="ai-code-summary",
+        description="Summarizes the code files of a directory into a single markdown file.",
+    )
+    parser.add_argument("directory", nargs="?", default=".", help="the directory to summarize (default: .)")
+    parser.add_argument("-o", "--output-dir", default="./tmp", help="the directory receiving the markdown")
+    parser.add_argument("--backend", choices=_BACKENDS, help="what creates the summaries (default: SUMMARY_BACKEND)")
+    parser.add_argument("--concurrency", type=int, help="summary requests in flight (default: SUMMARY_CONCURRENCY)")
+    parser.add_argument("--incremental", action="store_true", help="only summarize files changed since the last run")
+    parser.add_argument("--batch", action="store_true", help="send every request through the OpenAI Batch API")
+    parser.add_argument("--pack", action="store_true", help="summarize small files several at a time")
+    parser.add_argument("--deduplicate", action="store_true", help="summarize duplicate files once")
+    parser.add_argument("--sharded", action="store_true", help="split the markdown into shards")
+    parser.add_argument("--rollup", action="store_true", help="summarize directories and the repository")
+    parser.add_argument("--plan", action="store_true", help="only estimate requests, tokens, cost and wall time")
+    parser.add_argument("--watch", action="store_true", help="keep the markdown in sync until interrupted")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    """
+    Runs the `ai-code-summary` command line.
+
+    Options override their environment variable, e.g. `--backend` SUMMARY_BACKEND, and are applied before the
+    configuration is read, so they take precedence over `.env` as well.
+
+    Args:
+        argv (list[str] | None): The arguments, defaults to `sys.argv[1:]`.
+
+    Returns:
+        None
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.watch and (args.batch or args.pack or args.deduplicate or args.sharded or args.rollup or args.plan):
+        parser.error("--watch cannot be combined with --batch, --pack, --deduplicate, --sharded, --rollup or --plan")
+    directory, output_dir = Path(args.directory).resolve(), Path(args.output_dir).resolve()
+    if output_dir == directory or output_dir in directory.parents:
+        parser.error(f"--output-dir {args.output_dir} must not be or contain the summarized directory {args.directory}")
+    if args.backend:
+        os.environ["SUMMARY_BACKEND"] = args.backend
+
+    from ai_code_summary.env_variables import SUMMARY_CONCURRENCY
+
+    concurrency = args.concurrency if args.concurrency is not None else SUMMARY_CONCURRENCY
+    if args.watch:
+        from ai_code_summary.markdown.watch import watch_directory
+
+        watch_directory(args.directory, output_dir=args.output_dir, concurrency=concurrency)
+        return
+
+    from ai_code_summary.markdown.export import create_markdown_from_code
+
+    create_markdown_from_code(
+        args.directory,
+        concurrency=concurrency,
+        incremental=args.incremental,
+        batch=args.batch,
+        output_dir=args.output_dir,
+        deduplicate=args.deduplicate,
+        sharded=args.sharded,
+        rollup=args.rollup,
+        pack=args.pack,
+        plan=args.plan,
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
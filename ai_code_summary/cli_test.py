@@ -0,0 +1,99 @@
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from ai_code_summary.cli import main
+
+# Generous, importing the pipeline takes about a fifth of a second and the OpenAI client library alone more than half
+_IMPORT_BUDGET_SECONDS = 0.5
+
+
+def _import_in_subprocess(module: str) -> tuple[set[str], float]:
+    """
+    Imports a module in a fresh interpreter.
+
+    Args:
+        module (str): The dotted name of the module.
+
+    Returns:
+        tuple[set[str], float]: The top-level modules loaded, and the cumulative import time of the module in seconds.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}, sys; print(' '.join(sys.modules))"],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    loaded = {name.split(".")[0] for name in result.stdout.split()}
+    # Lines are "import time: self [us] | cumulative | imported package"
+    cumulative = next(
+        int(line.split("|")[1])
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:") and line.split("|")[2].strip() == module
+    )
+    return loaded, cumulative / 1_000_000
+
+
+def test_cli_imports_standard_library_only():
+    loaded, _ = _import_in_subprocess("ai_code_summary.cli")
+
+    assert not loaded & {"dotenv", "loguru", "openai", "pathspec"}
+
+
+def test_export_does_not_import_openai_within_budget():
+    loaded, seconds = _import_in_subprocess("ai_code_summary.markdown.export")
+
+    assert "openai" not in loaded
+    assert seconds < _IMPORT_BUDGET_SECONDS
+
+
+@patch("ai_code_summary.markdown.export.create_markdown_from_code")
+def test_main(mock_create_markdown_from_code, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("SUMMARY_BACKEND", "openai")  # Restored once the test ends
+
+    main(["project", "--output-dir", "out", "--concurrency", "2", "--incremental", "--rollup", "--backend", "local"])
+
+    mock_create_markdown_from_code.assert_called_once_with(
+        "project",
+        concurrency=2,
+        incremental=True,
+        batch=False,
+        output_dir="out",
+        deduplicate=False,
+        sharded=False,
+        rollup=True,
+        pack=False,
+        plan=False,
+    )
+    assert os.environ["SUMMARY_BACKEND"] == "local"
+
+
+@patch("ai_code_summary.markdown.watch.watch_directory")
+def test_main_watch(mock_watch_directory):
+    main(["project", "--watch", "--concurrency", "3"])
+
+    mock_watch_directory.assert_called_once_with("project", output_dir="./tmp", concurrency=3)
+
+
+def test_main_rejects_watch_with_batch(capsys: pytest.CaptureFixture):
+    with pytest.raises(SystemExit):
+        main(["--watch", "--batch"])
+
+    assert "--watch cannot be combined" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize(
+    "argv", [["-o", "."], ["project", "-o", "project"], ["project/src", "--output-dir", "project"]]
+)
+@patch("ai_code_summary.markdown.export.create_markdown_from_code")
+def test_main_rejects_an_output_dir_containing_the_directory(
+    mock_create_markdown_from_code, argv: list[str], capsys: pytest.CaptureFixture
+):
+    with pytest.raises(SystemExit):
+        main(argv)
+
+    mock_create_markdown_from_code.assert_not_called()
+    assert "must not be or contain the summarized directory" in capsys.readouterr().err
@@ -0,0 +1,76 @@
+import subprocess
+
+from loguru import logger
+
+
+def _run_git(directory: str, *args: str) -> str | None:
+    """
+    Runs a git command in a directory.
+
+    Args:
+        directory (str): The directory to run the command in.
+        *args (str): The git command and its arguments.
+
+    Returns:
+        str | None: The command's standard output, or None when git is unavailable or the command fails.
+    """
+    try:
+        result = subprocess.run(["git", "-C", str(directory), *args], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError) as e:
+        logger.debug(f"git {' '.join(args)} failed in {directory}: {e}")
+        return None
+    return result.stdout
+
+
+def get_git_commit(directory: str) -> str | None:
+    """
+    Returns the commit currently checked out in a directory.
+
+    Args:
+        directory (str): A directory inside a git work tree.
+
+    Returns:
+        str | None: The commit hash, or None when the directory is not a git work tree.
+    """
+    output = _run_git(directory, "rev-parse", "HEAD")
+    return output.strip() if output else None
+
+
+def is_git_tree_clean(directory: str) -> bool:
+    """
+    Checks whether the tracked files of a directory match the commit currently checked out.
+
+    Untracked files are not taken into account, since git never reports them as unchanged.
+
+    Args:
+        directory (str): A directory inside a git work tree.
+
+    Returns:
+        bool: True when no tracked file under the directory has staged or unstaged changes.
+    """
+    output = _run_git(directory, "status", "--porcelain", "--untracked-files=no", "--", ".")
+    return output is not None and not output.strip()
+
+
+def get_git_unchanged_files(directory: str, commit: str) -> set[str]:
+    """
+    Returns the tracked files that have not changed since a commit, including uncommitted changes.
+
+    Paths are POSIX paths relative to `directory`. Untracked files are never reported as unchanged.
+
+    Args:
+        directory (str): A directory inside a git work tree.
+        commit (str): The commit to compare the work tree against.
+
+    Returns:
+        set[str]: The unchanged files, or an empty set when git cannot answer.
+    """
+    tracked_output = _run_git(directory, "ls-files", "-z")
+    changed_output = _run_git(directory, "diff", "--name-only", "--relative", "-z", commit)
+    if tracked_output is None or changed_output is None:
+        return set()
+
+    tracked_files = set(filter(None, tracked_output.split("\0")))
+    changed_files = set(filter(None, changed_output.split("\0")))
+    logger.info(f"git reports {len(changed_files)} files changed since {commit[:12]}")
+    return tracked_files - changed_files
@@ -0,0 +1,56 @@
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from ai_code_summary.code.git_diff import get_git_commit, get_git_unchanged_files, is_git_tree_clean
+
+
+def _git(directory: Path, *args: str) -> None:
+    subprocess.run(
+        ["git", "-C", str(directory), "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        check=True,
+        capture_output=True,
+    )
+
+
+@pytest.fixture
+def git_repository(tmp_path: Path) -> Path:
+    _git(tmp_path, "init")
+    (tmp_path / "unchanged.py").write_text("a = 1")
+    (tmp_path / "modified.py").write_text("b = 1")
+    _git(tmp_path, "add", ".")
+    _git(tmp_path, "commit", "-m", "initial")
+    return tmp_path
+
+
+def test_get_git_commit(git_repository: Path):
+    assert len(get_git_commit(str(git_repository))) == 40
+
+
+def test_get_git_commit_not_a_repository(tmp_path: Path):
+    assert get_git_commit(str(tmp_path)) is None
+
+
+def test_get_git_unchanged_files(git_repository: Path):
+    commit = get_git_commit(str(git_repository))
+    (git_repository / "modified.py").write_text("b = 2")
+    (git_repository / "untracked.py").write_text("c = 1")
+
+    assert get_git_unchanged_files(str(git_repository), commit) == {"unchanged.py"}
+
+
+def test_get_git_unchanged_files_unknown_commit(git_repository: Path):
+    assert get_git_unchanged_files(str(git_repository), "0" * 40) == set()
+
+
+def test_is_git_tree_clean(git_repository: Path):
+    (git_repository / "untracked.py").write_text("c = 1")
+    assert is_git_tree_clean(str(git_repository))
+
+    (git_repository / "modified.py").write_text("b = 2")
+    assert not is_git_tree_clean(str(git_repository))
+
+
+def test_is_git_tree_clean_not_a_repository(tmp_path: Path):
+    assert not is_git_tree_clean(str(tmp_path))
@@ -1,10 +1,13 @@
-from functools import reduce
+import re
+from functools import lru_cache, reduce
 from pathlib import Path
-from typing import List
+from typing import List, NamedTuple
 
 import pathspec
 from loguru import logger
 
+from ai_code_summary.metrics.stages import get_pipeline_metrics
+
 
 def _find_gitignore_files(directory: str, exclude_dirs: List[str]) -> List[Path]:
     """
@@ -43,6 +46,9 @@ def load_gitignore_patterns(directory: str, exclude_dirs: List[str]) -> pathspec
     """
     Load .gitignore patterns from a directory, excluding specified directories.
 
+    All patterns are merged into a single flat spec, so they are matched as if every .gitignore file lived in
+    the root directory. Use `GitignoreMatcher` for git's per-directory anchoring.
+
     Args:
         directory (str): The root directory to search for .gitignore files.
         exclude_dirs (List[str] | None): Directories to exclude from the search. Defaults to _IGNORE_DIRS.
@@ -63,3 +69,265 @@ def load_gitignore_patterns(directory: str, exclude_dirs: List[str]) -> pathspec
 
     logger.info(f"Loaded .gitignore patterns from {len(gitignore_files)} files")
     return pathspec.PathSpec.from_lines("gitwildmatch", all_patterns)
+
+
+@lru_cache(maxsize=1024)
+def _compile_gitignore_file(gitignore_file: Path, mtime_ns: int, size: int) -> tuple["_CompiledGitignore", int]:
+    """
+    Compiles a .gitignore file, memoized by its path, modification time and size.
+
+    Args:
+        gitignore_file (Path): The path to the .gitignore file.
+        mtime_ns (int): The modification time of the file, in nanoseconds.
+        size (int): The size of the file in bytes.
+
+    Returns:
+        tuple[_CompiledGitignore, int]: The compiled patterns and their size in bytes.
+    """
+    patterns = _read_patterns_from_file(gitignore_file)
+    return _CompiledGitignore(patterns), sum(len(pattern) + 1 for pattern in patterns)
+
+
+class _Rule(NamedTuple):
+    """
+    A single .gitignore pattern; `index` is its position in the file, later patterns win.
+    """
+
+    index: int
+    include: bool
+    dir_only: bool
+
+
+class _CompiledGitignore:
+    """
+    The patterns of one .gitignore file, compiled once and split by how they can be matched.
+
+    Plain names (`node_modules/`, `.env`) and extension patterns (`*.pyc`) only ever look at a path's last
+    component, so they are resolved with dictionary lookups. The remaining slash-less globs are combined into
+    a single regex over the last component, which rejects most paths in one match. Only globs containing a
+    slash are matched against the whole path.
+
+    Names and extensions keep the last rule applying to files and the last rule applying to directories
+    apart, so a directory-only pattern such as `build/` does not hide an earlier `build` from files.
+    """
+
+    _GLOB_CHARS = re.compile(r"[*?\[\\]")
+    _NAMED_GROUP = re.compile(r"\(\?P<\w+>")
+
+    def __init__(self, lines: list[str]):
+        self.names: dict[str, tuple[_Rule | None, _Rule | None]] = {}  # (file rule, directory rule)
+        self.suffixes: dict[str, tuple[_Rule | None, _Rule | None]] = {}
+        self.name_globs: list[tuple[int, bool, re.Pattern]] = []
+        self.path_globs: list[tuple[int, bool, re.Pattern]] = []
+
+        for index, line in enumerate(lines):
+            pattern = line.rstrip() if "\\" not in line else line
+            if not pattern or pattern.startswith("#"):
+                continue
+            include = not pattern.startswith("!")
+            body = pattern if include else pattern[1:]
+            dir_only = body.endswith("/")
+            name = body.rstrip("/")
+
+            if name and "/" not in name and not self._GLOB_CHARS.search(name):
+                self._add_rule(self.names, name, _Rule(index, include, dir_only))
+            elif name.startswith("*.") and "/" not in name and not self._GLOB_CHARS.search(name[1:]):
+                self._add_rule(self.suffixes, name[1:], _Rule(index, include, dir_only))
+            else:
+                globs = self.name_globs if "/" not in name else self.path_globs
+                for compiled in pathspec.GitIgnoreSpec.from_lines([line]).patterns:
+                    if compiled.include is not None:
+                        globs.append((index, compiled.include, compiled.regex))
+
+        # Newest pattern first, so the first regex match is the one that wins
+        self.name_globs.reverse()
+        self.path_globs.reverse()
+        self.any_name_glob = self._combine(self.name_globs)
+
+    @staticmethod
+    def _add_rule(rules: dict[str, tuple[_Rule | None, _Rule | None]], key: str, rule: _Rule) -> None:
+        """
+        Records a name or extension rule, replacing the earlier rules it overrides.
+
+        Args:
+            rules (dict[str, tuple[_Rule | None, _Rule | None]]): The file and directory rules, by key.
+            key (str): The name or extension.
+            rule (_Rule): The rule, which only overrides the directory rule when it is directory-only.
+        """
+        file_rule, _ = rules.get(key, (None, None))
+        rules[key] = (file_rule if rule.dir_only else rule, rule)
+
+    @classmethod
+    def _combine(cls, globs: list[tuple[int, bool, re.Pattern]]) -> re.Pattern | None:
+        """
+        Combines glob regexes into one alternation that tells whether any of them matches.
+
+        Args:
+            globs (list[tuple[int, bool, re.Pattern]]): The globs to combine.
+
+        Returns:
+            re.Pattern | None: The combined regex, or None when there are no globs or they cannot be combined.
+        """
+        if not globs:
+            return None
+        try:
+            return re.compile("|".join(f"(?:{cls._NAMED_GROUP.sub('(?:', regex.pattern)})" for _, _, regex in globs))
+        except re.error:
+            return None
+
+    def check(self, relative_path: str, name: str, is_dir: bool) -> bool | None:
+        """
+        Finds the verdict of the last pattern matching a path.
+
+        Args:
+            relative_path (str): The path relative to the .gitignore's directory.
+            name (str): The last component of the path.
+            is_dir (bool): Whether the path is a directory.
+
+        Returns:
+            bool | None: True if ignored, False if re-included by a negation, None if no pattern matches.
+        """
+        rules = self.names.get(name)
+        best = rules[is_dir] if rules is not None else None
+
+        dot_index = name.find(".")
+        while dot_index >= 0:
+            rules = self.suffixes.get(name[dot_index:])
+            rule = rules[is_dir] if rules is not None else None
+            if rule is not None and (best is None or rule.index > best.index):
+                best = rule
+            dot_index = name.find(".", dot_index + 1)
+
+        best_index = best.index if best is not None else -1
+        if self.name_globs:
+            candidate = f"{name}/" if is_dir else name
+            if self.any_name_glob is None or self.any_name_glob.match(candidate):
+                for index, include, regex in self.name_globs:
+                    if index < best_index:
+                        break
+                    if regex.match(candidate):
+                        best_index, best = index, _Rule(index, include, False)
+                        break
+
+        candidate = f"{relative_path}/" if is_dir else relative_path
+        for index, include, regex in self.path_globs:
+            if index < best_index:
+                break
+            if regex.match(candidate):
+                return include
+        return best.include if best is not None else None
+
+
+class GitignoreMatcher:
+    """
+    Matches paths against .gitignore files using git's per-directory semantics.
+
+    Patterns are anchored to the directory of the .gitignore file they come from, and deeper .gitignore files
+    take precedence over shallower ones. Paths are POSIX paths relative to the root being walked, and
+    directories are expected to be registered with `add_gitignore` before their contents are matched.
+
+    Directory verdicts are memoized, and everything below an ignored directory is ignored without
+    testing any pattern, as git never re-includes files below an excluded directory.
+    """
+
+    def __init__(self, spec: pathspec.PathSpec | None = None):
+        """
+        Args:
+            spec (pathspec.PathSpec | None): Extra patterns anchored to the root, with the lowest precedence.
+        """
+        self._root_spec = spec
+        self._gitignores: dict[str, _CompiledGitignore] = {}
+        self._dir_verdicts: dict[str, bool] = {}
+
+    def add_gitignore(self, relative_dir: str, gitignore_file: Path) -> None:
+        """
+        Registers the .gitignore file of a directory.
+
+        Compiled .gitignore files are kept in memory until they change, so repeated walks of the same tree, e.g.
+        by the watch mode, do not compile them again.
+
+        Args:
+            relative_dir (str): The directory relative to the root, with a trailing slash ("" for the root).
+            gitignore_file (Path): The path to the directory's .gitignore file.
+        """
+        with get_pipeline_metrics().stage("gitignore") as sample:
+            stat = gitignore_file.stat()
+            self._gitignores[relative_dir], sample.bytes = _compile_gitignore_file(
+                gitignore_file, stat.st_mtime_ns, stat.st_size
+            )
+        logger.debug(f"Loaded .gitignore patterns from {gitignore_file}")
+
+    def add_patterns(self, relative_dir: str, patterns: list[str]) -> None:
+        """
+        Registers .gitignore patterns for a directory.
+
+        Args:
+            relative_dir (str): The directory relative to the root, with a trailing slash ("" for the root).
+            patterns (list[str]): The lines of the directory's .gitignore file.
+        """
+        self._gitignores[relative_dir] = _CompiledGitignore(patterns)
+
+    def is_ignored(self, relative_path: str, is_dir: bool = False) -> bool:
+        """
+        Checks whether a path is ignored.
+
+        Args:
+            relative_path (str): The path relative to the root, without a trailing slash.
+            is_dir (bool): Whether the path is a directory.
+
+        Returns:
+            bool: True if the path is below an ignored directory, or if the last matching pattern of the deepest
+                .gitignore with a match ignores it.
+        """
+        if is_dir:
+            return self._is_dir_ignored(relative_path)
+
+        separator_index = relative_path.rfind("/")
+        if separator_index >= 0 and self._is_dir_ignored(relative_path[:separator_index]):
+            return True
+        return self._match(relative_path, relative_path[separator_index + 1 :], is_dir=False)
+
+    def _is_dir_ignored(self, relative_dir: str) -> bool:
+        """
+        Checks whether a directory or any of its parents is ignored, memoizing the verdict.
+
+        Args:
+            relative_dir (str): The directory relative to the root, without a trailing slash.
+
+        Returns:
+            bool: True if the directory is ignored.
+        """
+        verdict = self._dir_verdicts.get(relative_dir)
+        if verdict is None:
+            separator_index = relative_dir.rfind("/")
+            verdict = (separator_index >= 0 and self._is_dir_ignored(relative_dir[:separator_index])) or self._match(
+                relative_dir, relative_dir[separator_index + 1 :], is_dir=True
+            )
+            self._dir_verdicts[relative_dir] = verdict
+        return verdict
+
+    def _match(self, relative_path: str, name: str, is_dir: bool) -> bool:
+        """
+        Matches a path against the .gitignore files of its ancestors, from the deepest one up to the root.
+
+        Args:
+            relative_path (str): The path relative to the root, without a trailing slash.
+            name (str): The last component of the path.
+            is_dir (bool): Whether the path is a directory.
+
+        Returns:
+            bool: True if the path is ignored.
+        """
+        separator_index = len(relative_path)
+        while True:
+            separator_index = relative_path.rfind("/", 0, separator_index)
+            relative_dir = relative_path[: separator_index + 1]
+            if (gitignore := self._gitignores.get(relative_dir)) is not None:
+                verdict = gitignore.check(relative_path[len(relative_dir) :], name, is_dir)
+                if verdict is not None:
+                    return verdict
+            if separator_index < 0:
+                break
+
+        candidate = f"{relative_path}/" if is_dir else relative_path
+        return self._root_spec is not None and self._root_spec.match_file(candidate)
@@ -1,8 +1,10 @@
 from pathlib import Path
 
+import pathspec
 import pytest
+from pathspec import PathSpec
 
-from ai_code_summary.code.gitignore_pathspec import _find_gitignore_files, load_gitignore_patterns
+from ai_code_summary.code.gitignore_pathspec import GitignoreMatcher, _find_gitignore_files, load_gitignore_patterns
 
 
 @pytest.fixture
@@ -40,3 +42,111 @@ def test_load_gitignore_patterns_no_gitignore_files(tmp_no_gitignore_files: Path
     pathspec = load_gitignore_patterns(tmp_no_gitignore_files, [])
 
     assert len(pathspec.patterns) == 0
+
+
+def test_gitignore_matcher_anchors_patterns_to_their_directory(tmp_gitignore_files: Path):
+    matcher = GitignoreMatcher()
+    matcher.add_gitignore("dir1/", tmp_gitignore_files / "dir1" / ".gitignore")
+    matcher.add_gitignore("dir2/", tmp_gitignore_files / "dir2" / ".gitignore")
+
+    assert matcher.is_ignored("dir1/test.pyc")
+    assert matcher.is_ignored("dir1/nested/test.pyc")
+    assert matcher.is_ignored("dir1/__pycache__", is_dir=True)
+    assert matcher.is_ignored("dir2/test.log")
+    assert not matcher.is_ignored("test.pyc")
+    assert not matcher.is_ignored("dir2/test.pyc")
+    assert not matcher.is_ignored("dir1/test.log")
+
+
+def test_gitignore_matcher_deeper_gitignore_takes_precedence(tmp_path: Path):
+    (tmp_path / ".gitignore").write_text("*.log\n")
+    (tmp_path / "logs").mkdir()
+    (tmp_path / "logs" / ".gitignore").write_text("!keep.log\n")
+    matcher = GitignoreMatcher(PathSpec.from_lines("gitwildmatch", ["*.tmp"]))
+    matcher.add_gitignore("", tmp_path / ".gitignore")
+    matcher.add_gitignore("logs/", tmp_path / "logs" / ".gitignore")
+
+    assert matcher.is_ignored("logs/other.log")
+    assert not matcher.is_ignored("logs/keep.log")
+    assert matcher.is_ignored("keep.log")
+    assert matcher.is_ignored("logs/file.tmp")
+
+
+def test_gitignore_matcher_reloads_a_changed_gitignore(tmp_path: Path):
+    (tmp_path / ".gitignore").write_text("*.log\n")
+    GitignoreMatcher().add_gitignore("", tmp_path / ".gitignore")
+    (tmp_path / ".gitignore").write_text("*.tmp\n*.bak\n")
+
+    matcher = GitignoreMatcher()
+    matcher.add_gitignore("", tmp_path / ".gitignore")
+
+    assert matcher.is_ignored("file.tmp")
+    assert not matcher.is_ignored("file.log")
+
+
+_PATTERNS = [
+    "# comment",
+    "",
+    "*.pyc",
+    "!keep.pyc",
+    "*.tar.gz",
+    ".env",
+    "build/",
+    "/anchored.py",
+    "src/**/gen/",
+    "tmp?*.txt",
+    "logs/*.log",
+]
+
+
+@pytest.mark.parametrize(
+    ("patterns", "path"),
+    [
+        *(
+            (_PATTERNS, path)
+            for path in [
+                "main.py",
+                "module.pyc",
+                "pkg/module.pyc",
+                "pkg/keep.pyc",
+                "archive.tar.gz",
+                "notes.tar",
+                ".env",
+                "config/.env",
+                "build",
+                "build/output.js",
+                "pkg/build/output.js",
+                "docs/build",
+                "anchored.py",
+                "pkg/anchored.py",
+                "src/gen/client.ts",
+                "src/pkg/gen/client.ts",
+                "tmp_file.txt",
+                "pkg/tmp1.txt",
+                "logs/debug.log",
+            ]
+        ),
+        (["build", "build/"], "build"),
+        (["build", "build/"], "build/output.js"),
+        (["foo", "!foo/"], "foo"),
+        (["foo", "!foo/"], "foo/bar.py"),
+        (["*.log", "!*.log/"], "x.log"),
+        (["*.log", "!*.log/"], "x.log/y.py"),
+    ],
+)
+def test_gitignore_matcher_agrees_with_pathspec(patterns: list[str], path: str):
+    matcher = GitignoreMatcher()
+    matcher.add_patterns("", patterns)
+    spec = pathspec.GitIgnoreSpec.from_lines(patterns)
+
+    assert matcher.is_ignored(path) == spec.match_file(path)
+
+
+def test_gitignore_matcher_ignores_everything_below_an_ignored_directory():
+    matcher = GitignoreMatcher()
+    matcher.add_patterns("", ["vendor"])
+    matcher.add_patterns("vendor/lib/", ["!*.py"])
+
+    assert matcher.is_ignored("vendor", is_dir=True)
+    assert matcher.is_ignored("vendor/lib/module.py")
+    assert not matcher.is_ignored("src/module.py")
@@ -0,0 +1,117 @@
+import hashlib
+import re
+from collections.abc import Iterable
+from pathlib import Path
+
+from loguru import logger
+
+from ai_code_summary.metrics.stages import get_pipeline_metrics
+
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+_SHINGLE_SIZE = 3
+# Contents with fewer shingles than this only match exact duplicates, their fingerprints are too coarse
+_MIN_SHINGLES = 20
+
+_HASH_BITS = 64
+# Bit counts are accumulated in 20-bit lanes of one big integer, one lane per fingerprint bit
+_LANE_BITS = 20
+_MAX_FEATURES = (1 << _LANE_BITS) - 1
+_LANE_MASK = (1 << _LANE_BITS) - 1
+_SPREAD_BYTE = [
+    sum(1 << (_LANE_BITS * bit) for bit in range(8) if byte >> bit & 1) for byte in range(256)
+]  # Spreads the 8 bits of a byte over 8 lanes
+
+
+def simhash(content: str) -> int | None:
+    """
+    Computes the 64-bit SimHash fingerprint of content, over shingles of consecutive tokens.
+
+    Near-duplicate contents have fingerprints that differ in few bits.
+
+    Args:
+        content (str): The content to fingerprint.
+
+    Returns:
+        int | None: The fingerprint, or None when the content has too few shingles to be fingerprinted.
+    """
+    tokens = _TOKEN.findall(content)
+    shingles = {tuple(tokens[index : index + _SHINGLE_SIZE]) for index in range(len(tokens) - _SHINGLE_SIZE + 1)}
+    if len(shingles) < _MIN_SHINGLES:
+        return None
+
+    features = list(shingles)[:_MAX_FEATURES]
+    lanes = 0
+    for shingle in features:
+        feature_hash = int.from_bytes(hashlib.blake2b("\x1f".join(shingle).encode(), digest_size=8).digest(), "little")
+        for byte_index in range(_HASH_BITS // 8):
+            lanes += _SPREAD_BYTE[feature_hash >> (8 * byte_index) & 0xFF] << (8 * _LANE_BITS * byte_index)
+
+    fingerprint = 0
+    for bit in range(_HASH_BITS):
+        if 2 * (lanes >> (_LANE_BITS * bit) & _LANE_MASK) > len(features):
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def find_representatives(file_contents: Iterable[tuple[Path, str]], max_distance: int) -> dict[str, tuple[Path, str]]:
+    """
+    Clusters exact and near-duplicate contents, picking the first file of each cluster as its representative.
+
+    Exact duplicates are found by content. Near-duplicates are contents whose SimHash fingerprints differ in at
+    most `max_distance` bits. Fingerprints are split into `max_distance + 1` bands, so any two fingerprints
+    within the distance share at least one band and only contents sharing a band are compared.
+
+    Args:
+        file_contents (Iterable[tuple[Path, str]]): The file paths and contents, in order.
+        max_distance (int): The maximum number of differing fingerprint bits of near-duplicates,
+            negative to only cluster exact duplicates.
+
+    Returns:
+        dict[str, tuple[Path, str]]: The path and content of the representative of each content.
+    """
+    with get_pipeline_metrics().stage("deduplicate") as sample:
+        file_contents = list(file_contents)
+        sample.count = len(file_contents)
+        sample.bytes = sum(len(content) for _, content in file_contents)
+
+        band_count = min(max_distance + 1, _HASH_BITS)
+        band_bits = _HASH_BITS // band_count if band_count > 0 else 0
+        band_mask = (1 << band_bits) - 1
+        bands: list[dict[int, list[tuple[int, tuple[Path, str]]]]] = [{} for _ in range(max(band_count, 0))]
+
+        representatives: dict[str, tuple[Path, str]] = {}
+        near_duplicates = 0
+        for file_info in file_contents:
+            content = file_info[1]
+            if content in representatives:
+                continue
+            fingerprint = simhash(content) if band_count > 0 else None
+            if fingerprint is None:
+                representatives[content] = file_info
+                continue
+
+            keys = [fingerprint >> (band * band_bits) & band_mask for band in range(band_count)]
+            representative = next(
+                (
+                    candidate
+                    for band, key in enumerate(keys)
+                    for candidate_fingerprint, candidate in bands[band].get(key, [])
+                    if (fingerprint ^ candidate_fingerprint).bit_count() <= max_distance
+                ),
+                None,
+            )
+            if representative is not None:
+                representatives[content] = representative
+                near_duplicates += 1
+                continue
+
+            representatives[content] = file_info
+            for band, key in enumerate(keys):
+                bands[band].setdefault(key, []).append((fingerprint, file_info))
+
+        clusters = len({file_info[1] for file_info in representatives.values()})
+        logger.info(
+            f"Deduplicated {len(file_contents)} files to {clusters} representatives, "
+            f"{near_duplicates} contents are near-duplicates"
+        )
+        return representatives
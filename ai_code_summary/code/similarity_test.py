@@ -0,0 +1,54 @@
+from pathlib import Path
+
+from ai_code_summary.code.similarity import find_representatives, simhash
+
+_CLIENT = "\n".join(
+    f"def get_{name}(client, {name}_id, timeout=30):\n"
+    f"    response = client.get(f'/api/v1/{name}s/{{{name}_id}}', timeout=timeout)\n"
+    "    response.raise_for_status()\n"
+    "    return response.json()\n"
+    for name in ["user", "order", "invoice", "product", "payment", "account", "session", "report", "customer"]
+)
+_NEAR_DUPLICATE = _CLIENT.replace("timeout=30", "timeout=60", 1)
+
+
+def test_simhash_of_short_content_is_none():
+    assert simhash("__all__ = ['foo']") is None
+
+
+def test_simhash_of_near_duplicates_differ_in_few_bits():
+    assert (simhash(_CLIENT) ^ simhash(_NEAR_DUPLICATE)).bit_count() <= 6
+
+
+def test_simhash_of_unrelated_contents_differ_in_many_bits():
+    other = "\n".join(
+        f"class Migration{index}(migrations.Migration):\n    dependencies = ['{index}']" for index in range(30)
+    )
+
+    assert (simhash(_CLIENT) ^ simhash(other)).bit_count() > 6
+
+
+def test_find_representatives_groups_exact_duplicates():
+    file_contents = [(Path("a/__init__.py"), "x = 1"), (Path("b/__init__.py"), "x = 1"), (Path("c.py"), "y = 2")]
+
+    representatives = find_representatives(file_contents, max_distance=6)
+
+    assert representatives == {"x = 1": file_contents[0], "y = 2": file_contents[2]}
+
+
+def test_find_representatives_groups_near_duplicates():
+    other = "\n".join(f"class Migration{index}:\n    dependencies = ['{index}']" for index in range(30))
+    file_contents = [(Path("client.py"), _CLIENT), (Path("vendored.py"), _NEAR_DUPLICATE), (Path("other.py"), other)]
+
+    representatives = find_representatives(file_contents, max_distance=6)
+
+    assert representatives[_NEAR_DUPLICATE] == file_contents[0]
+    assert representatives[other] == file_contents[2]
+
+
+def test_find_representatives_negative_distance_only_groups_exact_duplicates():
+    file_contents = [(Path("client.py"), _CLIENT), (Path("vendored.py"), _NEAR_DUPLICATE)]
+
+    representatives = find_representatives(file_contents, max_distance=-1)
+
+    assert representatives[_NEAR_DUPLICATE] == file_contents[1]
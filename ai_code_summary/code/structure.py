@@ -0,0 +1,125 @@
+import ast
+from dataclasses import dataclass, field
+
+
+@dataclass
+class CodeStructure:
+    """
+    The structure of a code file, extracted locally without a model.
+
+    `skeleton` holds the docstrings, imports, class and function signatures of the file, one per line, nested
+    definitions being indented. `is_trivial` marks files without any logic, e.g. `__init__.py` files that only
+    import and re-export names.
+    """
+
+    docstring: str | None = None
+    imports: list[str] = field(default_factory=list)
+    exports: list[str] = field(default_factory=list)
+    skeleton: str = ""
+    is_trivial: bool = False
+
+    def describe(self) -> str:
+        """
+        Describes a trivial file from its structure, in place of a model summary.
+
+        Returns:
+            str: The description of the file.
+        """
+        sentences = [self.docstring.splitlines()[0].rstrip(".") + "."] if self.docstring else []
+        if self.imports:
+            sentences.append(f"Imports {', '.join(f'`{name}`' for name in self.imports)}.")
+        if self.exports:
+            sentences.append(f"Exports {', '.join(f'`{name}`' for name in self.exports)}.")
+        return " ".join(sentences) or "Empty module."
+
+
+def extract_python_structure(content: str) -> CodeStructure | None:
+    """
+    Extracts the structure of Python code through its abstract syntax tree.
+
+    Args:
+        content (str): The Python code.
+
+    Returns:
+        CodeStructure | None: The structure of the code, or None when it cannot be parsed.
+    """
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return None
+
+    structure = CodeStructure(docstring=ast.get_docstring(tree))
+    lines = [f'"""{structure.docstring.splitlines()[0]}"""'] if structure.docstring else []
+    is_trivial = True
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            structure.imports.extend(alias.name for alias in node.names)
+            lines.append(ast.unparse(node))
+        elif isinstance(node, ast.ImportFrom):
+            prefix = "." * node.level + (f"{node.module}." if node.module else "")
+            structure.imports.extend(f"{prefix}{alias.name}" for alias in node.names)
+            lines.append(ast.unparse(node))
+        elif _is_docstring(node) or isinstance(node, ast.Pass):
+            continue
+        elif _is_all_assignment(node):
+            structure.exports.extend(element.value for element in node.value.elts if isinstance(element, ast.Constant))
+            lines.append(ast.unparse(node))
+        else:
+            is_trivial = False
+            lines.extend(_get_definition_lines(node, indent=""))
+
+    structure.skeleton = "\n".join(lines)
+    structure.is_trivial = is_trivial
+    return structure
+
+
+def _is_docstring(node: ast.stmt) -> bool:
+    return isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant) and isinstance(node.value.value, str)
+
+
+def _is_all_assignment(node: ast.stmt) -> bool:
+    return (
+        isinstance(node, ast.Assign)
+        and [ast.unparse(target) for target in node.targets] == ["__all__"]
+        and isinstance(node.value, (ast.List, ast.Tuple))
+    )
+
+
+def _get_definition_lines(node: ast.stmt, indent: str) -> list[str]:
+    """
+    Returns the skeleton lines of a top-level or nested statement: signatures for classes and functions,
+    the assigned names for assignments, and nothing for other statements.
+
+    Args:
+        node (ast.stmt): The statement.
+        indent (str): The indentation of the statement.
+
+    Returns:
+        list[str]: The skeleton lines.
+    """
+    if isinstance(node, (ast.Assign, ast.AnnAssign)):
+        targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+        annotation = f": {ast.unparse(node.annotation)}" if isinstance(node, ast.AnnAssign) else ""
+        return [f"{indent}{' = '.join(ast.unparse(target) for target in targets)}{annotation} = ..."]
+    if not isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+        return []
+
+    lines = [f"{indent}@{ast.unparse(decorator)}" for decorator in node.decorator_list]
+    if isinstance(node, ast.ClassDef):
+        bases = ", ".join(
+            [ast.unparse(base) for base in node.bases] + [ast.unparse(keyword) for keyword in node.keywords]
+        )
+        lines.append(f"{indent}class {node.name}({bases}):" if bases else f"{indent}class {node.name}:")
+    else:
+        prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+        returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+        lines.append(f"{indent}{prefix} {node.name}({ast.unparse(node.args)}){returns}:")
+
+    body_indent = indent + "    "
+    body_lines = []
+    if docstring := ast.get_docstring(node):
+        body_lines.append(f'{body_indent}"""{docstring.splitlines()[0]}"""')
+    if isinstance(node, ast.ClassDef):
+        for child in node.body:
+            body_lines.extend(_get_definition_lines(child, body_indent))
+    return lines + (body_lines or [f"{body_indent}..."])
@@ -0,0 +1,72 @@
+from ai_code_summary.code.structure import extract_python_structure
+
+
+def test_extract_python_structure_skeleton():
+    content = '''"""Shapes.
+
+More details.
+"""
+import math
+from dataclasses import dataclass
+
+UNIT = 1.0
+
+
+@dataclass
+class Circle(Shape, metaclass=Meta):
+    """A circle."""
+
+    radius: float
+
+    def area(self, scale: float = 1.0) -> float:
+        # Comments and bodies are left out
+        return math.pi * self.radius**2 * scale
+
+
+async def fetch(url):
+    return await get(url)
+'''
+
+    structure = extract_python_structure(content)
+
+    assert structure.docstring == "Shapes.\n\nMore details."
+    assert structure.imports == ["math", "dataclasses.dataclass"]
+    assert not structure.is_trivial
+    assert structure.skeleton == (
+        '"""Shapes."""\n'
+        "import math\n"
+        "from dataclasses import dataclass\n"
+        "UNIT = ...\n"
+        "@dataclass\n"
+        "class Circle(Shape, metaclass=Meta):\n"
+        '    """A circle."""\n'
+        "    radius: float = ...\n"
+        "    def area(self, scale: float=1.0) -> float:\n"
+        "        ...\n"
+        "async def fetch(url):\n"
+        "    ..."
+    )
+
+
+def test_extract_python_structure_trivial_init_file():
+    content = (
+        '"""The package."""\nfrom . import api\nfrom .models import Circle, Square\n\n__all__ = ["Circle", "Square"]\n'
+    )
+
+    structure = extract_python_structure(content)
+
+    assert structure.is_trivial
+    assert structure.describe() == (
+        "The package. Imports `.api`, `.models.Circle`, `.models.Square`. Exports `Circle`, `Square`."
+    )
+
+
+def test_extract_python_structure_empty_module():
+    structure = extract_python_structure("# Nothing here\n")
+
+    assert structure.is_trivial
+    assert structure.describe() == "Empty module."
+
+
+def test_extract_python_structure_invalid_code():
+    assert extract_python_structure("def broken(:\n") is None
@@ -7,6 +7,67 @@ load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "${OPENAI_API_KEY}")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")  # default to mini to keep costs down
 
+# Summary backend: "openai", "local" for an OpenAI-compatible server such as llama.cpp or vLLM, or "extractive"
+# for model-free summaries
+SUMMARY_BACKEND = os.getenv("SUMMARY_BACKEND", "openai")
+SUMMARY_LOCAL_BASE_URL = os.getenv("SUMMARY_LOCAL_BASE_URL", "http://localhost:8080/v1")
+SUMMARY_LOCAL_MODEL = os.getenv("SUMMARY_LOCAL_MODEL", "local")
+SUMMARY_LOCAL_API_KEY = os.getenv("SUMMARY_LOCAL_API_KEY", "local")
+SUMMARY_LOCAL_CONCURRENCY = int(os.getenv("SUMMARY_LOCAL_CONCURRENCY", "1"))
+
 SUMMARY_PROMPT = os.getenv(
     "SUMMARY_PROMPT", ("You are code summary expert. You summarize code in a short way that is easy to understand.")
 )
+
+# Maximum number of summary requests kept in flight at once
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "8"))
+# Maximum number of files read ahead of the markdown section being written
+SUMMARY_WINDOW = int(os.getenv("SUMMARY_WINDOW", "16"))
+
+# Retries of failed summary requests, with jittered exponential backoff
+SUMMARY_MAX_RETRIES = int(os.getenv("SUMMARY_MAX_RETRIES", "6"))
+SUMMARY_RETRY_BASE_SECONDS = float(os.getenv("SUMMARY_RETRY_BASE_SECONDS", "1"))
+SUMMARY_RETRY_MAX_SECONDS = float(os.getenv("SUMMARY_RETRY_MAX_SECONDS", "60"))
+
+# Persistent summary cache, disabled when the path is empty
+SUMMARY_CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH", "")
+SUMMARY_CACHE_MAX_MB = float(os.getenv("SUMMARY_CACHE_MAX_MB", "512"))
+SUMMARY_CACHE_MAX_AGE_DAYS = float(os.getenv("SUMMARY_CACHE_MAX_AGE_DAYS", "30"))
+
+# Content larger than the chunk budget is summarized in chunks, content above the file limit is not sent at all
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "16000"))
+SUMMARY_MAX_FILE_TOKENS = int(os.getenv("SUMMARY_MAX_FILE_TOKENS", "200000"))
+# Files above this size and the chunk budget are summarized from their skeleton when their structure can be extracted
+SUMMARY_SKELETON_TOKENS = int(os.getenv("SUMMARY_SKELETON_TOKENS", "16000"))
+
+# Files up to this size are packed together into requests of this size, to share one round-trip and system prompt
+SUMMARY_PACK_FILE_TOKENS = int(os.getenv("SUMMARY_PACK_FILE_TOKENS", "300"))
+SUMMARY_PACK_TOKENS = int(os.getenv("SUMMARY_PACK_TOKENS", "6000"))
+SUMMARY_PACK_MAX_FILES = int(os.getenv("SUMMARY_PACK_MAX_FILES", "20"))
+
+# Files are checked before being read: larger or binary or minified files are skipped, large files truncated
+SUMMARY_SKIP_FILE_BYTES = int(os.getenv("SUMMARY_SKIP_FILE_BYTES", "10000000"))
+SUMMARY_TRUNCATE_FILE_BYTES = int(os.getenv("SUMMARY_TRUNCATE_FILE_BYTES", "1000000"))
+SUMMARY_MAX_LINE_LENGTH = int(os.getenv("SUMMARY_MAX_LINE_LENGTH", "1000"))
+
+# Size above which a markdown shard is continued in the next one, for sharded output
+SUMMARY_SHARD_MAX_BYTES = int(os.getenv("SUMMARY_SHARD_MAX_BYTES", "8000000"))
+
+# Watch mode: delay between two polls of the working tree, and time without changes before summarizing them
+SUMMARY_WATCH_INTERVAL_SECONDS = float(os.getenv("SUMMARY_WATCH_INTERVAL_SECONDS", "2"))
+SUMMARY_WATCH_DEBOUNCE_SECONDS = float(os.getenv("SUMMARY_WATCH_DEBOUNCE_SECONDS", "1"))
+
+# Batch API
+SUMMARY_BATCH_MAX_REQUESTS = int(os.getenv("SUMMARY_BATCH_MAX_REQUESTS", "50000"))
+SUMMARY_BATCH_POLL_SECONDS = float(os.getenv("SUMMARY_BATCH_POLL_SECONDS", "30"))
+
+# Fingerprint bits in which near-duplicate files may differ and still share a summary, -1 for exact duplicates only
+SUMMARY_NEAR_DUPLICATE_DISTANCE = int(os.getenv("SUMMARY_NEAR_DUPLICATE_DISTANCE", "6"))
+
+# Plans: expected completion tokens of a summary and duration of a summary request, e.g. from a run report
+SUMMARY_PLAN_COMPLETION_TOKENS = int(os.getenv("SUMMARY_PLAN_COMPLETION_TOKENS", "150"))
+SUMMARY_PLAN_REQUEST_SECONDS = float(os.getenv("SUMMARY_PLAN_REQUEST_SECONDS", "4"))
+
+# Estimated prices per million prompt and completion tokens, used by the run report (gpt-4o-mini by default)
+SUMMARY_INPUT_COST_PER_MILLION = float(os.getenv("SUMMARY_INPUT_COST_PER_MILLION", "0.15"))
+SUMMARY_OUTPUT_COST_PER_MILLION = float(os.getenv("SUMMARY_OUTPUT_COST_PER_MILLION", "0.6"))
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from typing import Self
+
+from loguru import logger
+
+from ai_code_summary.files.manifest import hash_content
+
+
+def load_checkpoint(journal_file: Path, model: str, prompt: str) -> dict[str, str]:
+    """
+    Loads the summaries journaled by an interrupted run.
+
+    A line cut short by the interruption is ignored. The journal is ignored as a whole when it was written
+    for another model or prompt.
+
+    Args:
+        journal_file (Path): The path to the journal.
+        model (str): The summary backend and model used to summarize the content, see `SummaryBackend.name`.
+        prompt (str): The system prompt used to summarize the content.
+
+    Returns:
+        dict[str, str]: The journaled summaries keyed by the SHA-256 of their content.
+    """
+    try:
+        lines = journal_file.read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable checkpoint {journal_file}: {e}")
+        return {}
+
+    summaries = {}
+    for index, line in enumerate(lines):
+        try:
+            record = json.loads(line)
+            if index == 0:
+                if record != _get_header(model, prompt):
+                    logger.info(f"Ignoring checkpoint {journal_file} written with another model or prompt")
+                    return {}
+                continue
+            summaries[record["sha256"]] = record["summary"]
+        except (ValueError, KeyError, TypeError):
+            continue  # A record cut short by the interruption
+
+    logger.info(f"Resuming from checkpoint {journal_file} with {len(summaries)} summaries")
+    return summaries
+
+
+class Checkpoint:
+    """
+    A journal of completed summaries, so an interrupted run resumes with only the remaining files.
+
+    Every summary is appended to the JSON Lines journal and fsynced as soon as it completes, keyed by the
+    SHA-256 of the summarized content. The journal starts with the summaries of the interrupted run and is
+    removed once the run completes.
+    """
+
+    def __init__(self, journal_file: Path, model: str, prompt: str, summaries: dict[str, str] | None = None):
+        self.journal_file = journal_file
+        self._summaries = dict(summaries or {})
+        self._lock = threading.Lock()
+        journal_file.parent.mkdir(parents=True, exist_ok=True)
+        # The journal is replaced atomically, so an interruption right now still leaves the previous one
+        tmp_journal_file = journal_file.with_name(f"{journal_file.name}.tmp")
+        with tmp_journal_file.open("w", encoding="utf-8") as f:
+            self._file = f
+            self._append(_get_header(model, prompt))
+            for content_hash, summary in self._summaries.items():
+                self._append({"sha256": content_hash, "summary": summary})
+            self._sync()
+        os.replace(tmp_journal_file, journal_file)
+        self._file = journal_file.open("a", encoding="utf-8")
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __contains__(self, content: str) -> bool:
+        return hash_content(content) in self._summaries
+
+    def wrap(self, summarize: Callable[[str], str | None]) -> Callable[[str], str | None]:
+        """
+        Wraps a summarize function, returning journaled summaries and journaling new ones.
+
+        Args:
+            summarize (Callable[[str], str | None]): Summarizes a content.
+
+        Returns:
+            Callable[[str], str | None]: Summarizes a content, through the journal.
+        """
+
+        def summarize_with_checkpoint(content: str) -> str | None:
+            content_hash = hash_content(content)
+            if (summary := self._summaries.get(content_hash)) is not None:
+                return summary
+            summary = summarize(content)
+            if summary is not None:
+                with self._lock:
+                    self._summaries[content_hash] = summary
+                    if not self._file.closed:
+                        self._append({"sha256": content_hash, "summary": summary})
+                        self._sync()
+            return summary
+
+        return summarize_with_checkpoint
+
+    def close(self) -> None:
+        """
+        Closes the journal, keeping it for the next run.
+        """
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def remove(self) -> None:
+        """
+        Closes and deletes the journal once the run it covers has completed.
+        """
+        self.close()
+        self.journal_file.unlink(missing_ok=True)
+
+    def _append(self, record: dict) -> None:
+        self._file.write(json.dumps(record) + "\n")
+
+    def _sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+
+def _get_header(model: str, prompt: str) -> dict:
+    return {"model": model, "prompt_sha256": hashlib.sha256(prompt.encode("utf-8")).hexdigest()}
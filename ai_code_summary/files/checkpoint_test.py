@@ -0,0 +1,75 @@
+from pathlib import Path
+from unittest.mock import Mock
+
+from ai_code_summary.files.checkpoint import Checkpoint, load_checkpoint
+from ai_code_summary.files.manifest import hash_content
+
+
+def test_checkpoint_round_trip(tmp_path: Path):
+    journal_file = tmp_path / "project.checkpoint.jsonl"
+
+    with Checkpoint(journal_file, "model", "prompt") as checkpoint:
+        summarize = checkpoint.wrap(lambda content: f"Summary of {content}")
+        assert summarize("a") == "Summary of a"
+
+    assert load_checkpoint(journal_file, "model", "prompt") == {hash_content("a"): "Summary of a"}
+    assert not (tmp_path / "project.checkpoint.jsonl.tmp").exists()
+
+
+def test_checkpoint_skips_journaled_content(tmp_path: Path):
+    journal_file = tmp_path / "project.checkpoint.jsonl"
+    inner = Mock(return_value="New summary")
+
+    with Checkpoint(journal_file, "model", "prompt", {hash_content("a"): "Summary of a"}) as checkpoint:
+        summarize = checkpoint.wrap(inner)
+        assert "a" in checkpoint
+        assert summarize("a") == "Summary of a"
+        assert summarize("b") == "New summary"
+
+    inner.assert_called_once_with("b")
+    assert load_checkpoint(journal_file, "model", "prompt") == {
+        hash_content("a"): "Summary of a",
+        hash_content("b"): "New summary",
+    }
+
+
+def test_checkpoint_does_not_journal_failed_summaries(tmp_path: Path):
+    journal_file = tmp_path / "project.checkpoint.jsonl"
+
+    with Checkpoint(journal_file, "model", "prompt") as checkpoint:
+        assert checkpoint.wrap(lambda content: None)("a") is None
+
+    assert load_checkpoint(journal_file, "model", "prompt") == {}
+
+
+def test_load_checkpoint_ignores_a_truncated_record(tmp_path: Path):
+    journal_file = tmp_path / "project.checkpoint.jsonl"
+    with Checkpoint(journal_file, "model", "prompt", {hash_content("a"): "Summary of a"}):
+        pass
+    with journal_file.open("a", encoding="utf-8") as f:
+        f.write('{"sha256": "cut')
+
+    assert load_checkpoint(journal_file, "model", "prompt") == {hash_content("a"): "Summary of a"}
+
+
+def test_load_checkpoint_ignores_another_model_or_prompt(tmp_path: Path):
+    journal_file = tmp_path / "project.checkpoint.jsonl"
+    with Checkpoint(journal_file, "model", "prompt", {hash_content("a"): "Summary of a"}):
+        pass
+
+    assert load_checkpoint(journal_file, "other model", "prompt") == {}
+    assert load_checkpoint(journal_file, "model", "other prompt") == {}
+
+
+def test_load_checkpoint_missing(tmp_path: Path):
+    assert load_checkpoint(tmp_path / "missing.checkpoint.jsonl", "model", "prompt") == {}
+
+
+def test_checkpoint_remove(tmp_path: Path):
+    journal_file = tmp_path / "project.checkpoint.jsonl"
+    checkpoint = Checkpoint(journal_file, "model", "prompt")
+
+    checkpoint.remove()
+
+    assert not journal_file.exists()
+    checkpoint.remove()  # Removing it again is a no-op
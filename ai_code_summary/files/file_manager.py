@@ -1,29 +1,37 @@
+import codecs
 import os
 import shutil
+from collections.abc import Callable, Iterable, Iterator
 from pathlib import Path
 from typing import List, Tuple
 
 import pathspec
 from loguru import logger
 
-# Set of recognized code file extensions
-_CODE_EXTENSIONS = {
-    ".c",
-    ".cpp",
-    ".cs",
-    ".css",
-    ".default",
-    ".html",
-    ".java",
-    ".js",
-    ".jsx",
-    ".md",
-    ".py",
-    ".toml",
-    ".ts",
-    ".tsx",
-    ".yml",
-    "Dockerfile",
+from ai_code_summary.code.gitignore_pathspec import GitignoreMatcher
+from ai_code_summary.code.structure import CodeStructure, extract_python_structure
+from ai_code_summary.env_variables import SUMMARY_MAX_LINE_LENGTH, SUMMARY_SKIP_FILE_BYTES, SUMMARY_TRUNCATE_FILE_BYTES
+from ai_code_summary.files.sniffing import sniff_file
+from ai_code_summary.metrics.stages import get_pipeline_metrics
+
+# Recognized code file extensions, mapped to the function extracting the structure of their files, if any
+_CODE_EXTENSIONS: dict[str, Callable[[str], CodeStructure | None] | None] = {
+    ".c": None,
+    ".cpp": None,
+    ".cs": None,
+    ".css": None,
+    ".default": None,
+    ".html": None,
+    ".java": None,
+    ".js": None,
+    ".jsx": None,
+    ".md": None,
+    ".py": extract_python_structure,
+    ".toml": None,
+    ".ts": None,
+    ".tsx": None,
+    ".yml": None,
+    "Dockerfile": None,
 }
 
 
@@ -31,87 +39,190 @@ def read_file(file_path: Path) -> Tuple[Path, str]:
     """
     Reads the content of a file.
 
+    The file is classified from its size and head first, see `sniff_file`. Binary, minified and oversized
+    files are skipped and get empty content, files above SUMMARY_TRUNCATE_FILE_BYTES are only read up to it.
+
     Args:
         file_path (Path): The path to the file to be read.
 
     Returns:
         Tuple[Path, str]: A tuple containing the file path and its content as a string.
     """
-    try:
-        with file_path.open("rb") as f:
-            content = f.read().decode("utf-8", errors="ignore")
-        logger.info(f"Read file {file_path}")
-    except (OSError, UnicodeDecodeError) as e:
-        logger.error(f"Error reading {file_path}: {e}")
-        content = ""
+    with get_pipeline_metrics().stage("read") as sample:
+        try:
+            size = file_path.stat().st_size
+            sniff = sniff_file(file_path, size, SUMMARY_SKIP_FILE_BYTES, SUMMARY_MAX_LINE_LENGTH)
+            if sniff.skip_reason:
+                logger.warning(f"Skipped {file_path}: {sniff.skip_reason}")
+                return file_path, ""
+
+            with file_path.open("rb") as f:
+                data = f.read(SUMMARY_TRUNCATE_FILE_BYTES)
+            truncated = size > len(data)
+            if truncated:
+                logger.warning(f"Truncated {file_path} to its first {len(data)} of {size} bytes")
+            # A multi-byte character cut by the truncation is dropped rather than replaced
+            decoder = codecs.getincrementaldecoder(sniff.encoding)(errors="replace")
+            content = decoder.decode(data, final=not truncated)
+            sample.bytes = len(data)
+            logger.info(f"Read file {file_path}")
+        except (OSError, ValueError) as e:
+            logger.error(f"Error reading {file_path}: {e}")
+            content = ""
     return file_path, content
 
 
-def clear_tmp_folder(tmp_dir: Path) -> None:
+def extract_structure(file_path: Path, content: str) -> CodeStructure | None:
     """
-    Clears the contents of a temporary directory and recreates it.
+    Extracts the structure of a code file with the extractor registered for its extension in `_CODE_EXTENSIONS`.
 
     Args:
-        tmp_dir (Path): The path to the temporary directory.
+        file_path (Path): The path to the file.
+        content (str): The content of the file.
+
+    Returns:
+        CodeStructure | None: The structure of the file, or None when its extension has no extractor or
+            its content cannot be parsed.
     """
-    if tmp_dir.exists() and tmp_dir.is_dir():
-        shutil.rmtree(tmp_dir)
-        logger.info(f"Cleared contents of {tmp_dir}")
-    tmp_dir.mkdir(parents=True, exist_ok=True)
-    logger.info(f"Created directory {tmp_dir}")
+    extractor = _CODE_EXTENSIONS.get(file_path.suffix)
+    return extractor(content) if extractor else None
 
 
-def get_code_files(directory: str, spec: pathspec.PathSpec) -> List[Path]:
+def is_same_or_parent_dir(directory: str | Path, other: str | Path) -> bool:
     """
-    Retrieves a list of code files in a directory, excluding those that match the given pathspec.
+    Checks whether a directory is another directory or one of its parents, once both are resolved.
+
+    Args:
+        directory (str | Path): The possible parent, e.g. an output directory.
+        other (str | Path): The possible child, e.g. the directory being summarized.
+
+    Returns:
+        bool: True if `other` is `directory` or lies below it.
+    """
+    directory, other = Path(directory).resolve(), Path(other).resolve()
+    return directory == other or directory in other.parents
+
+
+def clear_output_files(output_dir: Path, names: Iterable[str]) -> None:
+    """
+    Removes the files and directories a previous run wrote to an output directory, and creates it if needed.
+
+    Everything else in the directory, such as the markdown of the previous run that the new run replaces once
+    complete, is left untouched.
+
+    Args:
+        output_dir (Path): The output directory.
+        names (Iterable[str]): The names of the files and directories to remove.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for name in names:
+        path = output_dir / name
+        if path.is_dir() and not path.is_symlink():
+            shutil.rmtree(path)
+        elif path.exists() or path.is_symlink():
+            path.unlink()
+        else:
+            continue
+        logger.info(f"Removed {path} of the previous run")
+
+
+def get_code_files(
+    directory: str, spec: pathspec.PathSpec | None = None, exclude_gitignore_dirs: list[str] | None = None
+) -> List[Path]:
+    """
+    Retrieves a sorted list of code files in a directory, skipping everything ignored by .gitignore files.
+
+    The directory is walked in a single pass. Each directory's .gitignore is loaded when the walk enters it,
+    and ignored directories are pruned without being descended into.
 
     Args:
         directory (str): The directory to search for code files.
-        spec (pathspec.PathSpec): The pathspec to filter out files.
+        spec (pathspec.PathSpec | None): Extra patterns, relative to `directory`, to filter out files.
+        exclude_gitignore_dirs (list[str] | None): Directories whose .gitignore files are not loaded.
 
     Returns:
         List[Path]: A list of paths to the code files.
     """
-    base_dir = Path(directory)
+    with get_pipeline_metrics().stage("walk") as sample:
+        code_files = _walk_code_files(directory, spec, set(exclude_gitignore_dirs or []))
+        sample.count = len(code_files)
 
-    # Recursively collect all files in the directory
-    all_files = [Path(root) / file for root, _, files in os.walk(base_dir) for file in files]
+    logger.info(f"Found {len(code_files)} code files in {directory}")
+    return sorted(code_files)
 
-    # Filter files to include only code files
-    code_files = [file for file in all_files if _is_code_file(file)]
-    # Further filter files based on the pathspec
-    filtered_files = [file for file in code_files if not spec.match_file(file.relative_to(base_dir))]
 
-    logger.info(f"Found {len(filtered_files)} code files in {directory}")
-    return filtered_files
+def _walk_code_files(directory: str, spec: pathspec.PathSpec | None, exclude_gitignore_dirs: set[str]) -> list[Path]:
+    """
+    Walks a directory in a single pass, collecting the code files that are not ignored.
 
+    Args:
+        directory (str): The directory to search for code files.
+        spec (pathspec.PathSpec | None): Extra patterns, relative to `directory`, to filter out files.
+        exclude_gitignore_dirs (set[str]): Directories whose .gitignore files are not loaded.
 
-def _is_code_file(file: Path) -> bool:
+    Returns:
+        list[Path]: The paths to the code files, in walk order.
+    """
+    matcher = GitignoreMatcher(spec)
+    code_files = []
+
+    pending_dirs = [(Path(directory), "", False)]
+    while pending_dirs:
+        dir_path, relative_dir, is_gitignore_excluded = pending_dirs.pop()
+        gitignore_file = dir_path / ".gitignore"
+        if not is_gitignore_excluded and gitignore_file.is_file():
+            matcher.add_gitignore(relative_dir, gitignore_file)
+
+        try:
+            with os.scandir(dir_path) as scandir_iterator:
+                entries = list(scandir_iterator)
+        except OSError as e:
+            logger.error(f"Error listing {dir_path}: {e}")
+            continue
+
+        for entry in entries:
+            relative_path = f"{relative_dir}{entry.name}"
+            if entry.is_dir(follow_symlinks=False):
+                # Ignored directories are pruned, git never re-includes files below them
+                if entry.name != ".git" and not matcher.is_ignored(relative_path, is_dir=True):
+                    excluded = is_gitignore_excluded or entry.name in exclude_gitignore_dirs
+                    pending_dirs.append((Path(entry.path), f"{relative_path}/", excluded))
+            elif _is_code_file_name(entry.name) and entry.is_file() and not matcher.is_ignored(relative_path):
+                code_files.append(Path(entry.path))
+
+    return code_files
+
+
+def _is_code_file_name(name: str) -> bool:
     """
-    Checks if a file is a code file based on its extension or name.
+    Checks if a file name belongs to a code file, without building a Path.
 
     Args:
-        file (Path): The file to check.
+        name (str): The name of the file.
 
     Returns:
         bool: True if the file is a code file, False otherwise.
     """
-    return file.suffix in _CODE_EXTENSIONS or file.name == "Dockerfile"
+    return os.path.splitext(name)[1] in _CODE_EXTENSIONS or name == "Dockerfile"
 
 
-def write_files_to_tmp_directory(directory: str, spec: List[str], base_dir: Path, output_temp_code_dir: Path) -> None:
+def mirror_file_contents(
+    file_contents: Iterable[tuple[Path, str]], base_dir: Path, output_dir: Path
+) -> Iterator[tuple[Path, str]]:
     """
-    Writes code files from a directory to a temporary directory, maintaining the directory structure.
+    Writes already read files to a directory as they stream past, maintaining the directory structure.
 
     Args:
-        directory (str): The directory to search for code files.
-        spec (List[str]): The pathspec to filter out files.
+        file_contents (Iterable[tuple[Path, str]]): Tuples containing file paths and their contents.
         base_dir (Path): The base directory to calculate relative paths.
-        output_temp_code_dir (Path): The directory where the files will be written.
+        output_dir (Path): The directory where the files will be written.
+
+    Yields:
+        tuple[Path, str]: Each file path and its content, unchanged.
     """
-    code_files = get_code_files(directory, spec)
-    file_contents = [read_file(file_path) for file_path in code_files]
-    [_write_file(file_info, base_dir, output_temp_code_dir) for file_info in file_contents]
+    for file_info in file_contents:
+        _write_file(file_info, base_dir, output_dir)
+        yield file_info
 
 
 def _write_file(file_info: Tuple[Path, str], base_dir: Path, output_dir: Path) -> None:
@@ -125,11 +236,12 @@ def _write_file(file_info: Tuple[Path, str], base_dir: Path, output_dir: Path) -
     """
     file_path, content = file_info
 
-    # Calculate the relative path to maintain directory structure
+    # Keep the full relative path so files with the same name in different directories do not collide
     relative_path = file_path.relative_to(base_dir)
-    output_file = output_dir / relative_path.name
-
-    with output_file.open("w", encoding="utf-8") as f:
-        f.write(content)
+    output_file = output_dir / relative_path
+    with get_pipeline_metrics().stage("tmp_write") as sample:
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        with output_file.open("w", encoding="utf-8") as f:
+            sample.bytes = f.write(content)
 
     logger.info(f"Wrote file {output_file}")
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 from unittest.mock import patch
 
@@ -6,10 +7,11 @@ from pathspec import PathSpec
 
 from ai_code_summary.files.file_manager import (
     _write_file,
-    clear_tmp_folder,
+    clear_output_files,
     get_code_files,
+    is_same_or_parent_dir,
+    mirror_file_contents,
     read_file,
-    write_files_to_tmp_directory,
 )
 
 
@@ -38,15 +40,57 @@ def test_read_file_nonexistent():
     assert content == ""
 
 
-def test_clear_tmp_folder(tmp_dir: Path):
-    tmp_dir.mkdir(parents=True, exist_ok=True)
-    (tmp_dir / "test.txt").write_text("Temporary file", encoding="utf-8")
+def test_read_file_skips_binary_files(tmp_path: Path):
+    test_file = tmp_path / "logo.md"
+    test_file.write_bytes(b"\x89PNG\r\n\x1a\n\0\0\0\rIHDR")
 
-    clear_tmp_folder(tmp_dir)
+    assert read_file(test_file) == (test_file, "")
 
-    assert tmp_dir.exists()
-    assert tmp_dir.is_dir()
-    assert not any(tmp_dir.iterdir())
+
+def test_read_file_decodes_latin1_files(tmp_path: Path):
+    test_file = tmp_path / "legacy.py"
+    test_file.write_bytes("name = 'café'".encode("latin-1"))
+
+    assert read_file(test_file) == (test_file, "name = 'café'")
+
+
+def test_read_file_truncates_large_files(tmp_path: Path):
+    test_file = tmp_path / "data.md"
+    test_file.write_text("é\n" * 100, encoding="utf-8")
+
+    with patch("ai_code_summary.files.file_manager.SUMMARY_TRUNCATE_FILE_BYTES", 10):
+        _, content = read_file(test_file)
+
+    assert content == "é\né\né\n"  # The fourth "é" is cut in half and dropped
+
+
+def test_read_file_skips_files_above_the_size_limit(tmp_path: Path):
+    test_file = tmp_path / "dump.md"
+    test_file.write_text("line\n" * 100)
+
+    with patch("ai_code_summary.files.file_manager.SUMMARY_SKIP_FILE_BYTES", 100):
+        assert read_file(test_file) == (test_file, "")
+
+
+def test_is_same_or_parent_dir(tmp_path: Path):
+    assert is_same_or_parent_dir(tmp_path, tmp_path / "repo" / ".." / "repo")
+    assert is_same_or_parent_dir(tmp_path, tmp_path / "repo")
+    assert not is_same_or_parent_dir(tmp_path / "repo" / "tmp", tmp_path / "repo")
+    assert not is_same_or_parent_dir(tmp_path / "rep", tmp_path / "repo")
+
+
+def test_clear_output_files(tmp_path: Path):
+    output_dir = tmp_path / "out"
+    (output_dir / "code" / "pkg").mkdir(parents=True)
+    (output_dir / "code" / "pkg" / "a.py").write_text("a = 1")
+    (output_dir / "repo.index.json").write_text("{}")
+    (output_dir / "repo.md").write_text("# repo")
+
+    clear_output_files(output_dir, ["code", "repo.index.json", "repo.shards"])
+
+    assert [path.name for path in output_dir.iterdir()] == ["repo.md"]
+    clear_output_files(tmp_path / "new", ["code"])
+    assert (tmp_path / "new").is_dir()
 
 
 def test_get_code_files(tmp_path: Path):
@@ -59,38 +103,55 @@ def test_get_code_files(tmp_path: Path):
     (tmp_path / "subdir").mkdir()
     (tmp_path / "subdir" / "test.js").write_text("console.log('Hello, world!')")
 
-    # Mock os.walk to control the directory structure
-    with patch("os.walk") as mock_walk:
-        mock_walk.return_value = [
-            (str(tmp_path), [], ["test.py", "test.ignore"]),
-            (str(tmp_path / "subdir"), [], ["test.js"]),
-        ]
+    result = get_code_files(str(tmp_path), spec)
+
+    expected_files = [tmp_path / "subdir" / "test.js", tmp_path / "test.py"]
+    assert result == expected_files
+
 
-        result = get_code_files(str(tmp_path), spec)
+def test_get_code_files_anchors_gitignore_to_its_directory(tmp_path: Path):
+    (tmp_path / ".gitignore").write_text("generated.py\n")
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / ".gitignore").write_text("/local.py\n*.ts\n!keep.ts\n")
+    for relative_path in ["main.py", "generated.py", "local.py", "app.ts", "pkg/local.py", "pkg/app.ts", "pkg/keep.ts"]:
+        (tmp_path / relative_path).write_text("code")
+    (tmp_path / "pkg" / "nested").mkdir()
+    (tmp_path / "pkg" / "nested" / "generated.py").write_text("code")
+    (tmp_path / "pkg" / "nested" / "local.py").write_text("code")
 
-    expected_files = {tmp_path / "test.py", tmp_path / "subdir" / "test.js"}
-    assert set(result) == expected_files
+    result = get_code_files(str(tmp_path))
 
+    assert [file.relative_to(tmp_path).as_posix() for file in result] == [
+        "app.ts",
+        "local.py",
+        "main.py",
+        "pkg/keep.ts",
+        "pkg/nested/local.py",
+    ]
 
-@patch("ai_code_summary.files.file_manager.get_code_files")
-@patch("ai_code_summary.files.file_manager.read_file")
-@patch("ai_code_summary.files.file_manager._write_file")
-def test_write_files_to_tmp_directory(mock_write_file, mock_read_file, mock_get_code_files):
-    directory = "test_directory"
-    spec = ["*.py"]
-    base_dir = Path("base_dir")
-    output_temp_code_dir = Path("output_temp_code_dir")
 
-    mock_get_code_files.return_value = [Path("file1.py"), Path("file2.py")]
-    mock_read_file.side_effect = [(Path("file1.py"), "content1"), (Path("file2.py"), "content2")]
+def test_get_code_files_prunes_ignored_directories(tmp_path: Path):
+    (tmp_path / ".gitignore").write_text("node_modules/\n")
+    (tmp_path / "node_modules" / "package").mkdir(parents=True)
+    (tmp_path / "node_modules" / "package" / "index.js").write_text("code")
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".git" / "config.toml").write_text("code")
+    (tmp_path / "index.js").write_text("code")
 
-    write_files_to_tmp_directory(directory, spec, base_dir, output_temp_code_dir)
+    with patch("ai_code_summary.files.file_manager.os.scandir", wraps=os.scandir) as mock_scandir:
+        result = get_code_files(str(tmp_path))
 
-    mock_get_code_files.assert_called_once_with(directory, spec)
-    assert mock_read_file.call_count == 2
-    assert mock_write_file.call_count == 2
-    mock_write_file.assert_any_call((Path("file1.py"), "content1"), base_dir, output_temp_code_dir)
-    mock_write_file.assert_any_call((Path("file2.py"), "content2"), base_dir, output_temp_code_dir)
+    assert result == [tmp_path / "index.js"]
+    assert [Path(call.args[0]) for call in mock_scandir.call_args_list] == [tmp_path]
+
+
+def test_get_code_files_skips_gitignore_of_excluded_dirs(tmp_path: Path):
+    (tmp_path / ".venv").mkdir()
+    (tmp_path / ".venv" / ".gitignore").write_text("*\n")
+    (tmp_path / ".venv" / "site.py").write_text("code")
+
+    assert get_code_files(str(tmp_path)) == []
+    assert get_code_files(str(tmp_path), exclude_gitignore_dirs=[".venv"]) == [tmp_path / ".venv" / "site.py"]
 
 
 def test_write_file(tmp_path: Path):
@@ -108,3 +169,28 @@ def test_write_file(tmp_path: Path):
     output_file = output_dir / "test.txt"
     assert output_file.exists()
     assert output_file.read_text() == test_content
+
+
+def test_write_file_keeps_relative_path(tmp_path: Path):
+    base_dir = tmp_path / "base"
+    output_dir = tmp_path / "output"
+    output_dir.mkdir()
+
+    _write_file((base_dir / "a" / "__init__.py", "a"), base_dir, output_dir)
+    _write_file((base_dir / "b" / "__init__.py", "b"), base_dir, output_dir)
+
+    assert (output_dir / "a" / "__init__.py").read_text() == "a"
+    assert (output_dir / "b" / "__init__.py").read_text() == "b"
+
+
+def test_mirror_file_contents(tmp_path: Path):
+    base_dir = tmp_path / "base"
+    output_dir = tmp_path / "output"
+    file_contents = [(base_dir / "a.py", "a"), (base_dir / "sub" / "b.py", "b")]
+
+    mirrored = mirror_file_contents(iter(file_contents), base_dir, output_dir)
+
+    assert not output_dir.exists()  # Nothing is written until the files are consumed
+    assert list(mirrored) == file_contents
+    assert (output_dir / "a.py").read_text() == "a"
+    assert (output_dir / "sub" / "b.py").read_text() == "b"
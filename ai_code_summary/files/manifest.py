@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from loguru import logger
+
+
+@dataclass
+class ManifestEntry:
+    """
+    The state of a single file as of the previous run.
+
+    `offset` and `length` locate the file's section in the generated markdown, in bytes. `summary_length` is the
+    size of the summary in the section, in bytes, None when the summary failed or is unknown.
+    """
+
+    size: int
+    mtime_ns: int
+    sha256: str
+    offset: int = 0
+    length: int = 0
+    summary_length: int | None = None
+
+
+@dataclass
+class Manifest:
+    """
+    The files summarized by the previous run, keyed by their POSIX path relative to the summarized directory.
+    """
+
+    commit: str | None = None
+    files: dict[str, ManifestEntry] = field(default_factory=dict)
+
+
+def hash_content(content: str) -> str:
+    """
+    Hashes file content for change detection.
+
+    Args:
+        content (str): The file content.
+
+    Returns:
+        str: The SHA-256 hex digest of the content.
+    """
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def load_manifest(manifest_file: Path) -> Manifest | None:
+    """
+    Loads a manifest written by a previous run.
+
+    Args:
+        manifest_file (Path): The path to the manifest file.
+
+    Returns:
+        Manifest | None: The manifest, or None when it is missing or unreadable.
+    """
+    try:
+        data = json.loads(manifest_file.read_text(encoding="utf-8"))
+        manifest = Manifest(
+            commit=data.get("commit"),
+            files={path: ManifestEntry(**entry) for path, entry in data["files"].items()},
+        )
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Ignoring unreadable manifest {manifest_file}: {e}")
+        return None
+
+    logger.info(f"Loaded manifest {manifest_file} with {len(manifest.files)} files")
+    return manifest
+
+
+def save_manifest(manifest_file: Path, manifest: Manifest) -> None:
+    """
+    Atomically writes a manifest for the next run.
+
+    Args:
+        manifest_file (Path): The path to the manifest file.
+        manifest (Manifest): The manifest to write.
+    """
+    tmp_manifest_file = manifest_file.with_name(f"{manifest_file.name}.tmp")
+    tmp_manifest_file.write_text(json.dumps(asdict(manifest), indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp_manifest_file, manifest_file)
+    logger.info(f"Wrote manifest {manifest_file} with {len(manifest.files)} files")
@@ -0,0 +1,27 @@
+from pathlib import Path
+
+from ai_code_summary.files.manifest import Manifest, ManifestEntry, hash_content, load_manifest, save_manifest
+
+
+def test_save_and_load_manifest(tmp_path: Path):
+    manifest_file = tmp_path / "project.manifest.json"
+    manifest = Manifest(
+        commit="abc123",
+        files={"src/main.py": ManifestEntry(size=10, mtime_ns=1, sha256=hash_content("content"), offset=5, length=7)},
+    )
+
+    save_manifest(manifest_file, manifest)
+
+    assert load_manifest(manifest_file) == manifest
+    assert not (tmp_path / "project.manifest.json.tmp").exists()
+
+
+def test_load_manifest_missing(tmp_path: Path):
+    assert load_manifest(tmp_path / "missing.manifest.json") is None
+
+
+def test_load_manifest_unreadable(tmp_path: Path):
+    manifest_file = tmp_path / "project.manifest.json"
+    manifest_file.write_text("{not json")
+
+    assert load_manifest(manifest_file) is None
@@ -0,0 +1,71 @@
+import codecs
+import mmap
+from dataclasses import dataclass
+from pathlib import Path
+
+# Bytes of the file head inspected before deciding whether to read the whole file
+_SNIFF_BYTES = 64 * 1024
+# Share of control characters above which a file is treated as binary
+_MAX_CONTROL_RATIO = 0.3
+_CONTROL_BYTES = bytes(byte for byte in range(0x20) if byte not in b"\t\n\r\f\b\x1b")
+
+
+@dataclass(frozen=True)
+class FileSniff:
+    """
+    What the size and the head of a file tell about it, before it is read.
+
+    `skip_reason` is set when the file should not be read at all, otherwise `encoding` decodes its content.
+    """
+
+    encoding: str = "utf-8"
+    skip_reason: str | None = None
+
+
+def sniff_file(file_path: Path, size: int, max_bytes: int, max_line_length: int) -> FileSniff:
+    """
+    Classifies a file from its size and a memory-mapped sample of its head, without reading it in full.
+
+    Files above `max_bytes` are skipped without being opened. Files whose head contains NUL bytes or mostly
+    control characters are binary, and files whose head has an average line length above `max_line_length`
+    are minified or generated. The encoding is taken from a byte order mark, then UTF-8 when the head decodes
+    as UTF-8, and Latin-1 otherwise, which decodes any byte.
+
+    Args:
+        file_path (Path): The path to the file.
+        size (int): The size of the file in bytes.
+        max_bytes (int): The size above which the file is skipped.
+        max_line_length (int): The average line length above which the file is skipped.
+
+    Returns:
+        FileSniff: The encoding of the file, or the reason to skip it.
+
+    Raises:
+        OSError: If the file cannot be opened or mapped.
+    """
+    if size > max_bytes:
+        return FileSniff(skip_reason=f"larger than {max_bytes} bytes")
+    if size == 0:
+        return FileSniff()
+
+    with file_path.open("rb") as f, mmap.mmap(f.fileno(), min(size, _SNIFF_BYTES), access=mmap.ACCESS_READ) as head:
+        sample = head[:]
+
+    if sample.startswith(codecs.BOM_UTF8):
+        return FileSniff(encoding="utf-8-sig")
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return FileSniff(encoding="utf-16")
+    if b"\0" in sample:
+        return FileSniff(skip_reason="binary content")
+    control_bytes = len(sample) - len(sample.translate(None, _CONTROL_BYTES))
+    if control_bytes > _MAX_CONTROL_RATIO * len(sample):
+        return FileSniff(skip_reason="binary content")
+    if len(sample) / (sample.count(b"\n") + 1) > max_line_length:
+        return FileSniff(skip_reason=f"average line length above {max_line_length}, likely minified")
+
+    try:
+        # A multi-byte character cut at the end of the sample is not an error
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=len(sample) == size)
+    except UnicodeDecodeError:
+        return FileSniff(encoding="latin-1")
+    return FileSniff()
@@ -0,0 +1,65 @@
+import codecs
+from pathlib import Path
+
+import pytest
+
+from ai_code_summary.files.sniffing import FileSniff, sniff_file
+
+
+def _sniff(file_path: Path, max_bytes: int = 1_000_000, max_line_length: int = 1_000) -> FileSniff:
+    return sniff_file(file_path, file_path.stat().st_size, max_bytes, max_line_length)
+
+
+def test_sniff_file_utf8(tmp_path: Path):
+    file_path = tmp_path / "main.py"
+    file_path.write_text("print('héllo')\n", encoding="utf-8")
+
+    assert _sniff(file_path) == FileSniff(encoding="utf-8")
+
+
+def test_sniff_file_empty(tmp_path: Path):
+    file_path = tmp_path / "__init__.py"
+    file_path.touch()
+
+    assert _sniff(file_path) == FileSniff()
+
+
+def test_sniff_file_skips_large_files_without_opening_them(tmp_path: Path):
+    assert sniff_file(tmp_path / "missing.md", 300_000_000, 1_000_000, 1_000).skip_reason == "larger than 1000000 bytes"
+
+
+@pytest.mark.parametrize("data", [b"\x89PNG\r\n\x1a\n\0\0\0\rIHDR", bytes(range(1, 32)) * 10])
+def test_sniff_file_skips_binary_files(tmp_path: Path, data: bytes):
+    file_path = tmp_path / "image.md"
+    file_path.write_bytes(data)
+
+    assert _sniff(file_path).skip_reason == "binary content"
+
+
+def test_sniff_file_skips_minified_files(tmp_path: Path):
+    file_path = tmp_path / "bundle.js"
+    file_path.write_text("var a=1;" * 500 + "\n" + "var b=2;" * 500)
+
+    assert _sniff(file_path, max_line_length=1_000).skip_reason == "average line length above 1000, likely minified"
+
+
+@pytest.mark.parametrize(
+    ("data", "encoding"),
+    [
+        (codecs.BOM_UTF8 + b"x = 1\n", "utf-8-sig"),
+        ("x = 'é'\n".encode("utf-16"), "utf-16"),
+        ("x = 'é'\n".encode("latin-1"), "latin-1"),
+    ],
+)
+def test_sniff_file_encodings(tmp_path: Path, data: bytes, encoding: str):
+    file_path = tmp_path / "main.py"
+    file_path.write_bytes(data)
+
+    assert _sniff(file_path).encoding == encoding
+
+
+def test_sniff_file_accepts_a_character_cut_by_the_sample(tmp_path: Path):
+    file_path = tmp_path / "README.md"
+    file_path.write_bytes(b"a\n" * 32767 + b"\xc3\xa9" * 10)  # The sample ends inside an "é"
+
+    assert _sniff(file_path, max_line_length=1_000) == FileSniff(encoding="utf-8")
@@ -1,93 +1,370 @@
 import os
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Tuple
+from typing import TextIO, Tuple
 
-import pathspec
 from loguru import logger
 
-from ai_code_summary.ai.summary import summarize_content
-from ai_code_summary.code.gitignore_pathspec import load_gitignore_patterns
-from ai_code_summary.files.file_manager import clear_tmp_folder, get_code_files, read_file, write_files_to_tmp_directory
+from ai_code_summary.ai.plan import plan_summaries, write_plan_report
+from ai_code_summary.ai.rollup import summarize_directories
+from ai_code_summary.ai.summarizer import build_summarizer
+from ai_code_summary.ai.summary import (
+    get_summary_backend,
+    get_summary_cache,
+    summarize_in_order,
+)
+from ai_code_summary.env_variables import (
+    SUMMARY_CONCURRENCY,
+    SUMMARY_PROMPT,
+    SUMMARY_SHARD_MAX_BYTES,
+    SUMMARY_WINDOW,
+)
+from ai_code_summary.files.checkpoint import Checkpoint, load_checkpoint
+from ai_code_summary.files.file_manager import (
+    clear_output_files,
+    get_code_files,
+    is_same_or_parent_dir,
+    mirror_file_contents,
+    read_file,
+)
+from ai_code_summary.markdown.incremental import update_markdown
+from ai_code_summary.markdown.sections import format_markdown_section, format_overview
+from ai_code_summary.markdown.shards import ShardedMarkdownWriter
+from ai_code_summary.metrics.stages import get_pipeline_metrics, write_metrics_report
 
 _EXCLUDE_GITIGNORE_DIRS = [".venv", ".pytest_cache", ".ruff_cache"]
 
 
-def create_markdown_from_code(directory: str, exclude_gitignore_dirs: list[str] = _EXCLUDE_GITIGNORE_DIRS) -> None:
+def create_markdown_from_code(
+    directory: str,
+    exclude_gitignore_dirs: list[str] = _EXCLUDE_GITIGNORE_DIRS,
+    concurrency: int = SUMMARY_CONCURRENCY,
+    incremental: bool = False,
+    write_tmp_code: bool = False,
+    batch: bool = False,
+    output_dir: str | Path = "./tmp",
+    deduplicate: bool = False,
+    sharded: bool = False,
+    rollup: bool = False,
+    pack: bool = False,
+    plan: bool = False,
+) -> None:
     """
     Creates a markdown file summarizing the code in the given directory.
 
+    The markdown is written to `<output_dir>/<directory name>.md`, replacing the markdown of the previous run once
+    complete. Non-incremental runs first remove the mirrored code, shards and overview of the previous run, every
+    other file of `output_dir` is left in place.
+
     Args:
         directory (str): The directory containing the code to summarize.
+        exclude_gitignore_dirs (list[str]): Directories whose .gitignore files are not loaded.
+        concurrency (int): The maximum number of summary requests kept in flight at once, capped by the
+            concurrency of the summary backend.
+        incremental (bool): Patch the markdown of the previous run, re-summarizing only changed files.
+        write_tmp_code (bool): Also mirror the summarized files into `<output_dir>/code` for inspection.
+        batch (bool): Summarize all files through the OpenAI Batch API, trading latency for cost and throughput.
+            Combined with `incremental`, only the changed files go into the batch.
+        output_dir (str | Path): The directory receiving the markdown, the manifest and the mirrored code.
+        deduplicate (bool): Summarize exact and near-duplicate files once, sharing the summary of the first file
+            of each group with the others.
+        sharded (bool): Write the markdown as shards of at most SUMMARY_SHARD_MAX_BYTES per top-level directory
+            into `<output_dir>/<directory name>.shards/`, indexed by `<output_dir>/<directory name>.index.json`,
+            instead of a single file. Not supported by incremental runs.
+        rollup (bool): Also summarize every directory from its files and subdirectories, and the repository from
+            its top level, into `<output_dir>/<directory name>.overview.md`.
+        pack (bool): Summarize small files several at a time, up to SUMMARY_PACK_TOKENS per request. Not supported
+            by batch runs.
+        plan (bool): Only estimate the run, without any summary request or change to `output_dir` other than
+            writing the plan to `<output_dir>/<directory name>.plan.json`, see `plan_summaries`. Not supported by
+            incremental runs.
 
     Returns:
         None
+
+    Raises:
+        ValueError: If `output_dir` is or contains `directory`, if `sharded` or `plan` is combined with `incremental`, or `pack` with `batch`, or if the
+            summary backend does not support `batch` or `pack`.
     """
+    if is_same_or_parent_dir(output_dir, directory):
+        raise ValueError(f"The output directory {output_dir} must not contain the summarized directory {directory}")
+    if sharded and incremental:
+        raise ValueError("Incremental runs patch a single markdown file and cannot write shards")
+    if plan and incremental:
+        raise ValueError("Plans estimate full runs and cannot be combined with incremental runs")
+    if pack and batch:
+        raise ValueError("Batch runs send one request per file and cannot pack files")
+    backend = get_summary_backend()
+    if batch and not backend.supports_batch:
+        raise ValueError(f"The {backend.name} summary backend does not support batch runs")
+    if pack and not backend.supports_packing:
+        raise ValueError(f"The {backend.name} summary backend cannot pack files")
+    concurrency = min(concurrency, backend.concurrency)
+
     logger.info("Script started")
+    metrics = get_pipeline_metrics()
+    metrics.reset()
 
     base_dir = Path(directory)
-
-    output_temp_dir = Path("./tmp")
-    clear_tmp_folder(output_temp_dir)
-
-    output_temp_code_dir = output_temp_dir / "code"
-    output_temp_code_dir.mkdir(parents=True, exist_ok=True)
-
-    # Load gitignore patterns to exclude certain files
-    spec = load_gitignore_patterns(directory, exclude_gitignore_dirs)
     base_dir_name = base_dir.name if base_dir.name else os.path.basename(os.getcwd())
+
+    output_temp_dir = Path(output_dir)
     output_markdown_file_name = output_temp_dir / f"{base_dir_name}.md"
 
-    write_files_to_tmp_directory(directory, spec, base_dir, output_temp_code_dir)
+    # Summaries completed by an interrupted run are kept in the checkpoint journal
+    journal_file = output_temp_dir / f"{base_dir_name}.checkpoint.jsonl"
+    previous_summaries = load_checkpoint(journal_file, backend.name, SUMMARY_PROMPT)
+    if plan:
+        code_files = get_code_files(directory, exclude_gitignore_dirs=exclude_gitignore_dirs)
+        report = plan_summaries(
+            (read_file(file_path) for file_path in code_files),
+            base_dir,
+            backend,
+            concurrency,
+            batch=batch,
+            deduplicate=deduplicate,
+            pack=pack,
+            rollup=rollup,
+            checkpoint_summaries=previous_summaries,
+        )
+        write_plan_report(output_temp_dir / f"{base_dir_name}.plan.json", report)
+        return
+    if incremental:
+        output_temp_dir.mkdir(parents=True, exist_ok=True)
+    else:
+        # The markdown of the previous run stays in place until the new one replaces it, see `_write_markdown`
+        clear_output_files(
+            output_temp_dir,
+            ["code", f"{base_dir_name}.shards", f"{base_dir_name}.index.json", f"{base_dir_name}.overview.md"],
+        )
 
-    code_files = get_code_files(output_temp_code_dir, pathspec.PathSpec([]))
-    file_contents = [read_file(file_path) for file_path in code_files]
+    try:
+        with Checkpoint(journal_file, backend.name, SUMMARY_PROMPT, previous_summaries) as checkpoint:
+            if incremental:
+                manifest_file_name = output_temp_dir / f"{base_dir_name}.manifest.json"
+                file_summaries = update_markdown(
+                    directory,
+                    exclude_gitignore_dirs,
+                    base_dir_name,
+                    output_markdown_file_name,
+                    manifest_file_name,
+                    concurrency,
+                    batch=batch,
+                    deduplicate=deduplicate,
+                    checkpoint=checkpoint,
+                    pack=pack,
+                )
+            else:
+                file_summaries = _summarize_repository(
+                    base_dir,
+                    base_dir_name,
+                    output_temp_dir,
+                    exclude_gitignore_dirs,
+                    concurrency,
+                    write_tmp_code,
+                    batch,
+                    deduplicate,
+                    sharded,
+                    pack,
+                    checkpoint,
+                )
+    except KeyboardInterrupt:
+        logger.warning(f"Interrupted, the completed summaries are kept in {journal_file} for the next run")
+        raise
+    checkpoint.remove()
 
-    _write_markdown(output_temp_code_dir, base_dir_name, output_markdown_file_name, file_contents)
+    if rollup:
+        directory_summaries = summarize_directories(file_summaries, base_dir_name, concurrency)
+        overview_file_name = output_temp_dir / f"{base_dir_name}.overview.md"
+        overview_file_name.write_text(format_overview(base_dir_name, directory_summaries), encoding="utf-8")
+        logger.info(f"Wrote repository overview to {overview_file_name}")
+
+    if summary_cache := get_summary_cache():
+        logger.info(f"Summary cache stats: {summary_cache.stats()}")
+    write_metrics_report(output_temp_dir / f"{base_dir_name}.metrics.json", metrics.report())
     logger.info("Script finished")
 
 
-def _write_markdown(base_dir: Path, base_dir_name: str, output_markdown_file_name: Path, file_contents: list) -> None:
+def _summarize_repository(
+    base_dir: Path,
+    base_dir_name: str,
+    output_temp_dir: Path,
+    exclude_gitignore_dirs: list[str],
+    concurrency: int,
+    write_tmp_code: bool,
+    batch: bool,
+    deduplicate: bool,
+    sharded: bool,
+    pack: bool,
+    checkpoint: Checkpoint,
+) -> dict[str, str | None]:
     """
-    Writes the markdown summary for the given code files.
+    Summarizes every code file of a repository into a new markdown file or new shards.
+
+    Summaries found in the checkpoint journal are reused, and new ones are journaled as they complete.
+
+    Args:
+        base_dir (Path): The directory containing the code to summarize.
+        base_dir_name (str): The name of the base directory.
+        output_temp_dir (Path): The directory receiving the markdown and the mirrored code.
+        exclude_gitignore_dirs (list[str]): Directories whose .gitignore files are not loaded.
+        concurrency (int): The maximum number of summary requests kept in flight at once.
+        write_tmp_code (bool): Also mirror the summarized files into `<output_temp_dir>/code`.
+        batch (bool): Summarize the files through the OpenAI Batch API.
+        deduplicate (bool): Summarize exact and near-duplicate files once.
+        sharded (bool): Write the markdown as indexed shards.
+        pack (bool): Summarize small files several at a time.
+        checkpoint (Checkpoint): The journal of completed summaries.
+
+    Returns:
+        dict[str, str | None]: The summary of each file keyed by its POSIX path relative to `base_dir`.
+    """
+    # Each source file is read exactly once, straight from the source tree, and only when the
+    # summarization window has room for it
+    code_files = get_code_files(str(base_dir), exclude_gitignore_dirs=exclude_gitignore_dirs)
+    file_contents = (read_file(file_path) for file_path in code_files)
+
+    if write_tmp_code:
+        file_contents = mirror_file_contents(file_contents, base_dir, output_temp_dir / "code")
+
+    if batch or deduplicate or pack:
+        # The batch, the duplicate groups and the packs need every file up front, so all files are read first
+        file_contents = [file_info for file_info in file_contents if file_info[1]]
+    summarize = build_summarizer(file_contents, base_dir, checkpoint, batch=batch, pack=pack, deduplicate=deduplicate)
+
+    if sharded:
+        return _write_markdown_shards(
+            base_dir,
+            base_dir_name,
+            output_temp_dir / f"{base_dir_name}.shards",
+            output_temp_dir / f"{base_dir_name}.index.json",
+            file_contents,
+            concurrency,
+            summarize=summarize,
+        )
+    return _write_markdown(
+        base_dir,
+        base_dir_name,
+        output_temp_dir / f"{base_dir_name}.md",
+        file_contents,
+        concurrency,
+        summarize=summarize,
+    )
+
+
+def _write_markdown(
+    base_dir: Path,
+    base_dir_name: str,
+    output_markdown_file_name: Path,
+    file_contents: Iterable[tuple[Path, str]],
+    concurrency: int = SUMMARY_CONCURRENCY,
+    window: int = SUMMARY_WINDOW,
+    summarize: Callable[[str], str | None] | None = None,
+) -> dict[str, str | None]:
+    """
+    Writes the markdown summary for the given code files through a single buffered file handle.
+
+    The markdown is written to a temporary file that replaces `output_markdown_file_name` once complete.
+
+    Summaries are requested concurrently, but sections are written in the order of `file_contents`
+    regardless of which request finishes first. `file_contents` is consumed lazily, so at most `window`
+    files are held in memory at once.
 
     Args:
         base_dir (Path): The base directory of the code files.
         base_dir_name (str): The name of the base directory.
         output_markdown_file_name (Path): The path to the output markdown file.
-        file_contents (list): A list of tuples containing file paths and their contents.
+        file_contents (Iterable[tuple[Path, str]]): Tuples containing file paths and their contents.
+        concurrency (int): The maximum number of summary requests kept in flight at once.
+        window (int): The maximum number of files read ahead of the section being written.
+        summarize (Callable[[str], str | None] | None): Summarizes a file's content.
+            Defaults to `try_summarize_content`.
 
     Returns:
-        None
+        dict[str, str | None]: The summary of each written file keyed by its POSIX path relative to `base_dir`.
     """
-    with open(output_markdown_file_name, "w") as f:
+    file_contents = (file_info for file_info in file_contents if file_info[1])  # Only process files with content
+    file_summaries: dict[str, str | None] = {}
+    # An interrupted run leaves the markdown of the previous run untouched rather than a truncated one
+    tmp_markdown_file_name = output_markdown_file_name.with_name(f"{output_markdown_file_name.name}.tmp")
+    with (
+        ThreadPoolExecutor(max_workers=max(concurrency, 1), thread_name_prefix="summary") as executor,
+        open(tmp_markdown_file_name, "w", encoding="utf-8") as f,
+    ):
         f.write(f"# {base_dir_name}\n\n")
-    [
-        _write_markdown_file(file_info, base_dir, output_markdown_file_name)
-        for file_info in file_contents
-        if file_info[1]  # Only process files with content
-    ]
+        for file_info, summary in summarize_in_order(file_contents, executor, max(window, concurrency), summarize):
+            _write_markdown_file(file_info, base_dir, f, summary)
+            file_summaries[file_info[0].relative_to(base_dir).as_posix()] = summary
+    os.replace(tmp_markdown_file_name, output_markdown_file_name)
     logger.info(f"Wrote markdown summary to {output_markdown_file_name}")
+    return file_summaries
+
+
+def _write_markdown_shards(
+    base_dir: Path,
+    base_dir_name: str,
+    shard_dir: Path,
+    index_file: Path,
+    file_contents: Iterable[tuple[Path, str]],
+    concurrency: int = SUMMARY_CONCURRENCY,
+    window: int = SUMMARY_WINDOW,
+    summarize: Callable[[str], str | None] | None = None,
+    max_shard_bytes: int = SUMMARY_SHARD_MAX_BYTES,
+) -> dict[str, str | None]:
+    """
+    Writes the markdown summary for the given code files as shards with an index, see `ShardedMarkdownWriter`.
+
+    Summaries are requested like in `_write_markdown`.
+
+    Args:
+        base_dir (Path): The base directory of the code files.
+        base_dir_name (str): The name of the base directory.
+        shard_dir (Path): The directory receiving the shards.
+        index_file (Path): The path to the JSON index of the shards.
+        file_contents (Iterable[tuple[Path, str]]): Tuples containing file paths and their contents.
+        concurrency (int): The maximum number of summary requests kept in flight at once.
+        window (int): The maximum number of files read ahead of the section being written.
+        summarize (Callable[[str], str | None] | None): Summarizes a file's content.
+            Defaults to `try_summarize_content`.
+        max_shard_bytes (int): The size above which a shard is continued in the next one.
+
+    Returns:
+        dict[str, str | None]: The summary of each written file keyed by its POSIX path relative to `base_dir`.
+    """
+    file_contents = (file_info for file_info in file_contents if file_info[1])  # Only process files with content
+    file_summaries: dict[str, str | None] = {}
+    with (
+        ThreadPoolExecutor(max_workers=max(concurrency, 1), thread_name_prefix="summary") as executor,
+        ShardedMarkdownWriter(shard_dir, index_file, base_dir_name, max_shard_bytes) as writer,
+    ):
+        for (file_path, content), summary in summarize_in_order(
+            file_contents, executor, max(window, concurrency), summarize
+        ):
+            with get_pipeline_metrics().stage("markdown_write") as sample:
+                sample.bytes = writer.write(file_path.relative_to(base_dir), content, summary)
+            file_summaries[file_path.relative_to(base_dir).as_posix()] = summary
+            logger.info(f"Appended summary for {file_path}")
+    return file_summaries
 
 
-def _write_markdown_file(file_info: Tuple[Path, str], base_dir: Path, output_file_name: Path) -> None:
+def _write_markdown_file(file_info: Tuple[Path, str], base_dir: Path, output_file: TextIO, summary: str | None) -> None:
     """
     Appends a markdown summary for a single file to the output markdown file.
 
     Args:
         file_info (Tuple[Path, str]): A tuple containing the file path and its content.
         base_dir (Path): The base directory of the code files.
-        output_file_name (Path): The path to the output markdown file.
+        output_file (TextIO): The open output markdown file.
+        summary (str | None): The summary of the file, None when it could not be created.
 
     Returns:
         None
     """
     file_path, content = file_info
-    summary = summarize_content(content)
     relative_path = file_path.relative_to(base_dir)
-    with open(output_file_name, "a") as f:
-        f.write(f"## {relative_path.name}\n\n")
-        f.write(f"### Summary\n\n{summary}\n\n")
-        f.write(f"```{file_path.suffix[1:]}\n")
-        f.write(content)
-        f.write("\n```\n")
-    logger.info(f"Appended summary for {file_path} to {output_file_name}")
+    with get_pipeline_metrics().stage("markdown_write") as sample:
+        section = format_markdown_section(relative_path, content, summary)
+        output_file.write(section)
+        sample.bytes = len(section.encode("utf-8"))
+    logger.info(f"Appended summary for {file_path}")
@@ -1,12 +1,21 @@
+import io
+import json
 import shutil
+import time
 from pathlib import Path
 from unittest.mock import mock_open, patch
 
 import pytest
 
+from ai_code_summary.ai.summary import get_summary_backend
 from ai_code_summary.markdown.export import _write_markdown, _write_markdown_file, create_markdown_from_code
 
 
+@pytest.fixture(autouse=True)
+def work_in_tmp_path(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.chdir(tmp_path)  # Runs write their ./tmp output and report here
+
+
 @pytest.fixture
 def setup_test_directory(tmp_path: Path):
     test_dir = tmp_path / "test_dir"
@@ -22,8 +31,8 @@ def mock_file_contents():
     return [(Path("tmp/code/file1.py"), "def foo(): pass"), (Path("tmp/code/file2.py"), "def bar(): pass")]
 
 
-@patch("ai_code_summary.markdown.export.clear_tmp_folder")
-@patch("ai_code_summary.markdown.export.write_files_to_tmp_directory")
+@patch("ai_code_summary.markdown.export.clear_output_files")
+@patch("ai_code_summary.markdown.export.mirror_file_contents")
 @patch("ai_code_summary.markdown.export.get_code_files")
 @patch("ai_code_summary.markdown.export.read_file")
 @patch("ai_code_summary.markdown.export._write_markdown")
@@ -31,21 +40,37 @@ def test_create_markdown_from_code(
     mock_write_markdown,
     mock_read_file,
     mock_get_code_files,
-    mock_write_files_to_tmp_directory,
-    mock_clear_tmp_folder,
+    mock_mirror_file_contents,
+    mock_clear_output_files,
     setup_test_directory,
 ):
     mock_get_code_files.return_value = [setup_test_directory / "file1.py", setup_test_directory / "file2.py"]
     mock_read_file.side_effect = lambda x: (x, x.read_text())
+    mock_write_markdown.side_effect = lambda *args, **kwargs: list(args[3])  # Consume the lazily read files
 
     create_markdown_from_code(str(setup_test_directory))
 
-    mock_clear_tmp_folder.assert_called_once()
-    mock_write_files_to_tmp_directory.assert_called_once()
+    mock_clear_output_files.assert_called_once()
+    mock_mirror_file_contents.assert_not_called()
     mock_get_code_files.assert_called_once()
+    assert mock_read_file.call_count == 2
     mock_read_file.assert_any_call(setup_test_directory / "file1.py")
     mock_read_file.assert_any_call(setup_test_directory / "file2.py")
     mock_write_markdown.assert_called_once()
+    assert mock_write_markdown.call_args.args[0] == setup_test_directory
+
+
+@patch("ai_code_summary.markdown.export.clear_output_files")
+@patch("ai_code_summary.markdown.export.mirror_file_contents")
+@patch("ai_code_summary.markdown.export._write_markdown")
+def test_create_markdown_from_code_write_tmp_code(
+    mock_write_markdown, mock_mirror_file_contents, mock_clear_output_files, setup_test_directory
+):
+    create_markdown_from_code(str(setup_test_directory), write_tmp_code=True)
+
+    mock_mirror_file_contents.assert_called_once()
+    assert mock_mirror_file_contents.call_args.args[1:] == (setup_test_directory, Path("./tmp/code"))
+    assert mock_write_markdown.call_args.args[3] == mock_mirror_file_contents.return_value
 
 
 def test_write_markdown(mock_file_contents):
@@ -53,26 +78,235 @@ def test_write_markdown(mock_file_contents):
     base_dir_name = "test_project"
     output_markdown_file_name = Path("./tmp/test_project.md")
 
-    with patch("builtins.open", mock_open()) as mocked_file:
-        with patch("ai_code_summary.markdown.export.summarize_content", return_value="Summary of content"):
+    tmp_markdown_file_name = Path("./tmp/test_project.md.tmp")
+
+    with patch("builtins.open", mock_open()) as mocked_file, patch("os.replace") as mock_replace:
+        with patch("ai_code_summary.ai.summary.summarize_content", return_value="Summary of content"):
             _write_markdown(base_dir, base_dir_name, output_markdown_file_name, mock_file_contents)
-            mocked_file.assert_called_with(output_markdown_file_name, "a")
+            mocked_file.assert_called_once_with(tmp_markdown_file_name, "w", encoding="utf-8")
+            mock_replace.assert_called_once_with(tmp_markdown_file_name, output_markdown_file_name)
             handle = mocked_file()
             handle.write.assert_any_call(f"# {base_dir_name}\n\n")
+            assert handle.write.call_count == 3
+
+
+def test_write_markdown_skips_empty_files(tmp_path: Path):
+    output_markdown_file_name = tmp_path / "test_project.md"
+    file_contents = [(tmp_path / "empty.py", ""), (tmp_path / "file.py", "content")]
+
+    with patch("ai_code_summary.ai.summary.summarize_content", return_value="Summary of content") as mock_summarize:
+        _write_markdown(tmp_path, "test_project", output_markdown_file_name, iter(file_contents))
+
+    mock_summarize.assert_called_once_with("content")
+    assert "empty.py" not in output_markdown_file_name.read_text()
 
 
 def test_write_markdown_file(mock_file_contents):
     base_dir = Path("./tmp/code")
-    output_file_name = Path("./tmp/test_project.md")
     file_info = mock_file_contents[0]
+    output_file = io.StringIO()
 
-    with patch("builtins.open", mock_open()) as mocked_file:
-        with patch("ai_code_summary.markdown.export.summarize_content", return_value="Summary of content"):
-            _write_markdown_file(file_info, base_dir, output_file_name)
-            mocked_file.assert_called_with(output_file_name, "a")
-            handle = mocked_file()
-            handle.write.assert_any_call(f"## {file_info[0].name}\n\n")
-            handle.write.assert_any_call("### Summary\n\nSummary of content\n\n")
-            handle.write.assert_any_call(f"```{file_info[0].suffix[1:]}\n")
-            handle.write.assert_any_call(file_info[1])
-            handle.write.assert_any_call("\n```\n")
+    _write_markdown_file(file_info, base_dir, output_file, "Summary of content")
+
+    assert output_file.getvalue() == (
+        f"## {file_info[0].name}\n\n"
+        "### Summary\n\nSummary of content\n\n"
+        f"```{file_info[0].suffix[1:]}\n"
+        f"{file_info[1]}"
+        "\n```\n"
+    )
+
+
+def test_write_markdown_keeps_file_order_with_concurrent_summaries(tmp_path: Path):
+    base_dir = tmp_path / "code"
+    output_markdown_file_name = tmp_path / "test_project.md"
+    file_contents = [(base_dir / f"file{index}.py", f"content{index}") for index in range(5)]
+
+    def slow_first_summary(content: str) -> str:
+        time.sleep(0.05 if content == "content0" else 0)  # the first request finishes last
+        return f"summary of {content}"
+
+    with patch("ai_code_summary.ai.summary.summarize_content", side_effect=slow_first_summary):
+        _write_markdown(base_dir, "test_project", output_markdown_file_name, file_contents, concurrency=5)
+
+    markdown = output_markdown_file_name.read_text()
+    positions = [markdown.index(f"## file{index}.py") for index in range(5)]
+    assert positions == sorted(positions)
+    assert "### Summary\n\nsummary of content0\n\n" in markdown
+
+
+@patch("ai_code_summary.ai.batch.summarize_contents_in_batch")
+def test_create_markdown_from_code_batch(
+    mock_summarize_contents_in_batch, setup_test_directory, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.chdir(tmp_path)
+    mock_summarize_contents_in_batch.side_effect = lambda contents: [
+        f"batch summary of {content}" for content in contents
+    ]
+
+    with patch("ai_code_summary.ai.summary.summarize_content") as mock_summarize_content:
+        create_markdown_from_code(str(setup_test_directory), batch=True)
+
+    mock_summarize_contents_in_batch.assert_called_once_with(["print('Hello, World!')", "def foo(): pass"])
+    mock_summarize_content.assert_not_called()
+    markdown = (tmp_path / "tmp" / f"{setup_test_directory.name}.md").read_text()
+    assert "### Summary\n\nbatch summary of def foo(): pass\n\n" in markdown
+
+
+def test_create_markdown_from_code_output_dir(setup_test_directory, tmp_path: Path):
+    output_dir = tmp_path / "output" / "test_dir"
+
+    with patch("ai_code_summary.ai.summary.summarize_content", return_value="Summary of content"):
+        create_markdown_from_code(str(setup_test_directory), output_dir=output_dir, write_tmp_code=True)
+
+    assert (output_dir / "test_dir.md").read_text().startswith("# test_dir\n\n## file1.py\n\n")
+    assert (output_dir / "code" / "file2.py").read_text() == "def foo(): pass"
+
+
+def test_create_markdown_from_code_writes_a_metrics_report(setup_test_directory, tmp_path: Path):
+    with patch("ai_code_summary.ai.summary.summarize_content", return_value="Summary of content"):
+        create_markdown_from_code(str(setup_test_directory), output_dir=tmp_path / "output")
+
+    report = json.loads((tmp_path / "output" / "test_dir.metrics.json").read_text())
+    assert report["stages"]["walk"]["count"] == 2
+    assert report["stages"]["read"] == report["stages"]["read"] | {"count": 2, "bytes": 37}
+    assert report["stages"]["markdown_write"]["count"] == 2
+
+
+def test_create_markdown_from_code_deduplicate(setup_test_directory, tmp_path: Path):
+    (setup_test_directory / "copy.py").write_text("def foo(): pass")
+
+    with patch("ai_code_summary.ai.summary.summarize_content", return_value="Summary of content") as mock_summarize:
+        create_markdown_from_code(str(setup_test_directory), deduplicate=True)
+
+    assert sorted(call.args[0] for call in mock_summarize.call_args_list) == [
+        "def foo(): pass",
+        "print('Hello, World!')",
+    ]
+    markdown = (tmp_path / "tmp" / f"{setup_test_directory.name}.md").read_text()
+    assert markdown.count("### Summary\n\nSummary of content\n\n") == 3
+
+
+def test_create_markdown_from_code_sharded(setup_test_directory, tmp_path: Path):
+    with patch("ai_code_summary.ai.summary.summarize_content", return_value="Summary of content"):
+        create_markdown_from_code(str(setup_test_directory), sharded=True)
+
+    index = json.loads((tmp_path / "tmp" / "test_dir.index.json").read_text())
+    assert set(index["files"]) == {"file1.py", "file2.py"}
+    assert (tmp_path / "tmp" / "test_dir.shards" / "_root.md").exists()
+    assert not (tmp_path / "tmp" / "test_dir.md").exists()
+
+
+def test_create_markdown_from_code_rejects_an_output_dir_containing_the_directory(setup_test_directory):
+    (setup_test_directory / "tmp").mkdir()
+
+    for output_dir in [setup_test_directory, setup_test_directory.parent]:
+        with pytest.raises(ValueError, match="must not contain"):
+            create_markdown_from_code(str(setup_test_directory), output_dir=output_dir)
+    assert (setup_test_directory / "file1.py").exists()
+    create_markdown_from_code(str(setup_test_directory), output_dir=setup_test_directory / "tmp", plan=True)
+
+
+def test_create_markdown_from_code_sharded_incremental_is_rejected(setup_test_directory):
+    with pytest.raises(ValueError, match="cannot write shards"):
+        create_markdown_from_code(str(setup_test_directory), sharded=True, incremental=True)
+
+
+@patch("ai_code_summary.markdown.export.summarize_directories", return_value={"": "The project."})
+def test_create_markdown_from_code_rollup(mock_summarize_directories, setup_test_directory, tmp_path: Path):
+    with patch("ai_code_summary.ai.summary.summarize_content", return_value="Summary of content"):
+        create_markdown_from_code(str(setup_test_directory), rollup=True)
+
+    assert mock_summarize_directories.call_args.args == (
+        {"file1.py": "Summary of content", "file2.py": "Summary of content"},
+        "test_dir",
+        8,
+    )
+    overview = (tmp_path / "tmp" / "test_dir.overview.md").read_text()
+    assert overview == "# test_dir\n\n## Repository\n\nThe project.\n\n"
+
+
+def test_create_markdown_from_code_resumes_from_the_checkpoint(setup_test_directory, tmp_path: Path):
+    with (
+        patch("ai_code_summary.ai.summary.summarize_content", side_effect=["Summary of file1", KeyboardInterrupt]),
+        pytest.raises(KeyboardInterrupt),
+    ):
+        create_markdown_from_code(str(setup_test_directory), concurrency=1)
+    assert (tmp_path / "tmp" / "test_dir.checkpoint.jsonl").exists()
+    assert not (tmp_path / "tmp" / "test_dir.md").exists()
+
+    with patch("ai_code_summary.ai.summary.summarize_content", return_value="Summary of file2") as mock_summarize:
+        create_markdown_from_code(str(setup_test_directory), concurrency=1)
+
+    mock_summarize.assert_called_once_with("def foo(): pass")
+    markdown = (tmp_path / "tmp" / "test_dir.md").read_text()
+    assert "Summary of file1" in markdown
+    assert "Summary of file2" in markdown
+    assert not (tmp_path / "tmp" / "test_dir.checkpoint.jsonl").exists()
+
+
+def test_create_markdown_from_code_interrupted_keeps_the_previous_markdown(setup_test_directory, tmp_path: Path):
+    with patch("ai_code_summary.ai.summary.summarize_content", return_value="First summary"):
+        create_markdown_from_code(str(setup_test_directory), concurrency=1, write_tmp_code=True)
+    previous_markdown = (tmp_path / "tmp" / "test_dir.md").read_text()
+
+    with (
+        patch("ai_code_summary.ai.summary.summarize_content", side_effect=["Second summary", KeyboardInterrupt]),
+        pytest.raises(KeyboardInterrupt),
+    ):
+        create_markdown_from_code(str(setup_test_directory), concurrency=1)
+
+    assert "First summary" in previous_markdown
+    assert (tmp_path / "tmp" / "test_dir.md").read_text() == previous_markdown
+    assert not (tmp_path / "tmp" / "code").exists()  # Stale artifacts of the previous run are removed
+
+
+def test_create_markdown_from_code_pack(setup_test_directory, tmp_path: Path):
+    response = json.dumps({"file1.py": "Summary of file1", "file2.py": "Summary of file2"})
+
+    with (
+        patch("ai_code_summary.ai.packing.create_cached_summary", return_value=response) as mock_create,
+        patch("ai_code_summary.ai.summary.summarize_content") as mock_summarize,
+    ):
+        create_markdown_from_code(str(setup_test_directory), pack=True)
+
+    mock_create.assert_called_once()
+    mock_summarize.assert_not_called()
+    markdown = (tmp_path / "tmp" / "test_dir.md").read_text()
+    assert "### Summary\n\nSummary of file1\n\n" in markdown
+    assert "### Summary\n\nSummary of file2\n\n" in markdown
+
+
+def test_create_markdown_from_code_pack_batch_is_rejected(setup_test_directory):
+    with pytest.raises(ValueError, match="cannot pack files"):
+        create_markdown_from_code(str(setup_test_directory), pack=True, batch=True)
+
+
+@patch("ai_code_summary.ai.summary.SUMMARY_BACKEND", "extractive")
+def test_create_markdown_from_code_with_the_extractive_backend(setup_test_directory, tmp_path: Path):
+    get_summary_backend.cache_clear()
+    try:
+        create_markdown_from_code(str(setup_test_directory))
+        with pytest.raises(ValueError, match="does not support batch runs"):
+            create_markdown_from_code(str(setup_test_directory), batch=True)
+    finally:
+        get_summary_backend.cache_clear()
+
+    markdown = (tmp_path / "tmp" / "test_dir.md").read_text()
+    assert "### Summary\n\nDefines `foo`.\n\n" in markdown
+
+
+@patch("ai_code_summary.ai.summary._create_summary")
+def test_create_markdown_from_code_plan(mock_create_summary, setup_test_directory, tmp_path: Path):
+    (tmp_path / "tmp").mkdir()
+    (tmp_path / "tmp" / "test_dir.md").write_text("Previous markdown")
+
+    create_markdown_from_code(str(setup_test_directory), plan=True)
+
+    mock_create_summary.assert_not_called()
+    assert (tmp_path / "tmp" / "test_dir.md").read_text() == "Previous markdown"
+    report = json.loads((tmp_path / "tmp" / "test_dir.plan.json").read_text())
+    assert report["total"]["files"] == 2
+    assert report["total"]["requests"] == 2
+    with pytest.raises(ValueError, match="Plans estimate full runs"):
+        create_markdown_from_code(str(setup_test_directory), plan=True, incremental=True)
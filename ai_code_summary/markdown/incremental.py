@@ -0,0 +1,169 @@
+import os
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from pathlib import Path
+
+from loguru import logger
+
+from ai_code_summary.ai.summarizer import build_summarizer
+from ai_code_summary.ai.summary import summarize_file, try_summarize_content
+from ai_code_summary.code.git_diff import get_git_commit, get_git_unchanged_files, is_git_tree_clean
+from ai_code_summary.files.checkpoint import Checkpoint
+from ai_code_summary.files.file_manager import get_code_files, read_file
+from ai_code_summary.files.manifest import Manifest, ManifestEntry, hash_content, load_manifest, save_manifest
+from ai_code_summary.markdown.sections import format_markdown_section, get_section_summary
+from ai_code_summary.metrics.stages import get_pipeline_metrics
+
+
+def update_markdown(
+    directory: str,
+    exclude_gitignore_dirs: list[str],
+    base_dir_name: str,
+    output_markdown_file_name: Path,
+    manifest_file_name: Path,
+    concurrency: int,
+    batch: bool = False,
+    deduplicate: bool = False,
+    checkpoint: Checkpoint | None = None,
+    summarize: Callable[[str], str | None] | None = None,
+    pack: bool = False,
+    file_contents: dict[str, str] | None = None,
+) -> dict[str, str | None]:
+    """
+    Patches the markdown written by a previous run, re-summarizing only added and modified files.
+
+    Unchanged files are detected through `git diff` against the commit stored in the manifest when possible,
+    which is only stored when the previous run saw a clean work tree, then through their size and mtime, and
+    finally through their content hash. Their sections are copied from the previous markdown without being read
+    again. Deleted files are dropped.
+
+    Args:
+        directory (str): The directory containing the code to summarize.
+        exclude_gitignore_dirs (list[str]): Directories whose .gitignore files are not loaded.
+        base_dir_name (str): The name of the base directory.
+        output_markdown_file_name (Path): The path to the markdown file to patch.
+        manifest_file_name (Path): The path to the manifest of the previous run.
+        concurrency (int): The maximum number of summary requests kept in flight at once.
+        batch (bool): Summarize the changed files through the OpenAI Batch API.
+        deduplicate (bool): Summarize exact and near-duplicate changed files once.
+        checkpoint (Checkpoint | None): The journal of completed summaries, reused and extended by this run.
+        summarize (Callable[[str], str | None] | None): Summarizes a file's content when not batched.
+            Defaults to `try_summarize_content`.
+        pack (bool): Summarize small changed files several at a time, unless batched.
+        file_contents (dict[str, str] | None): The contents already read by the caller, keyed by POSIX path,
+            used instead of reading these files again.
+
+    Returns:
+        dict[str, str | None]: The summary of each file keyed by its POSIX path, None when it failed or, for
+            unchanged files, when the previous run did not record it.
+    """
+    base_dir = Path(directory)
+    previous_manifest = (
+        load_manifest(manifest_file_name) if output_markdown_file_name.exists() else None
+    ) or Manifest()
+    previous_markdown = output_markdown_file_name.read_bytes() if previous_manifest.files else b""
+    unchanged_by_git = (
+        get_git_unchanged_files(directory, previous_manifest.commit) if previous_manifest.commit else set()
+    )
+
+    file_states = [
+        _get_file_state(file_path, base_dir, previous_manifest.files, unchanged_by_git, file_contents or {})
+        for file_path in get_code_files(directory, exclude_gitignore_dirs=exclude_gitignore_dirs)
+    ]
+    changed_files = [(base_dir / relative_path, content) for relative_path, _, content in file_states if content]
+    logger.info(
+        f"Incremental update: {len(changed_files)} changed, "
+        f"{len(set(previous_manifest.files) - {relative_path for relative_path, _, _ in file_states})} deleted, "
+        f"{sum(content is None for _, _, content in file_states)} unchanged files"
+    )
+
+    # The commit only describes the summarized files when none of them had uncommitted changes
+    manifest = Manifest(commit=get_git_commit(directory) if is_git_tree_clean(directory) else None)
+    file_summaries: dict[str, str | None] = {}
+    tmp_markdown_file_name = output_markdown_file_name.with_name(f"{output_markdown_file_name.name}.tmp")
+    summarize = build_summarizer(
+        changed_files,
+        base_dir,
+        checkpoint,
+        batch=batch,
+        pack=pack,
+        deduplicate=deduplicate,
+        summarize=summarize or try_summarize_content,
+    )
+    with (
+        ThreadPoolExecutor(max_workers=max(concurrency, 1), thread_name_prefix="summary") as executor,
+        open(tmp_markdown_file_name, "wb") as f,
+    ):
+        summaries = executor.map(summarize_file, changed_files, [summarize] * len(changed_files))
+        f.write(f"# {base_dir_name}\n\n".encode())
+        for relative_path, entry, content in file_states:
+            if content is None:
+                section = previous_markdown[entry.offset : entry.offset + entry.length]
+                file_summaries[relative_path] = get_section_summary(relative_path, section, entry.summary_length)
+            elif content:
+                summary = file_summaries[relative_path] = next(summaries)
+                with get_pipeline_metrics().stage("markdown_write") as sample:
+                    section = format_markdown_section(Path(relative_path), content, summary).encode()
+                    sample.bytes = len(section)
+                if summary is None:
+                    entry = ManifestEntry(size=-1, mtime_ns=-1, sha256="")  # Summarized again by the next run
+                else:
+                    entry = replace(entry, summary_length=len(summary.encode()))
+            else:
+                section = b""  # Files without content are not summarized
+            manifest.files[relative_path] = replace(entry, offset=f.tell(), length=len(section))
+            f.write(section)
+
+    os.replace(tmp_markdown_file_name, output_markdown_file_name)
+    save_manifest(manifest_file_name, manifest)
+    logger.info(f"Updated markdown summary {output_markdown_file_name}")
+    return file_summaries
+
+
+def _get_file_state(
+    file_path: Path,
+    base_dir: Path,
+    previous_entries: dict[str, ManifestEntry],
+    unchanged_by_git: set[str],
+    file_contents: dict[str, str],
+) -> tuple[str, ManifestEntry, str | None]:
+    """
+    Determines whether a file changed since the previous run, reading it only when necessary.
+
+    Args:
+        file_path (Path): The path to the file.
+        base_dir (Path): The base directory to calculate relative paths.
+        previous_entries (dict[str, ManifestEntry]): The manifest entries of the previous run.
+        unchanged_by_git (set[str]): The files git reports as unchanged since the previous run.
+        file_contents (dict[str, str]): The contents already read, keyed by POSIX path.
+
+    Returns:
+        tuple[str, ManifestEntry, str | None]: The relative path, the file's manifest entry and its content.
+            The content is None when the section of the previous run can be reused.
+    """
+    relative_path = file_path.relative_to(base_dir).as_posix()
+    previous_entry = previous_entries.get(relative_path)
+    if previous_entry and not previous_entry.sha256:
+        previous_entry = None  # The summary of the previous run failed
+    if previous_entry and relative_path in unchanged_by_git:
+        return relative_path, previous_entry, None
+
+    stat = file_path.stat()
+    if previous_entry and (stat.st_size, stat.st_mtime_ns) == (previous_entry.size, previous_entry.mtime_ns):
+        return relative_path, previous_entry, None
+
+    content = file_contents[relative_path] if relative_path in file_contents else read_file(file_path)[1]
+    entry = ManifestEntry(size=stat.st_size, mtime_ns=stat.st_mtime_ns, sha256=hash_content(content))
+    if previous_entry and entry.sha256 == previous_entry.sha256:
+        return (
+            relative_path,
+            replace(
+                entry,
+                offset=previous_entry.offset,
+                length=previous_entry.length,
+                summary_length=previous_entry.summary_length,
+            ),
+            None,
+        )
+    return relative_path, entry, content
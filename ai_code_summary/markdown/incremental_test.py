@@ -0,0 +1,157 @@
+import os
+import subprocess
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from ai_code_summary.files.manifest import load_manifest
+from ai_code_summary.markdown.incremental import update_markdown
+
+
+@pytest.fixture
+def source_dir(tmp_path: Path) -> Path:
+    source_dir = tmp_path / "project"
+    source_dir.mkdir()
+    (source_dir / "a.py").write_text("a = 1")
+    (source_dir / "b.py").write_text("b = 1")
+    (source_dir / "c.py").write_text("c = 1")
+    return source_dir
+
+
+def _update_markdown(
+    source_dir: Path, output_dir: Path, failing_contents: tuple[str, ...] = (), deduplicate: bool = False
+) -> list[str]:
+    summarized = []
+
+    def summarize(content: str) -> str | None:
+        summarized.append(content)
+        return None if content in failing_contents else f"summary of {content}"
+
+    with patch("ai_code_summary.markdown.incremental.try_summarize_content", side_effect=summarize):
+        update_markdown(
+            str(source_dir),
+            [],
+            "project",
+            output_dir / "project.md",
+            output_dir / "project.manifest.json",
+            concurrency=2,
+            deduplicate=deduplicate,
+        )
+    return summarized
+
+
+def test_update_markdown_only_summarizes_changed_files(source_dir: Path, tmp_path: Path):
+    assert _update_markdown(source_dir, tmp_path) == ["a = 1", "b = 1", "c = 1"]
+
+    (source_dir / "b.py").write_text("b = 2")
+    (source_dir / "c.py").unlink()
+    (source_dir / "d.py").write_text("d = 1")
+
+    assert _update_markdown(source_dir, tmp_path) == ["b = 2", "d = 1"]
+
+    markdown = (tmp_path / "project.md").read_text()
+    assert markdown.startswith("# project\n\n## a.py\n\n### Summary\n\nsummary of a = 1\n\n")
+    assert "summary of b = 2" in markdown
+    assert "summary of b = 1" not in markdown
+    assert "c.py" not in markdown
+    assert markdown.index("## a.py") < markdown.index("## b.py") < markdown.index("## d.py")
+    assert set(load_manifest(tmp_path / "project.manifest.json").files) == {"a.py", "b.py", "d.py"}
+
+
+def test_update_markdown_reuses_sections_of_touched_files(source_dir: Path, tmp_path: Path):
+    _update_markdown(source_dir, tmp_path)
+    first_markdown = (tmp_path / "project.md").read_text()
+
+    os.utime(source_dir / "a.py", ns=(0, 0))  # Changes the mtime but not the content
+
+    assert _update_markdown(source_dir, tmp_path) == []
+    assert (tmp_path / "project.md").read_text() == first_markdown
+
+
+def test_update_markdown_summarizes_failed_files_again(source_dir: Path, tmp_path: Path):
+    assert _update_markdown(source_dir, tmp_path, failing_contents=("b = 1",)) == ["a = 1", "b = 1", "c = 1"]
+
+    assert "Summary unavailable" in (tmp_path / "project.md").read_text()
+    failed_entry = load_manifest(tmp_path / "project.manifest.json").files["b.py"]
+    assert (failed_entry.size, failed_entry.mtime_ns, failed_entry.sha256) == (-1, -1, "")
+
+    assert _update_markdown(source_dir, tmp_path) == ["b = 1"]
+    markdown = (tmp_path / "project.md").read_text()
+    assert "summary of b = 1" in markdown
+    assert "Summary unavailable" not in markdown
+
+
+def _git(directory: Path, *args: str) -> None:
+    subprocess.run(
+        ["git", "-C", str(directory), "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        check=True,
+        capture_output=True,
+    )
+
+
+def test_update_markdown_does_not_trust_git_after_a_dirty_run(source_dir: Path, tmp_path: Path):
+    _git(source_dir, "init")
+    _git(source_dir, "add", ".")
+    _git(source_dir, "commit", "-m", "initial")
+    output_dir = tmp_path / "output"
+    output_dir.mkdir()
+    _update_markdown(source_dir, output_dir)
+
+    (source_dir / "a.py").write_text("a = 2")  # Summarized while uncommitted
+    assert _update_markdown(source_dir, output_dir) == ["a = 2"]
+    assert load_manifest(output_dir / "project.manifest.json").commit is None
+
+    _git(source_dir, "checkout", "--", "a.py")
+    assert _update_markdown(source_dir, output_dir) == ["a = 1"]
+    markdown = (output_dir / "project.md").read_text()
+    assert "summary of a = 1" in markdown
+    assert "a = 2" not in markdown
+    assert load_manifest(output_dir / "project.manifest.json").commit is not None
+
+
+def test_update_markdown_batches_changed_files(source_dir: Path, tmp_path: Path):
+    _update_markdown(source_dir, tmp_path)
+    (source_dir / "b.py").write_text("b = 2")
+
+    with patch(
+        "ai_code_summary.ai.batch.summarize_contents_in_batch",
+        side_effect=lambda contents: [f"batch summary of {content}" for content in contents],
+    ) as mock_summarize_contents_in_batch:
+        update_markdown(
+            str(source_dir),
+            [],
+            "project",
+            tmp_path / "project.md",
+            tmp_path / "project.manifest.json",
+            concurrency=2,
+            batch=True,
+        )
+
+    mock_summarize_contents_in_batch.assert_called_once_with(["b = 2"])
+    markdown = (tmp_path / "project.md").read_text()
+    assert "summary of a = 1" in markdown
+    assert "batch summary of b = 2" in markdown
+
+
+def test_update_markdown_summarizes_duplicate_changed_files_once(source_dir: Path, tmp_path: Path):
+    _update_markdown(source_dir, tmp_path)
+    (source_dir / "b.py").write_text("x = 1")
+    (source_dir / "c.py").write_text("x = 1")
+
+    assert _update_markdown(source_dir, tmp_path, deduplicate=True) == ["x = 1"]
+
+    markdown = (tmp_path / "project.md").read_text()
+    assert markdown.count("### Summary\n\nsummary of x = 1\n\n") == 2
+
+
+def test_update_markdown_returns_the_summaries_of_reused_sections(source_dir: Path, tmp_path: Path):
+    _update_markdown(source_dir, tmp_path)
+    (source_dir / "b.py").write_text("b = 2")
+
+    with patch("ai_code_summary.markdown.incremental.try_summarize_content", side_effect=lambda c: f"summary of {c}"):
+        file_summaries = update_markdown(
+            str(source_dir), [], "project", tmp_path / "project.md", tmp_path / "project.manifest.json", concurrency=2
+        )
+
+    assert file_summaries == {"a.py": "summary of a = 1", "b.py": "summary of b = 2", "c.py": "summary of c = 1"}
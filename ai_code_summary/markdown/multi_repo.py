@@ -0,0 +1,78 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from loguru import logger
+
+from ai_code_summary.env_variables import SUMMARY_CONCURRENCY
+from ai_code_summary.markdown.export import _EXCLUDE_GITIGNORE_DIRS, create_markdown_from_code
+
+
+def create_markdown_for_repositories(
+    directories: list[str],
+    output_root: str | Path = "./tmp",
+    exclude_gitignore_dirs: list[str] = _EXCLUDE_GITIGNORE_DIRS,
+    processes: int | None = None,
+    concurrency: int = SUMMARY_CONCURRENCY,
+    **options: bool,
+) -> dict[str, Path]:
+    """
+    Creates one markdown summary per repository, summarizing several repositories side by side.
+
+    Each repository is summarized by `create_markdown_from_code` in a process pool, one repository per task, into
+    its own `<output_root>/<repository name>/` directory, with its own checkpoint journal and run report. Files
+    are read lazily within the read-ahead window of each run, so at most `processes` windows are held in memory.
+    The summary workers are split between the processes, so all repositories together stay within
+    SUMMARY_CONCURRENCY requests in flight.
+
+    Args:
+        directories (list[str]): The directories containing the code to summarize.
+        output_root (str | Path): The directory receiving one output directory per repository.
+        exclude_gitignore_dirs (list[str]): Directories whose .gitignore files are not loaded.
+        processes (int | None): The number of repositories summarized at once. Defaults to the number of CPUs.
+        concurrency (int): The number of summary workers of each repository being summarized, capped by its
+            share of SUMMARY_CONCURRENCY.
+        **options (bool): The options of every run, e.g. `deduplicate=True`, see `create_markdown_from_code`.
+
+    Returns:
+        dict[str, Path]: The markdown file written for each directory.
+
+    Raises:
+        ValueError: If two directories have the same name.
+    """
+    output_dirs = {directory: Path(output_root) / _get_repository_name(directory) for directory in directories}
+    if len(set(output_dirs.values())) < len(output_dirs):
+        raise ValueError("Repositories summarized together need distinct directory names")
+
+    processes = processes or os.cpu_count() or 1
+    concurrency = min(concurrency, max(SUMMARY_CONCURRENCY // min(processes, len(directories) or 1), 1))
+    logger.info(f"Summarizing {len(directories)} repositories with {processes} processes")
+    with ProcessPoolExecutor(max_workers=processes) as process_pool:
+        futures = {
+            directory: process_pool.submit(
+                create_markdown_from_code,
+                str(Path(directory).resolve()),
+                exclude_gitignore_dirs,
+                concurrency,
+                output_dir=output_dirs[directory],
+                **options,
+            )
+            for directory in directories
+        }
+        for future in futures.values():
+            future.result()
+
+    return {directory: output_dirs[directory] / f"{_get_repository_name(directory)}.md" for directory in directories}
+
+
+def _get_repository_name(directory: str) -> str:
+    """
+    Returns the name used for a repository's output directory and markdown file.
+
+    Args:
+        directory (str): The repository's directory.
+
+    Returns:
+        str: The name of the directory.
+    """
+    return Path(directory).resolve().name
@@ -0,0 +1,60 @@
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from ai_code_summary.markdown.multi_repo import create_markdown_for_repositories
+
+
+@pytest.fixture
+def repositories(tmp_path: Path) -> list[str]:
+    directories = []
+    for name in ["first", "second", "third"]:
+        directory = tmp_path / "repositories" / name
+        directory.mkdir(parents=True)
+        (directory / "main.py").write_text(f"{name} = 1")
+        (directory / "notes.bin").write_text("not code")
+        directories.append(str(directory))
+    return directories
+
+
+def test_create_markdown_for_repositories(repositories: list[str], tmp_path: Path):
+    output_root = tmp_path / "output"
+    (output_root / "first" / "code").mkdir(parents=True)
+    (output_root / "first" / "code" / "stale.py").write_text("stale")
+    (output_root / "unrelated.md").write_text("kept")
+
+    with patch("ai_code_summary.ai.summary.summarize_content", side_effect=lambda content: f"summary of {content}"):
+        markdown_files = create_markdown_for_repositories(repositories, output_root, processes=2, concurrency=2)
+
+    assert markdown_files == {
+        directory: output_root / Path(directory).name / f"{Path(directory).name}.md" for directory in repositories
+    }
+    for directory, markdown_file in markdown_files.items():
+        name = Path(directory).name
+        markdown = markdown_file.read_text()
+        assert markdown.startswith(f"# {name}\n\n## main.py\n\n### Summary\n\nsummary of {name} = 1\n\n")
+        assert "notes.bin" not in markdown
+        assert (markdown_file.parent / f"{name}.metrics.json").exists()  # Each repository has its own run report
+    assert not (output_root / "first" / "code").exists()
+    assert (output_root / "unrelated.md").read_text() == "kept"
+
+
+def test_create_markdown_for_repositories_forwards_options(repositories: list[str], tmp_path: Path):
+    with patch("ai_code_summary.ai.summary.summarize_content", side_effect=lambda content: f"summary of {content}"):
+        create_markdown_for_repositories(repositories[:1], tmp_path / "output", processes=1, sharded=True)
+
+    assert (tmp_path / "output" / "first" / "first.index.json").exists()
+    assert not (tmp_path / "output" / "first" / "first.md").exists()
+
+
+def test_create_markdown_for_repositories_rejects_an_output_root_containing_a_repository(repositories: list[str]):
+    with pytest.raises(ValueError, match="must not contain"):
+        create_markdown_for_repositories(repositories[:1], Path(repositories[0]).parent, processes=1)
+
+
+def test_create_markdown_for_repositories_rejects_duplicate_names(tmp_path: Path):
+    directories = [str(tmp_path / "a" / "project"), str(tmp_path / "b" / "project")]
+
+    with pytest.raises(ValueError):
+        create_markdown_for_repositories(directories, tmp_path / "output")
@@ -0,0 +1,59 @@
+from pathlib import Path
+
+_SUMMARY_UNAVAILABLE = "_Summary unavailable: the summary request failed._"
+
+
+def format_markdown_section(relative_path: Path, content: str, summary: str | None) -> str:
+    """
+    Formats the markdown section of a single file.
+
+    Args:
+        relative_path (Path): The path of the file relative to the summarized directory.
+        content (str): The content of the file.
+        summary (str | None): The summary of the file, None when it could not be created.
+
+    Returns:
+        str: The markdown section, including the file's summary and content.
+    """
+    language = relative_path.suffix[1:]
+    if summary is None:
+        summary = _SUMMARY_UNAVAILABLE
+    return f"## {relative_path.as_posix()}\n\n### Summary\n\n{summary}\n\n```{language}\n{content}\n```\n"
+
+
+def get_section_summary(relative_path: str, section: bytes, summary_length: int | None) -> str | None:
+    """
+    Extracts the summary from a markdown section written by `format_markdown_section`.
+
+    Args:
+        relative_path (str): The POSIX path of the file relative to the summarized directory.
+        section (bytes): The encoded markdown section.
+        summary_length (int | None): The size of the encoded summary, None when it is unknown.
+
+    Returns:
+        str | None: The summary, or None when its size is unknown.
+    """
+    if summary_length is None:
+        return None
+    start = len(f"## {relative_path}\n\n### Summary\n\n".encode())
+    return section[start : start + summary_length].decode("utf-8")
+
+
+def format_overview(base_dir_name: str, directory_summaries: dict[str, str | None]) -> str:
+    """
+    Formats the overview of a repository, with the summary of the repository followed by each directory's.
+
+    Args:
+        base_dir_name (str): The name of the repository.
+        directory_summaries (dict[str, str | None]): The summary of each directory keyed by its POSIX path,
+            the repository being keyed by "".
+
+    Returns:
+        str: The markdown overview.
+    """
+    sections = [f"# {base_dir_name}\n\n"]
+    for directory in sorted(directory_summaries):
+        summary = directory_summaries[directory]
+        heading = "Repository" if directory == "" else f"{directory}/"
+        sections.append(f"## {heading}\n\n{_SUMMARY_UNAVAILABLE if summary is None else summary}\n\n")
+    return "".join(sections)
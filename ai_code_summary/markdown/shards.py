@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import BinaryIO, Self
+
+from loguru import logger
+
+from ai_code_summary.files.manifest import hash_content
+from ai_code_summary.markdown.sections import format_markdown_section
+
+# hashlib only names the type of its hash objects for type checkers
+_Hash = type(hashlib.sha256())
+
+_ROOT_SHARD = "_root"
+
+
+class ShardedMarkdownWriter:
+    """
+    Writes the markdown of a repository as size-bounded shards, with a JSON index of where each file went.
+
+    Files are grouped into one shard per top-level directory, files at the top level going to `_root`. A shard
+    reaching `max_shard_bytes` is continued in a numbered one, e.g. `src.2.md`. The index maps each file to its
+    shard, the byte offset and length of its section, and the SHA-256 of its content and summary, and holds the
+    SHA-256 of every shard, so ingestion only needs to reload the shards whose hash changed.
+    """
+
+    def __init__(self, shard_dir: Path, index_file: Path, base_dir_name: str, max_shard_bytes: int):
+        self.shard_dir = shard_dir
+        self.index_file = index_file
+        self.base_dir_name = base_dir_name
+        self.max_shard_bytes = max_shard_bytes
+        self._open_shards: dict[str, tuple[str, BinaryIO, _Hash]] = {}
+        self._shard_parts: dict[str, int] = {}
+        self._shards: dict[str, dict] = {}
+        self._files: dict[str, dict] = {}
+
+    def __enter__(self) -> Self:
+        self.shard_dir.mkdir(parents=True, exist_ok=True)
+        return self
+
+    def __exit__(self, exc_type, *exc_info) -> None:
+        for group in list(self._open_shards):
+            self._close_shard(group)
+        if exc_type is not None:
+            # The index of the previous run is kept rather than one listing an incomplete set of files
+            logger.warning(f"Markdown shards in {self.shard_dir} are incomplete, their index was not updated")
+            return
+        index = {"shards": self._shards, "files": self._files}
+        tmp_index_file = self.index_file.with_name(f"{self.index_file.name}.tmp")
+        tmp_index_file.write_text(json.dumps(index, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_index_file, self.index_file)
+        logger.info(
+            f"Wrote {len(self._shards)} markdown shards to {self.shard_dir} and their index to {self.index_file}"
+        )
+
+    def write(self, relative_path: Path, content: str, summary: str | None) -> int:
+        """
+        Appends the section of a file to the shard of its top-level directory.
+
+        Args:
+            relative_path (Path): The path of the file relative to the summarized directory.
+            content (str): The content of the file.
+            summary (str | None): The summary of the file, None when it could not be created.
+
+        Returns:
+            int: The size of the written section in bytes.
+        """
+        section = format_markdown_section(relative_path, content, summary).encode("utf-8")
+        group = relative_path.parts[0] if len(relative_path.parts) > 1 else _ROOT_SHARD
+        name, f, shard_hash = self._get_shard(group)
+        if f.tell() + len(section) > self.max_shard_bytes and f.tell() > len(self._get_header(group)):
+            self._close_shard(group)
+            name, f, shard_hash = self._get_shard(group)
+
+        self._files[relative_path.as_posix()] = {
+            "shard": name,
+            "offset": f.tell(),
+            "length": len(section),
+            "content_sha256": hash_content(content),
+            "summary_sha256": hash_content(summary) if summary is not None else None,
+        }
+        f.write(section)
+        shard_hash.update(section)
+        return len(section)
+
+    def _get_header(self, group: str) -> bytes:
+        return f"# {self.base_dir_name}/{group}\n\n".encode()
+
+    def _get_shard(self, group: str) -> tuple[str, BinaryIO, _Hash]:
+        """
+        Returns the open shard of a group, starting a new shard when it has none.
+        """
+        if group not in self._open_shards:
+            part = self._shard_parts[group] = self._shard_parts.get(group, 0) + 1
+            name = f"{group}.md" if part == 1 else f"{group}.{part}.md"
+            header = self._get_header(group)
+            f = open(self.shard_dir / name, "wb")  # noqa: SIM115 - closed by _close_shard
+            f.write(header)
+            self._open_shards[group] = (name, f, hashlib.sha256(header))
+        return self._open_shards[group]
+
+    def _close_shard(self, group: str) -> None:
+        name, f, shard_hash = self._open_shards.pop(group)
+        self._shards[name] = {"bytes": f.tell(), "sha256": shard_hash.hexdigest()}
+        f.close()
@@ -0,0 +1,50 @@
+import hashlib
+import json
+from pathlib import Path
+
+from ai_code_summary.files.manifest import hash_content
+from ai_code_summary.markdown.shards import ShardedMarkdownWriter
+
+
+def _write_shards(tmp_path: Path, files: list[tuple[str, str, str | None]], max_shard_bytes: int = 10_000) -> dict:
+    with ShardedMarkdownWriter(tmp_path / "shards", tmp_path / "index.json", "project", max_shard_bytes) as writer:
+        for relative_path, content, summary in files:
+            writer.write(Path(relative_path), content, summary)
+    return json.loads((tmp_path / "index.json").read_text())
+
+
+def test_sharded_markdown_writer_groups_files_by_top_level_directory(tmp_path: Path):
+    index = _write_shards(
+        tmp_path,
+        [("README.md", "# Project", "readme"), ("src/main.py", "x = 1", "main"), ("tests/test_main.py", "y", None)],
+    )
+
+    assert sorted(index["shards"]) == ["_root.md", "src.md", "tests.md"]
+    assert (tmp_path / "shards" / "src.md").read_text().startswith("# project/src\n\n## src/main.py\n\n")
+    entry = index["files"]["src/main.py"]
+    assert entry["shard"] == "src.md"
+    assert entry["content_sha256"] == hash_content("x = 1")
+    assert entry["summary_sha256"] == hash_content("main")
+    assert index["files"]["tests/test_main.py"]["summary_sha256"] is None
+
+
+def test_sharded_markdown_writer_indexes_sections_and_shard_hashes(tmp_path: Path):
+    index = _write_shards(tmp_path, [("src/a.py", "a = 1", "a"), ("src/b.py", "b = 1", "b")])
+
+    shard = (tmp_path / "shards" / "src.md").read_bytes()
+    entry = index["files"]["src/b.py"]
+    assert shard[entry["offset"] : entry["offset"] + entry["length"]].decode().startswith("## src/b.py\n\n")
+    assert index["shards"]["src.md"] == {"bytes": len(shard), "sha256": hashlib.sha256(shard).hexdigest()}
+
+
+def test_sharded_markdown_writer_continues_full_shards(tmp_path: Path):
+    files = [(f"src/file{index}.py", "x" * 100, "summary") for index in range(3)]
+
+    index = _write_shards(tmp_path, files, max_shard_bytes=200)
+
+    assert sorted(index["shards"]) == ["src.2.md", "src.3.md", "src.md"]
+    assert [index["files"][relative_path]["shard"] for relative_path, _, _ in files] == [
+        "src.md",
+        "src.2.md",
+        "src.3.md",
+    ]
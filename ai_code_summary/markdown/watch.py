@@ -0,0 +1,212 @@
+import heapq
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Self
+
+from loguru import logger
+
+from ai_code_summary.ai.summary import get_summary_cache, get_summary_inputs, try_summarize_content
+from ai_code_summary.env_variables import (
+    SUMMARY_CONCURRENCY,
+    SUMMARY_WATCH_DEBOUNCE_SECONDS,
+    SUMMARY_WATCH_INTERVAL_SECONDS,
+)
+from ai_code_summary.files.file_manager import get_code_files, read_file
+from ai_code_summary.files.manifest import Manifest, hash_content, load_manifest
+from ai_code_summary.markdown.export import _EXCLUDE_GITIGNORE_DIRS
+from ai_code_summary.markdown.incremental import update_markdown
+from ai_code_summary.metrics.stages import get_pipeline_metrics, write_metrics_report
+
+
+def snapshot_tree(directory: str, exclude_gitignore_dirs: list[str]) -> dict[str, tuple[int, int]]:
+    """
+    Takes the size and modification time of every code file in a directory.
+
+    Args:
+        directory (str): The directory containing the code to summarize.
+        exclude_gitignore_dirs (list[str]): Directories whose .gitignore files are not loaded.
+
+    Returns:
+        dict[str, tuple[int, int]]: The size and the modification time in nanoseconds of each file, keyed by its
+            POSIX path relative to `directory`.
+    """
+    base_dir = Path(directory)
+    snapshot = {}
+    for file_path in get_code_files(directory, exclude_gitignore_dirs=exclude_gitignore_dirs):
+        try:
+            stat = file_path.stat()
+        except FileNotFoundError:
+            continue  # Deleted since the walk listed it
+        snapshot[file_path.relative_to(base_dir).as_posix()] = (stat.st_size, stat.st_mtime_ns)
+    return snapshot
+
+
+class SummaryWatcher:
+    """
+    Keeps the markdown summary of a directory in sync with its working tree.
+
+    Every `poll` compares the sizes and modification times of the code files with the previous poll. Changes are
+    collected until none happened for `debounce` seconds, so a burst of saves, a checkout or a formatter run
+    leads to a single update. An update summarizes the changed files through a priority queue, most recently
+    modified first, so the files being edited get the first request slots, then patches only their sections of
+    the markdown, see `update_markdown`.
+
+    The summary workers, the OpenAI client, the summary cache and the compiled .gitignore files stay in memory
+    between updates.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        output_dir: str | Path = "./tmp",
+        exclude_gitignore_dirs: list[str] = _EXCLUDE_GITIGNORE_DIRS,
+        concurrency: int = SUMMARY_CONCURRENCY,
+        debounce: float = SUMMARY_WATCH_DEBOUNCE_SECONDS,
+    ):
+        self.directory = directory
+        self.exclude_gitignore_dirs = exclude_gitignore_dirs
+        self.concurrency = concurrency
+        self.debounce = debounce
+        self.base_dir_name = Path(directory).name or os.path.basename(os.getcwd())
+        self.output_dir = Path(output_dir)
+        self.markdown_file = self.output_dir / f"{self.base_dir_name}.md"
+        self.manifest_file = self.output_dir / f"{self.base_dir_name}.manifest.json"
+        self._executor = ThreadPoolExecutor(max_workers=max(concurrency, 1), thread_name_prefix="watch")
+        self._snapshot: dict[str, tuple[int, int]] = {}
+        self._pending: set[str] = set()
+        self._last_change = 0.0
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def start(self) -> dict[str, str | None]:
+        """
+        Brings the markdown up to date with the working tree, as an incremental run would.
+
+        Returns:
+            dict[str, str | None]: The summary of each file keyed by its POSIX path, see `update_markdown`.
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._snapshot = snapshot_tree(self.directory, self.exclude_gitignore_dirs)
+        return self._update(set())
+
+    def poll(self) -> dict[str, str | None] | None:
+        """
+        Checks the working tree for changes, and updates the markdown once they settled.
+
+        Returns:
+            dict[str, str | None] | None: The summary of each file when the markdown was updated, otherwise None.
+        """
+        snapshot = snapshot_tree(self.directory, self.exclude_gitignore_dirs)
+        changed = {
+            relative_path
+            for relative_path in snapshot.keys() | self._snapshot.keys()
+            if snapshot.get(relative_path) != self._snapshot.get(relative_path)
+        }
+        self._snapshot = snapshot
+        now = time.monotonic()
+        if changed:
+            logger.debug(f"Detected changes in {sorted(changed)}")
+            self._pending |= changed
+            self._last_change = now
+        if not self._pending or now - self._last_change < self.debounce:
+            return None
+
+        pending, self._pending = self._pending, set()
+        return self._update(pending)
+
+    def _update(self, changed: set[str]) -> dict[str, str | None]:
+        """
+        Summarizes the changed files in priority order and patches their sections of the markdown.
+
+        Args:
+            changed (set[str]): The added, modified and deleted files, by POSIX path.
+
+        Returns:
+            dict[str, str | None]: The summary of each file keyed by its POSIX path, see `update_markdown`.
+        """
+        metrics = get_pipeline_metrics()
+        metrics.reset()
+        logger.info(f"Updating {self.markdown_file} for {len(changed)} changed files")
+
+        # Most recently modified first, deleted files only need their section dropped
+        queue = [(-self._snapshot[path][1], path) for path in changed if path in self._snapshot]
+        heapq.heapify(queue)
+        base_dir = Path(self.directory)
+        previous_entries = (load_manifest(self.manifest_file) or Manifest()).files
+        file_contents: dict[str, str] = {}
+        while queue:
+            _, relative_path = heapq.heappop(queue)
+            file_contents[relative_path] = read_file(base_dir / relative_path)[1]
+        # Files only touched, e.g. by a checkout or a formatter leaving them as they were, keep their summary
+        modified_files = [
+            (base_dir / relative_path, content)
+            for relative_path, content in file_contents.items()
+            if content and hash_content(content) != getattr(previous_entries.get(relative_path), "sha256", None)
+        ]
+        summaries: dict[str, Future] = {}
+        for _, content in get_summary_inputs(modified_files):
+            if content not in summaries:
+                summaries[content] = self._executor.submit(try_summarize_content, content)
+
+        def summarize(content: str) -> str | None:
+            # A file saved again since it was queued is summarized as it is now
+            summary = summaries.get(content)
+            return summary.result() if summary is not None else try_summarize_content(content)
+
+        file_summaries = update_markdown(
+            self.directory,
+            self.exclude_gitignore_dirs,
+            self.base_dir_name,
+            self.markdown_file,
+            self.manifest_file,
+            self.concurrency,
+            summarize=summarize,
+            file_contents=file_contents,
+        )
+
+        if summary_cache := get_summary_cache():
+            logger.info(f"Summary cache stats: {summary_cache.stats()}")
+        write_metrics_report(self.output_dir / f"{self.base_dir_name}.metrics.json", metrics.report())
+        return file_summaries
+
+
+def watch_directory(
+    directory: str,
+    output_dir: str | Path = "./tmp",
+    exclude_gitignore_dirs: list[str] = _EXCLUDE_GITIGNORE_DIRS,
+    concurrency: int = SUMMARY_CONCURRENCY,
+    interval: float = SUMMARY_WATCH_INTERVAL_SECONDS,
+    debounce: float = SUMMARY_WATCH_DEBOUNCE_SECONDS,
+) -> None:
+    """
+    Keeps `<output_dir>/<directory name>.md` in sync with the working tree until interrupted, see `SummaryWatcher`.
+
+    The working tree is polled every `interval` seconds. Interrupting the watch, e.g. with Ctrl+C, leaves the
+    markdown of the last completed update in place.
+
+    Args:
+        directory (str): The directory containing the code to summarize.
+        output_dir (str | Path): The directory receiving the markdown, the manifest and the run report.
+        exclude_gitignore_dirs (list[str]): Directories whose .gitignore files are not loaded.
+        concurrency (int): The maximum number of summary requests kept in flight at once.
+        interval (float): The delay between two polls of the working tree, in seconds.
+        debounce (float): The time without changes after which changes are summarized, in seconds.
+
+    Returns:
+        None
+    """
+    with SummaryWatcher(directory, output_dir, exclude_gitignore_dirs, concurrency, debounce) as watcher:
+        watcher.start()
+        logger.info(f"Watching {directory} for changes, every {interval} seconds")
+        try:
+            while True:
+                time.sleep(interval)
+                watcher.poll()
+        except KeyboardInterrupt:
+            logger.info(f"Stopped watching {directory}")
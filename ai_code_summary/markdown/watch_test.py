@@ -0,0 +1,96 @@
+import os
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+from ai_code_summary.markdown.watch import SummaryWatcher, snapshot_tree
+
+
+@pytest.fixture
+def source_dir(tmp_path: Path) -> Path:
+    source_dir = tmp_path / "project"
+    source_dir.mkdir()
+    (source_dir / "a.py").write_text("a = 1")
+    (source_dir / "b.py").write_text("b = 1")
+    return source_dir
+
+
+@pytest.fixture
+def mock_summarize():
+    summarize = Mock(side_effect=lambda content: f"summary of {content}")
+    with (
+        patch("ai_code_summary.markdown.watch.try_summarize_content", summarize),
+        patch("ai_code_summary.markdown.incremental.try_summarize_content", summarize),
+    ):
+        yield summarize
+
+
+def test_snapshot_tree(source_dir: Path):
+    snapshot = snapshot_tree(str(source_dir), [])
+
+    assert snapshot.keys() == {"a.py", "b.py"}
+    assert snapshot["a.py"] == (5, (source_dir / "a.py").stat().st_mtime_ns)
+
+
+def test_summary_watcher_patches_changed_files(source_dir: Path, tmp_path: Path, mock_summarize: Mock):
+    with SummaryWatcher(str(source_dir), tmp_path / "output", [], concurrency=2, debounce=0) as watcher:
+        watcher.start()
+        assert watcher.poll() is None
+        mock_summarize.reset_mock()
+
+        (source_dir / "a.py").write_text("a = 22")
+        (source_dir / "b.py").unlink()
+        (source_dir / "c.py").write_text("c = 1")
+        file_summaries = watcher.poll()
+
+    assert file_summaries == {"a.py": "summary of a = 22", "c.py": "summary of c = 1"}
+    assert sorted(call.args[0] for call in mock_summarize.call_args_list) == ["a = 22", "c = 1"]
+    markdown = (tmp_path / "output" / "project.md").read_text()
+    assert "summary of a = 22" in markdown
+    assert "b.py" not in markdown
+    assert (tmp_path / "output" / "project.metrics.json").exists()
+
+
+def test_summary_watcher_waits_for_changes_to_settle(source_dir: Path, tmp_path: Path, mock_summarize: Mock):
+    with SummaryWatcher(str(source_dir), tmp_path / "output", [], concurrency=1, debounce=60) as watcher:
+        watcher.start()
+        (source_dir / "a.py").write_text("a = 22")
+
+        assert watcher.poll() is None
+
+        watcher.debounce = 0
+        assert watcher.poll()["a.py"] == "summary of a = 22"
+
+
+def test_summary_watcher_summarizes_recently_modified_files_first(
+    source_dir: Path, tmp_path: Path, mock_summarize: Mock
+):
+    with SummaryWatcher(str(source_dir), tmp_path / "output", [], concurrency=1, debounce=0) as watcher:
+        watcher.start()
+        mock_summarize.reset_mock()
+
+        (source_dir / "a.py").write_text("a = 22")
+        (source_dir / "b.py").write_text("b = 22")
+        os.utime(source_dir / "a.py", ns=(2_000_000_000, 2_000_000_000))
+        os.utime(source_dir / "b.py", ns=(1_000_000_000, 1_000_000_000))
+        watcher.poll()
+
+    assert [call.args[0] for call in mock_summarize.call_args_list] == ["a = 22", "b = 22"]
+
+
+def test_summary_watcher_skips_touched_files_and_reads_changed_files_once(
+    source_dir: Path, tmp_path: Path, mock_summarize: Mock
+):
+    with SummaryWatcher(str(source_dir), tmp_path / "output", [], concurrency=1, debounce=0) as watcher:
+        watcher.start()
+        mock_summarize.reset_mock()
+
+        os.utime(source_dir / "a.py", ns=(2_000_000_000, 2_000_000_000))
+        (source_dir / "b.py").write_text("b = 22")
+        with patch("ai_code_summary.markdown.incremental.read_file", side_effect=AssertionError) as mock_read_file:
+            file_summaries = watcher.poll()
+
+    assert file_summaries == {"a.py": "summary of a = 1", "b.py": "summary of b = 22"}
+    assert [call.args[0] for call in mock_summarize.call_args_list] == ["b = 22"]
+    mock_read_file.assert_not_called()
@@ -0,0 +1,232 @@
+import json
+import math
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from functools import cache
+from pathlib import Path
+
+from loguru import logger
+
+from ai_code_summary.env_variables import SUMMARY_INPUT_COST_PER_MILLION, SUMMARY_OUTPUT_COST_PER_MILLION
+
+# The pipeline stages, in the order they are reported
+STAGES = ["gitignore", "walk", "read", "tmp_write", "deduplicate", "summarize", "batch", "markdown_write", "rollup"]
+# Batch requests cost half the price of regular requests
+BATCH_DISCOUNT = 0.5
+
+
+@dataclass
+class StageSample:
+    """
+    What a single operation of a stage processed, filled in while the operation runs.
+
+    `count` is the number of items the operation handled, e.g. the files found by a walk.
+    """
+
+    count: int = 1
+    bytes: int = 0
+    tokens_in: int = 0
+    tokens_out: int = 0
+    cost: float = 0.0
+
+
+@dataclass
+class StageMetrics:
+    """
+    The operations recorded for one stage of the pipeline.
+
+    `total_seconds` adds up the duration of every operation, while `wall_seconds` spans from the start of the
+    first operation to the end of the last one, so concurrent operations count once.
+    """
+
+    count: int = 0
+    bytes: int = 0
+    tokens_in: int = 0
+    tokens_out: int = 0
+    cost: float = 0.0
+    durations: list[float] = field(default_factory=list)
+    first_start: float | None = None
+    last_end: float | None = None
+
+    def add(self, sample: StageSample, start: float, end: float) -> None:
+        """
+        Records one operation.
+
+        Args:
+            sample (StageSample): What the operation processed.
+            start (float): The `time.perf_counter` value at the start of the operation.
+            end (float): The `time.perf_counter` value at the end of the operation.
+        """
+        self.count += sample.count
+        self.bytes += sample.bytes
+        self.tokens_in += sample.tokens_in
+        self.tokens_out += sample.tokens_out
+        self.cost += sample.cost
+        self.durations.append(end - start)
+        self.first_start = start if self.first_start is None else min(self.first_start, start)
+        self.last_end = end if self.last_end is None else max(self.last_end, end)
+
+    def report(self) -> dict:
+        """
+        Summarizes the recorded operations.
+
+        Returns:
+            dict: The item counts, operations, bytes, tokens, estimated cost, and total, wall, p50 and p95
+                times of an operation in seconds.
+        """
+        durations = sorted(self.durations)
+        return {
+            "count": self.count,
+            "operations": len(durations),
+            "bytes": self.bytes,
+            "tokens_in": self.tokens_in,
+            "tokens_out": self.tokens_out,
+            "estimated_cost": round(self.cost, 6),
+            "total_seconds": round(sum(durations), 6),
+            "wall_seconds": round(self.last_end - self.first_start, 6) if durations else 0.0,
+            "p50_seconds": round(_percentile(durations, 0.5), 6),
+            "p95_seconds": round(_percentile(durations, 0.95), 6),
+        }
+
+
+class PipelineMetrics:
+    """
+    Thread-safe per-stage instrumentation of a summary run.
+
+    Each operation is timed through `stage`. When OpenTelemetry is installed, every operation is also
+    recorded as a span named `ai_code_summary.<stage>`, which costs nothing until a tracer provider is set up.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: dict[str, StageMetrics] = {}
+        self._start = time.perf_counter()
+
+    def reset(self) -> None:
+        """
+        Forgets every recorded operation, at the start of a new run.
+        """
+        with self._lock:
+            self._stages = {}
+            self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageSample]:
+        """
+        Times one operation of a stage.
+
+        Args:
+            name (str): The stage, one of `STAGES`.
+
+        Yields:
+            StageSample: The sample to fill with what the operation processed.
+        """
+        sample = StageSample()
+        tracer = _get_tracer()
+        with tracer.start_as_current_span(f"ai_code_summary.{name}") if tracer else nullcontext() as span:
+            start = time.perf_counter()
+            try:
+                yield sample
+            finally:
+                end = time.perf_counter()
+                if span is not None:
+                    span.set_attributes(
+                        {"bytes": sample.bytes, "tokens_in": sample.tokens_in, "tokens_out": sample.tokens_out}
+                    )
+                with self._lock:
+                    self._stages.setdefault(name, StageMetrics()).add(sample, start, end)
+
+    def report(self) -> dict:
+        """
+        Builds the JSON-serializable report of the run so far.
+
+        Returns:
+            dict: The elapsed time, the totals and the metrics of each stage.
+        """
+        with self._lock:
+            stages = {
+                name: self._stages[name].report()
+                for name in sorted(self._stages, key=lambda name: (STAGES + [name]).index(name))
+            }
+            elapsed_seconds = time.perf_counter() - self._start
+        return {
+            "elapsed_seconds": round(elapsed_seconds, 6),
+            "tokens_in": sum(stage["tokens_in"] for stage in stages.values()),
+            "tokens_out": sum(stage["tokens_out"] for stage in stages.values()),
+            "estimated_cost": round(sum(stage["estimated_cost"] for stage in stages.values()), 6),
+            "stages": stages,
+        }
+
+
+@cache
+def get_pipeline_metrics() -> PipelineMetrics:
+    """
+    Returns the metrics shared by every stage of the pipeline.
+
+    Returns:
+        PipelineMetrics: The pipeline metrics.
+    """
+    return PipelineMetrics()
+
+
+def write_metrics_report(report_file: Path, report: dict) -> None:
+    """
+    Logs the report of a run and writes it as JSON.
+
+    Args:
+        report_file (Path): The path to the JSON report.
+        report (dict): The report, see `PipelineMetrics.report`.
+    """
+    report_json = json.dumps(report, indent=2)
+    report_file.parent.mkdir(parents=True, exist_ok=True)
+    report_file.write_text(report_json, encoding="utf-8")
+    logger.info(f"Run report written to {report_file}:\n{report_json}")
+
+
+def estimate_cost(tokens_in: int, tokens_out: int, discount: float = 1.0) -> float:
+    """
+    Estimates the price of a request from the configured per-million token prices.
+
+    Args:
+        tokens_in (int): The prompt tokens.
+        tokens_out (int): The completion tokens.
+        discount (float): The factor applied to the price, e.g. 0.5 for the Batch API.
+
+    Returns:
+        float: The estimated cost, in the currency of the configured prices.
+    """
+    return (tokens_in * SUMMARY_INPUT_COST_PER_MILLION + tokens_out * SUMMARY_OUTPUT_COST_PER_MILLION) * discount / 1e6
+
+
+@cache
+def _get_tracer():
+    """
+    Returns the OpenTelemetry tracer of the package, when OpenTelemetry is installed.
+
+    Returns:
+        opentelemetry.trace.Tracer | None: The tracer, or None without OpenTelemetry.
+    """
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        return None
+    return trace.get_tracer("ai_code_summary")
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    """
+    Returns a percentile of sorted values, using the nearest-rank method.
+
+    Args:
+        sorted_values (list[float]): The values, in ascending order.
+        fraction (float): The percentile, between 0 and 1.
+
+    Returns:
+        float: The percentile, or 0 when there are no values.
+    """
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
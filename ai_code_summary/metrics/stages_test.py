@@ -0,0 +1,72 @@
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from ai_code_summary.metrics.stages import PipelineMetrics, _percentile, estimate_cost, write_metrics_report
+
+
+def test_percentile():
+    values = [float(value) for value in range(1, 101)]
+
+    assert _percentile(values, 0.5) == 50
+    assert _percentile(values, 0.95) == 95
+    assert _percentile([3.0], 0.95) == 3
+    assert _percentile([], 0.5) == 0
+
+
+@patch("ai_code_summary.metrics.stages.SUMMARY_INPUT_COST_PER_MILLION", 1.0)
+@patch("ai_code_summary.metrics.stages.SUMMARY_OUTPUT_COST_PER_MILLION", 4.0)
+def test_estimate_cost():
+    assert estimate_cost(1_000_000, 500_000) == 3.0
+    assert estimate_cost(1_000_000, 500_000, discount=0.5) == 1.5
+
+
+def test_pipeline_metrics_report():
+    times = iter([9.0, 10.0, 10.5, 11.0, 12.0, 20.0])
+
+    with patch("ai_code_summary.metrics.stages.time.perf_counter", side_effect=lambda: next(times)):
+        metrics = PipelineMetrics()
+        with metrics.stage("summarize") as sample:
+            sample.bytes, sample.tokens_in, sample.tokens_out, sample.cost = 10, 100, 20, 0.25
+        with metrics.stage("read") as sample:
+            sample.bytes = 5
+        report = metrics.report()
+
+    assert list(report["stages"]) == ["read", "summarize"]
+    assert report["stages"]["summarize"] == {
+        "count": 1,
+        "operations": 1,
+        "bytes": 10,
+        "tokens_in": 100,
+        "tokens_out": 20,
+        "estimated_cost": 0.25,
+        "total_seconds": 0.5,
+        "wall_seconds": 0.5,
+        "p50_seconds": 0.5,
+        "p95_seconds": 0.5,
+    }
+    assert report["stages"]["read"]["total_seconds"] == 1.0
+    assert (report["elapsed_seconds"], report["tokens_in"], report["tokens_out"]) == (11.0, 100, 20)
+    assert report["estimated_cost"] == 0.25
+
+
+def test_pipeline_metrics_records_failed_operations_and_resets():
+    metrics = PipelineMetrics()
+
+    with pytest.raises(ValueError), metrics.stage("walk") as sample:
+        sample.count = 3
+        raise ValueError
+
+    assert metrics.report()["stages"]["walk"]["count"] == 3
+    metrics.reset()
+    assert metrics.report()["stages"] == {}
+
+
+def test_write_metrics_report(tmp_path: Path):
+    report_file = tmp_path / "reports" / "project.metrics.json"
+
+    write_metrics_report(report_file, {"stages": {}})
+
+    assert json.loads(report_file.read_text()) == {"stages": {}}
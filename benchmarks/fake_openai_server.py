@@ -0,0 +1,159 @@
+"""
+A local fake of the OpenAI chat completions endpoint, with configurable latency and rate limits.
+
+Run with `python -m benchmarks.fake_openai_server [port]` and point the pipeline at it with
+`OPENAI_BASE_URL=http://127.0.0.1:<port>/v1`.
+"""
+
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Self
+
+
+class _RequestBucket:
+    """
+    A requests-per-minute token bucket shared by every connection of the server.
+    """
+
+    def __init__(self, requests_per_minute: int):
+        self.requests_per_minute = requests_per_minute
+        self._lock = threading.Lock()
+        self._tokens = float(requests_per_minute)
+        self._updated_at = time.monotonic()
+
+    def take(self) -> tuple[bool, float, int]:
+        """
+        Takes one request from the bucket.
+
+        Returns:
+            tuple[bool, float, int]: Whether the request is allowed, the seconds until the next request is
+                allowed, and the remaining requests.
+        """
+        with self._lock:
+            now = time.monotonic()
+            refill_rate = self.requests_per_minute / 60
+            self._tokens = min(self.requests_per_minute, self._tokens + (now - self._updated_at) * refill_rate)
+            self._updated_at = now
+            if self._tokens < 1:
+                return False, (1 - self._tokens) / refill_rate, 0
+            self._tokens -= 1
+            return True, (1 - self._tokens % 1) / refill_rate, int(self._tokens)
+
+
+class _FakeOpenAIHandler(BaseHTTPRequestHandler):
+    latency_seconds: float
+    bucket: _RequestBucket | None
+    stats: dict[str, int]
+    stats_lock: threading.Lock
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.path != "/v1/chat/completions":
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        headers = {}
+        if self.bucket is not None:
+            allowed, reset_seconds, remaining = self.bucket.take()
+            headers = {
+                "x-ratelimit-limit-requests": str(self.bucket.requests_per_minute),
+                "x-ratelimit-remaining-requests": str(remaining),
+                "x-ratelimit-reset-requests": f"{reset_seconds * 1000:.0f}ms",
+            }
+            if not allowed:
+                self._count("rate_limited")
+                headers["retry-after-ms"] = f"{reset_seconds * 1000:.0f}"
+                error = {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}
+                self._send_json(429, {"error": error}, headers)
+                return
+
+        time.sleep(self.latency_seconds)
+        prompt = body["messages"][-1]["content"]
+        prompt_tokens = sum(len(message["content"]) for message in body["messages"]) // 4
+        summary = f"Fake summary of {len(prompt)} characters."
+        self._count("completed")
+        self._send_json(
+            200,
+            {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": summary},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": len(summary) // 4,
+                    "total_tokens": prompt_tokens + len(summary) // 4,
+                },
+            },
+            headers,
+        )
+
+    def _count(self, name: str) -> None:
+        with self.stats_lock:
+            self.stats[name] = self.stats.get(name, 0) + 1
+
+    def _send_json(self, status: int, data: dict, headers: dict[str, str] | None = None) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeOpenAIServer:
+    """
+    Serves fake chat completions from a background thread.
+
+    Each completion takes `latency_seconds`. With `requests_per_minute`, requests above the limit are answered
+    with a 429 and the `retry-after-ms` and `x-ratelimit-*` headers of the real API.
+    """
+
+    def __init__(self, latency_seconds: float = 0.05, requests_per_minute: int | None = None, port: int = 0):
+        handler = type(
+            "Handler",
+            (_FakeOpenAIHandler,),
+            {
+                "latency_seconds": latency_seconds,
+                "bucket": _RequestBucket(requests_per_minute) if requests_per_minute else None,
+                "stats": {},
+                "stats_lock": threading.Lock(),
+            },
+        )
+        self.stats = handler.stats
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}/v1"
+
+    def __enter__(self) -> Self:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+if __name__ == "__main__":
+    with FakeOpenAIServer(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8000) as server:
+        print(f"Serving fake chat completions at {server.base_url}")
+        threading.Event().wait()
@@ -0,0 +1,137 @@
+"""
+Compares GitignoreMatcher with plain pathspec on a synthetic tree of 500k paths.
+
+Run with `python -m benchmarks.ignore_matcher_benchmark --paths 500000`, see `--help` for every option.
+"""
+
+import argparse
+import random
+import time
+
+import pathspec
+
+from ai_code_summary.code.gitignore_pathspec import GitignoreMatcher
+
+_GITIGNORE = """
+# Byte-compiled / optimized / DLL files
+__pycache__/
+*.py[cod]
+*$py.class
+*.so
+.Python
+build/
+develop-eggs/
+dist/
+downloads/
+eggs/
+.eggs/
+lib64/
+parts/
+sdist/
+var/
+wheels/
+*.egg-info/
+.installed.cfg
+*.egg
+MANIFEST
+*.manifest
+*.spec
+pip-log.txt
+pip-delete-this-directory.txt
+htmlcov/
+.tox/
+.nox/
+.coverage
+.coverage.*
+.cache
+nosetests.xml
+coverage.xml
+*.cover
+*.log
+.pytest_cache/
+*.mo
+*.pot
+local_settings.py
+db.sqlite3
+instance/
+.webassets-cache
+.scrapy
+docs/_build/
+target/
+.ipynb_checkpoints
+.python-version
+.env
+.venv
+env/
+venv/
+ENV/
+.mypy_cache/
+node_modules/
+npm-debug.log*
+yarn-error.log*
+*.tsbuildinfo
+.next/
+out/
+coverage/
+*.min.js
+*.map
+/tmp
+!keep.log
+"""
+
+_DIRS = ["src", "lib", "app", "pkg", "core", "utils", "api", "models", "views", "tests"]
+_IGNORED_DIRS = ["node_modules", "build", "__pycache__", ".venv", "dist", "coverage"]
+_FILES = ["index.js", "main.py", "module.pyc", "app.ts", "style.css", "bundle.min.js", "debug.log", "README.md"]
+
+
+def _generate_paths(path_count: int, seed: int = 42) -> list[str]:
+    """
+    Generates a synthetic tree of directories holding 1-15 files each, a quarter of them below directories
+    ignored by the .gitignore.
+    """
+    rng = random.Random(seed)
+    paths = []
+    while len(paths) < path_count:
+        depth = rng.randint(1, 6)
+        parts = [rng.choice(_DIRS) + str(rng.randint(0, 20)) for _ in range(depth)]
+        if rng.random() < 0.25:
+            parts.insert(rng.randint(0, depth), rng.choice(_IGNORED_DIRS))
+        directory = "/".join(parts)
+        paths.extend(f"{directory}/{index}_{rng.choice(_FILES)}" for index in range(rng.randint(1, 15)))
+    return paths[:path_count]
+
+
+def _time(label: str, match, paths: list[str]) -> tuple[float, list[bool]]:
+    start_time = time.perf_counter()
+    verdicts = [match(path) for path in paths]
+    elapsed = time.perf_counter() - start_time
+    print(f"{label:<20} {elapsed:8.2f}s  {len(paths) / elapsed:12,.0f} paths/s  {sum(verdicts):,} ignored")
+    return elapsed, verdicts
+
+
+def run_benchmark(path_count: int) -> None:
+    patterns = _GITIGNORE.splitlines()
+    paths = _generate_paths(path_count)
+    print(f"{len(paths):,} paths, {sum(1 for line in patterns if line and not line.startswith('#'))} patterns")
+
+    spec = pathspec.GitIgnoreSpec.from_lines(patterns)
+    pathspec_elapsed, pathspec_verdicts = _time("pathspec", spec.match_file, paths)
+
+    matcher = GitignoreMatcher()
+    matcher.add_patterns("", patterns)
+    matcher_elapsed, matcher_verdicts = _time("GitignoreMatcher", matcher.is_ignored, paths)
+
+    mismatches = sum(expected != actual for expected, actual in zip(pathspec_verdicts, matcher_verdicts))
+    print(f"speedup: {pathspec_elapsed / matcher_elapsed:.1f}x, mismatching verdicts: {mismatches}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paths", type=int, default=500_000, help="paths matched against the .gitignore")
+    args = parser.parse_args()
+
+    run_benchmark(args.paths)
+
+
+if __name__ == "__main__":
+    main()
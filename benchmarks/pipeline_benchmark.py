@@ -0,0 +1,131 @@
+"""
+Runs the full `create_markdown_from_code` pipeline on a synthetic repository against a fake OpenAI server.
+
+Run with `python -m benchmarks.pipeline_benchmark --files 2000 --latency 0.2 --rpm 3000`, see `--help` for every
+option. The results, including the run report of each stage, are printed as JSON and can be saved with `--output`
+to compare releases.
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from loguru import logger
+
+from benchmarks.fake_openai_server import FakeOpenAIServer
+from benchmarks.synthetic_repo import generate_repository
+
+
+def run_benchmark(
+    files: int = 1_000,
+    depth: int = 4,
+    gitignores: int = 10,
+    mean_file_size: int = 2_000,
+    latency: float = 0.05,
+    rpm: int | None = None,
+    concurrency: int = 8,
+    trace_memory: bool = True,
+) -> dict:
+    """
+    Generates a repository, summarizes it through the fake server and measures the run.
+
+    Returns:
+        dict: The configuration, throughput, memory, server statistics and per-stage run report.
+    """
+    # The shared client, rate limiter and request slots are rebuilt against the fake server
+    from ai_code_summary.ai import openai_backend, summary
+    from ai_code_summary.markdown.export import create_markdown_from_code
+    from ai_code_summary.metrics.stages import get_pipeline_metrics
+
+    with (
+        tempfile.TemporaryDirectory() as work_dir,
+        FakeOpenAIServer(latency_seconds=latency, requests_per_minute=rpm) as server,
+    ):
+        repository_dir = Path(work_dir) / "repository"
+        repository = generate_repository(repository_dir, files, depth, gitignores, mean_file_size)
+
+        previous_base_url = os.environ.get("OPENAI_BASE_URL")
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        for cached in (openai_backend.get_open_ai_client, summary.get_rate_limiter, summary.get_request_slots):
+            cached.cache_clear()
+        if trace_memory:
+            tracemalloc.start()
+        try:
+            start_time = time.perf_counter()
+            create_markdown_from_code(str(repository_dir), concurrency=concurrency, output_dir=Path(work_dir) / "out")
+            elapsed = time.perf_counter() - start_time
+            traced_peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        finally:
+            tracemalloc.stop()
+            if previous_base_url is None:
+                os.environ.pop("OPENAI_BASE_URL", None)
+            else:
+                os.environ["OPENAI_BASE_URL"] = previous_base_url
+            for cached in (openai_backend.get_open_ai_client, summary.get_rate_limiter, summary.get_request_slots):
+                cached.cache_clear()
+
+        return {
+            "config": {
+                "files": files,
+                "depth": depth,
+                "gitignores": gitignores,
+                "mean_file_size": mean_file_size,
+                "latency": latency,
+                "rpm": rpm,
+                "concurrency": concurrency,
+            },
+            "repository": repository,
+            "elapsed_seconds": round(elapsed, 3),
+            "files_per_second": round(files / elapsed, 1),
+            "bytes_per_second": round(repository["code_bytes"] / elapsed),
+            "traced_memory_peak_bytes": traced_peak,
+            "max_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+            "server": dict(server.stats),
+            "report": get_pipeline_metrics().report(),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=1_000, help="code files in the repository")
+    parser.add_argument("--depth", type=int, default=4, help="maximum directory depth")
+    parser.add_argument("--gitignores", type=int, default=10, help=".gitignore files in the repository")
+    parser.add_argument("--mean-file-size", type=int, default=2_000, help="mean file size in bytes")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per fake completion")
+    parser.add_argument("--rpm", type=int, default=None, help="requests per minute before the server answers 429")
+    parser.add_argument("--concurrency", type=int, default=8, help="summary workers, capped by SUMMARY_CONCURRENCY")
+    parser.add_argument("--trace-memory", action=argparse.BooleanOptionalAction, default=True, help="use tracemalloc")
+    parser.add_argument("--cache", action="store_true", help="keep the summary cache configured in the environment")
+    parser.add_argument("--log-level", default="WARNING", help="level of the pipeline's log messages")
+    parser.add_argument("--output", type=Path, help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    if not args.cache:
+        os.environ["SUMMARY_CACHE_PATH"] = ""  # Read when the pipeline is first imported
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+
+    results = run_benchmark(
+        args.files,
+        args.depth,
+        args.gitignores,
+        args.mean_file_size,
+        args.latency,
+        args.rpm,
+        args.concurrency,
+        args.trace_memory,
+    )
+    results_json = json.dumps(results, indent=2)
+    print(results_json)
+    if args.output:
+        args.output.write_text(results_json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import json
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from ai_code_summary.files.file_manager import get_code_files
+from benchmarks.fake_openai_server import FakeOpenAIServer
+from benchmarks.pipeline_benchmark import run_benchmark
+from benchmarks.synthetic_repo import generate_repository
+
+
+def _post_completion(base_url: str) -> int:
+    request = urllib.request.Request(
+        f"{base_url}/chat/completions",
+        data=json.dumps({"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "a = 1"}]}).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def test_generate_repository_ignores_the_ignored_files(tmp_path: Path):
+    repository = generate_repository(tmp_path, file_count=50, gitignore_count=3)
+
+    assert repository["gitignore_files"] == 3
+    assert len(get_code_files(str(tmp_path))) == 50
+
+
+def test_fake_openai_server_rate_limits_requests():
+    with FakeOpenAIServer(latency_seconds=0, requests_per_minute=2) as server:
+        statuses = [_post_completion(server.base_url) for _ in range(3)]
+
+    assert statuses == [200, 200, 429]
+    assert server.stats == {"completed": 2, "rate_limited": 1}
+
+
+def test_run_benchmark():
+    results = run_benchmark(files=20, gitignores=2, mean_file_size=200, latency=0, trace_memory=False)
+
+    assert results["server"] == {"completed": 20}
+    assert results["report"]["stages"]["summarize"]["count"] == 20
+    assert results["files_per_second"] > 0
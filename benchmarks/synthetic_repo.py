@@ -0,0 +1,102 @@
+"""
+Generates synthetic repositories for the pipeline benchmark.
+
+Run with `python -m benchmarks.synthetic_repo <directory> [file_count]` to generate one on its own.
+"""
+
+import random
+import sys
+from pathlib import Path
+
+_DIRS = ["src", "lib", "app", "pkg", "core", "utils", "api", "models", "views", "tests"]
+_EXTENSIONS = [".py", ".ts", ".js", ".md", ".yml", ".css"]
+_IGNORED_DIRS = ["build", "dist", "node_modules", "__pycache__"]
+_IGNORED_EXTENSIONS = [".log", ".pyc", ".tmp"]
+_LINE_TEMPLATES = [
+    "def function_{index}(value):\n    return value * {index}\n",
+    "class Model{index}:\n    name = 'model {index}'\n",
+    "CONSTANT_{index} = {index}\n",
+    "# Comment explaining step {index} of the algorithm\n",
+    "result_{index} = [item for item in range({index}) if item % 3]\n",
+]
+
+
+def _generate_content(rng: random.Random, size: int) -> str:
+    """
+    Generates code-like content of roughly `size` bytes.
+    """
+    lines = []
+    length = 0
+    while length < size:
+        line = rng.choice(_LINE_TEMPLATES).format(index=rng.randint(0, 10_000))
+        lines.append(line)
+        length += len(line)
+    return "".join(lines)
+
+
+def generate_repository(
+    root: Path,
+    file_count: int = 1_000,
+    depth: int = 4,
+    gitignore_count: int = 10,
+    mean_file_size: int = 2_000,
+    ignored_fraction: float = 0.2,
+    seed: int = 42,
+) -> dict:
+    """
+    Generates a synthetic repository below `root`.
+
+    File sizes follow a log-normal distribution around `mean_file_size`, so most files are small and a few are
+    large, like in real repositories. A fraction of extra files is written below ignored directories or with
+    ignored extensions. The root `.gitignore` ignores all of them, and the other `.gitignore` files are spread
+    over the tree to exercise the matcher.
+
+    Returns:
+        dict: What was generated: code files, ignored files, .gitignore files and code bytes.
+    """
+    rng = random.Random(seed)
+    directories = [Path("")]
+    while len(directories) < max(1, file_count // 8):
+        parent = rng.choice(directories)
+        if len(parent.parts) < depth:
+            directories.append(parent / f"{rng.choice(_DIRS)}{len(directories)}")
+
+    # The root .gitignore ignores every ignored file, the nested ones repeat some of its patterns
+    patterns = [f"{name}/" for name in _IGNORED_DIRS] + [f"*{extension}" for extension in _IGNORED_EXTENSIONS]
+    nested_count = max(0, min(gitignore_count, len(directories)) - 1)
+    gitignore_dirs = ([Path("")] if gitignore_count > 0 else []) + rng.sample(directories[1:], nested_count)
+    for directory in gitignore_dirs:
+        (root / directory).mkdir(parents=True, exist_ok=True)
+        lines = patterns if directory == Path("") else rng.sample(patterns, 4) + ["!keep.log"]
+        (root / directory / ".gitignore").write_text("\n".join(lines) + "\n")
+
+    code_bytes = 0
+    for index in range(file_count):
+        directory = root / rng.choice(directories)
+        directory.mkdir(parents=True, exist_ok=True)
+        size = max(1, int(rng.lognormvariate(0, 1) * mean_file_size / 1.65))  # The mean of lognormvariate(0, 1)
+        content = _generate_content(rng, size)
+        (directory / f"file{index}{rng.choice(_EXTENSIONS)}").write_text(content)
+        code_bytes += len(content)
+
+    ignored_count = int(file_count * ignored_fraction)
+    for index in range(ignored_count):
+        directory = root / rng.choice(directories)
+        if rng.random() < 0.5:
+            directory = directory / rng.choice(_IGNORED_DIRS)
+            ignored_file = directory / f"ignored{index}.py"
+        else:
+            ignored_file = directory / f"ignored{index}{rng.choice(_IGNORED_EXTENSIONS)}"
+        directory.mkdir(parents=True, exist_ok=True)
+        ignored_file.write_text(_generate_content(rng, 200))
+
+    return {
+        "files": file_count,
+        "ignored_files": ignored_count,
+        "gitignore_files": len(gitignore_dirs),
+        "code_bytes": code_bytes,
+    }
+
+
+if __name__ == "__main__":
+    print(generate_repository(Path(sys.argv[1]), int(sys.argv[2]) if len(sys.argv) > 2 else 1_000))
@@ -0,0 +1,6 @@
+import sys
+
+from ai_code_summary.markdown.multi_repo import create_markdown_for_repositories
+
+if __name__ == "__main__":
+    create_markdown_for_repositories(sys.argv[1:] or ["."])
@@ -0,0 +1,6 @@
+import sys
+
+from ai_code_summary.markdown.watch import watch_directory
+
+if __name__ == "__main__":
+    watch_directory(sys.argv[1] if len(sys.argv) > 1 else ".")